@@ -1,59 +1,123 @@
-from langchain_openai import ChatOpenAI
-from advisor_agent.universitiesstates import ListUniversitiesResponse, systemState
+from advisor_agent.universitiesstates import UniversityTable, systemState
+from advisor_agent.speculation import SpeculationAborted, SpeculativeExecutor
+from langchain_core.runnables import RunnableConfig
+import logging
 import re
 
-def rank_unis(state: systemState):
+logger = logging.getLogger(__name__)
+
+
+def parse_fee(value) -> int:
+    """Extract the numeric amount from a fee string such as 'Rs. 150,000' (0 if none)."""
+    try:
+        # Remove common currency symbols and extract numbers
+        fee_match = re.search(r'[\d,]+', str(value))
+        if fee_match:
+            return int(fee_match.group().replace(',', ''))
+    except ValueError:
+        pass
+    return 0
+
+
+def rank_universities(universities: UniversityTable, fee_budget, city: str = "",
+                      should_stop=None) -> UniversityTable:
+    """
+    Filter universities to those within the fee budget and in the preferred city.
+
+    Works directly on the table's fee and city columns; no per-row models are built.
+
+    Args:
+        universities: Candidate universities (a UniversityTable or a list of University).
+        fee_budget: Maximum fee per semester (any format parse_fee understands).
+        city: Preferred city, or empty for any city.
+        should_stop: Optional callable checked per university; when it returns
+            True the ranking is abandoned with SpeculationAborted.
+
+    Returns:
+        A table of the matching universities in their original order.
+    """
+    table = UniversityTable.coerce(universities)
+    fee_budget_numeric = parse_fee(fee_budget)
+    logger.debug("Fee budget: %s -> %s", fee_budget, fee_budget_numeric)
+
+    # An unknown city matches no row; an empty one matches every row
+    city_code = table.city_code(city) if city else None
+    if city and city_code is None:
+        logger.debug("No universities in %s", city)
+        return table.take([])
+
+    selected = []
+    for i, (uni_fee_numeric, uni_city_code) in enumerate(zip(table.fees, table.city_codes)):
+        if should_stop is not None and should_stop():
+            raise SpeculationAborted()
+        logger.debug("University %s: %s", table.names[i], uni_fee_numeric)
+
+        # Check if university meets criteria
+        fee_ok = fee_budget_numeric == 0 or uni_fee_numeric <= fee_budget_numeric
+        city_ok = city_code is None or uni_city_code == city_code
+
+        if fee_ok and city_ok:
+            selected.append(i)
+            logger.debug("Added %s to ranked list", table.names[i])
+
+    logger.debug("Total universities: %d, Ranked: %d", len(table), len(selected))
+    return table.take(selected)
+
+
+# Ranks universities in the background while the approval interrupt waits for the user.
+# The result stays in this process rather than in graph state: a resume served by another
+# worker or after a restart finds nothing and rank_unis ranks inline.
+speculative_ranker = SpeculativeExecutor(rank_universities)
+
+
+def _thread_id(config: RunnableConfig):
+    return ((config or {}).get("configurable") or {}).get("thread_id")
+
+
+def _ranking_fingerprint(state: systemState) -> tuple:
+    """Identity of the ranking inputs; a speculative result is only reused if it matches."""
+    universities = UniversityTable.coerce(state.get("universities")).fingerprint()
+    return universities, str(state.get("fee_budget", "")), str(state.get("city") or "")
+
+
+def prerank_universities(state: systemState, config: RunnableConfig):
+    """
+    Start ranking the found universities speculatively.
+
+    Runs right after find_universities so the ranking is usually finished by
+    the time the user answers the approval interrupt. Leaves the state unchanged.
+    """
+    thread_id = _thread_id(config)
+    if thread_id and state.get("universities"):
+        speculative_ranker.submit(
+            thread_id, _ranking_fingerprint(state),
+            UniversityTable.coerce(state["universities"]), state.get("fee_budget", "0"), state.get("city") or "",
+        )
+    return {}
+
+
+def rank_unis(state: systemState, config: RunnableConfig):
     """
     A function that ranks universities based on the user's criteria.
 
+    Uses the speculative ranking started by prerank_universities when it was
+    computed from the same inputs in this process, and ranks inline otherwise
+    (a different worker, a restart, or a failed speculative job).
+
     Args:
         state: A systemState object containing user preferences and university details.
+        config: The run configuration (its thread_id keys the speculative result).
 
     Returns:
-        A Pydantic object containing the structured list of ranked universities.
+        A dictionary with the ranked universities as a UniversityTable.
     """
-    list_universities = state["universities"]
-    ranked_universities = []
-    
-    # Extract numeric value from fee budget
-    fee_budget_str = str(state.get("fee_budget", "0"))
-    fee_budget_numeric = 0
-    
-    # Try to extract numeric value from fee budget string
-    try:
-        # Remove common currency symbols and extract numbers
-        fee_match = re.search(r'[\d,]+', fee_budget_str)
-        if fee_match:
-            fee_budget_numeric = int(fee_match.group().replace(',', ''))
-    except:
-        fee_budget_numeric = 0
-    
-    print(f"Debug - Fee budget: {fee_budget_str} -> {fee_budget_numeric}")
-    
-    for uni in list_universities:
-        try:
-            # Extract numeric value from university fee
-            uni_fee_str = str(uni.fee_per_semester)
-            uni_fee_numeric = 0
-            
-            fee_match = re.search(r'[\d,]+', uni_fee_str)
-            if fee_match:
-                uni_fee_numeric = int(fee_match.group().replace(',', ''))
-            
-            print(f"Debug - University {uni.name}: {uni_fee_str} -> {uni_fee_numeric}")
-            
-            # Check if university meets criteria
-            fee_ok = fee_budget_numeric == 0 or uni_fee_numeric <= fee_budget_numeric
-            city_ok = not state.get("city") or uni.city.lower() == state["city"].lower()
-            
-            if fee_ok and city_ok:
-                ranked_universities.append(uni)
-                print(f"Debug - Added {uni.name} to ranked list")
-            
-        except Exception as e:
-            print(f"Debug - Error processing university {uni.name}: {e}")
-            # If there's an error, still include the university
-            ranked_universities.append(uni)
-    
-    print(f"Debug - Total universities: {len(list_universities)}, Ranked: {len(ranked_universities)}")
-    return {"ranked_universities": ranked_universities}
\ No newline at end of file
+    ranked_universities = None
+    thread_id = _thread_id(config)
+    if thread_id:
+        ranked_universities = speculative_ranker.collect(thread_id, _ranking_fingerprint(state))
+
+    if ranked_universities is None:
+        ranked_universities = rank_universities(
+            state["universities"], state.get("fee_budget", "0"), state.get("city") or ""
+        )
+    return {"ranked_universities": ranked_universities}
@@ -1,31 +1,67 @@
 import json
-from langchain_tavily import TavilySearch
 from langchain_core.prompts import PromptTemplate
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
-from advisor_agent.universitiesstates import ListUniversitiesResponse, University, systemState
-from langchain_google_genai import ChatGoogleGenerativeAI
+from advisor_agent.universitiesstates import ListUniversitiesResponse, University, UniversityTable, systemState
 from langchain_core.exceptions import OutputParserException
-from langchain_openai import ChatOpenAI
-from langchain_google_community.search import GoogleSearchAPIWrapper
+from runtime.clients import get_client_factory
+from runtime.coalesce import SingleFlight
+from runtime.telemetry import graph_runs, span
+from advisor_agent.context_compressor import SearchContextCompressor, query_terms_from_state
+import logging
 import os
+import re
 load_dotenv()
-# Set up Google Search
-os.environ["GOOGLE_CSE_ID"] = "your-cse-id"
-os.environ["GOOGLE_API_KEY"] = "your-api-key"
 
+logger = logging.getLogger(__name__)
+# Google Search reads GOOGLE_CSE_ID / GOOGLE_API_KEY from the environment (.env);
+# set BACKEND_MODE=fake or replay to run without them.
 
-def find_universities(state:systemState):
-    """
-    A simple agent that searches for university information and structures the output.
+# Define the prompt template once; the chain built from it is cached by the client factory.
+EXTRACTION_PROMPT = PromptTemplate(
+    template="""You are an expert assistant. Based on the user's query and the provided context, extract the requested information.
 
-    Args:
-        user_query: The user's request for university information.
+                User Query:
+                {query}
 
-    Returns:
-        A Pydantic object containing the structured list of universities.
+                Web Search Context:
+                {context}
+
+                Based *only* on the provided context, extract the details for the user.
+                If a specific piece of information (like exact fees or marks) is not in the context, use a value of 0 or not available if string.
+                """,
+                input_variables=["query", "context"],
+)
+
+# Trims the raw search output to the passages relevant to the query before extraction
+context_compressor = SearchContextCompressor()
+
+# Coalesces identical concurrent advisor searches across sessions
+advisor_flight = SingleFlight("find_universities")
+
+def advisor_query_key(state: systemState) -> tuple:
+    """
+    Build the normalized key identifying an advisor search.
+
+    Two sessions asking for the same degree in the same place with the same
+    budget and marks produce the same key, regardless of case, spacing or fee formatting.
     """
+    def norm(value) -> str:
+        return " ".join(str(value or "").lower().split())
 
+    fee_digits = re.sub(r"[^\d]", "", str(state.get("fee_budget", "")))
+    return (
+        norm(state.get("location")),
+        norm(state.get("city")),
+        norm(state.get("degree_preference")),
+        fee_digits,
+        int(state.get("inter_marks") or 0),
+        int(state.get("matric_marks") or 0),
+    )
+
+
+def _search_and_extract(state: systemState) -> UniversityTable:
+    """Run the web search and structured extraction for one advisor query."""
     user_query = (
     f"Universities in {state['location']} offering {state['degree_preference']} "
     f"with fee per semester under {state['fee_budget']} PKR, "
@@ -37,42 +73,50 @@ def find_universities(state:systemState):
 
     # search_tool = TavilySearch(max_results=7)
     # search_context = search_tool.invoke(f"information on {user_query}")
-    search_tool = GoogleSearchAPIWrapper()
-    
-    search_context = search_tool.run(f"information on {user_query}")
-
-    # Define the prompt template.
-    prompt = PromptTemplate(
-        template="""You are an expert assistant. Based on the user's query and the provided context, extract the requested information.
+    factory = get_client_factory()
+    with factory.limit("search"), span("search", "web_search") as attrs:
+        search_context = factory.get_search().run(f"information on {user_query}")
+        attrs["result_chars"] = len(search_context)
 
-                    User Query:
-                    {query}
+    compressed = context_compressor.compress(search_context, query_terms_from_state(state))
+    logger.debug("Search context: %d -> %d tokens (%d saved, %d/%d passages kept)",
+                 compressed['original_tokens'], compressed['compressed_tokens'], compressed['tokens_saved'],
+                 compressed['passages_kept'], compressed['passages_total'])
 
-                    Web Search Context:
-                    {context}
-
-                    Based *only* on the provided context, extract the details for the user.
-                    If a specific piece of information (like exact fees or marks) is not in the context, use a value of 0 or not available if string.
-                    """,
-                    input_variables=["query", "context"],
+    # Reuse the prebuilt prompt | structured LLM chain for this model configuration
+    chain = factory.get_structured_chain(
+        "university_extraction", EXTRACTION_PROMPT, ListUniversitiesResponse,
+        model="gpt-4o-2024-08-06", temperature=1.3
     )
 
-    llm = ChatOpenAI(model="gpt-4o-2024-08-06", temperature=1.3)  
-
-    structured_llm = llm.with_structured_output(ListUniversitiesResponse)
-
-    # Create the final chain
-    chain = prompt | structured_llm
-
     try:
         # Invoke the chain
-        response = chain.invoke({
-            "query": user_query,
-            "context": search_context
-        })
-        print(response)
-        return {"universities": response.universities}
+        with factory.limit("llm"):
+            response = chain.invoke({
+                "query": user_query,
+                "context": compressed["context"]
+            })
+        logger.debug("Extracted universities: %s", response)
+        return UniversityTable.from_universities(response.universities)
     except OutputParserException as e:
-        print(f"An error occurred while parsing the output: {e}")
+        logger.error("An error occurred while parsing the output: %s", e)
        
-        return {"universities": []}
+        return UniversityTable()
+
+
+def find_universities(state:systemState):
+    """
+    A simple agent that searches for university information and structures the output.
+
+    Identical queries running concurrently in different sessions share a single
+    search and extraction through the advisor single-flight group.
+
+    Args:
+        state: The student's profile and preferences.
+
+    Returns:
+        A dictionary with the universities as a columnar UniversityTable.
+    """
+    graph_runs.count("advisor")
+    # Tables are read-only, so coalesced sessions can share the same one
+    return {"universities": advisor_flight.do(advisor_query_key(state), lambda: _search_and_extract(state))}
@@ -1,8 +1,10 @@
 from advisor_agent.universitiesstates import systemState
+from advisor_agent.UnisRanker import speculative_ranker
+from langchain_core.runnables import RunnableConfig
 from langgraph.types import Command, interrupt
 
 # Decision node for interrupt
-def approve_decision(state: systemState) -> systemState:
+def approve_decision(state: systemState, config: RunnableConfig) -> systemState:
     """Ask user for approval to rank universities with enhanced messaging."""
     
     # Count universities found
@@ -35,6 +37,10 @@ Your choice (yes/no)?
         state['rank_unis'] = "yes"
     else:
         state['rank_unis'] = "no"
+        # The speculative ranking will not be needed
+        thread_id = (config.get("configurable") or {}).get("thread_id")
+        if thread_id:
+            speculative_ranker.cancel(thread_id)
     
     return state
 
@@ -0,0 +1,176 @@
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Iterable, List, TypedDict
+
+# Approximate prompt tokens allowed for the web search context
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "600"))
+
+# Words that say nothing about whether a passage is relevant
+_STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the this
+to was were will with which who what where when how information under your our
+""".split())
+
+# Terms every admission query cares about, added to the user's own fields
+_DOMAIN_TERMS = ("university", "admission", "fee", "semester", "merit", "marks",
+                 "inter", "matric", "portal", "apply", "eligibility", "criteria")
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_SPLIT_RE = re.compile(r"\n+|\.\.\.|(?<=[.!?])\s+(?=[A-Z0-9])")
+
+
+class CompressionResult(TypedDict):
+    context: str
+    passages_total: int
+    passages_kept: int
+    duplicates_removed: int
+    original_tokens: int
+    compressed_tokens: int
+    tokens_saved: int
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)."""
+    return (len(text) + 3) // 4
+
+
+def _tokenize(text: str) -> List[str]:
+    return [w for w in _WORD_RE.findall(text.lower()) if w not in _STOPWORDS]
+
+
+def split_passages(context: str, min_words: int = 4) -> List[str]:
+    """Split raw search output into snippet/sentence sized passages."""
+    passages = []
+    for part in _SPLIT_RE.split(context or ""):
+        part = part.strip(" \t-|·")
+        if len(part.split()) >= min_words:
+            passages.append(part)
+    return passages
+
+
+def query_terms_from_state(state) -> List[str]:
+    """Collect scoring terms from the advisor query fields."""
+    fields = [state.get("location", ""), state.get("city", ""),
+              state.get("degree_preference", ""), str(state.get("fee_budget", ""))]
+    return _tokenize(" ".join(str(f) for f in fields if f)) + list(_DOMAIN_TERMS)
+
+
+class SearchContextCompressor:
+    """
+    Keeps only the search passages most relevant to the query within a token budget.
+
+    Passages are scored with Okapi BM25 against the query terms, exact and
+    near duplicates are dropped, and the best passages that fit the budget are
+    returned in their original order.
+    """
+
+    def __init__(self, token_budget: int = CONTEXT_TOKEN_BUDGET,
+                 k1: float = 1.5, b: float = 0.75, duplicate_threshold: float = 0.8):
+        self.token_budget = token_budget
+        self.k1 = k1
+        self.b = b
+        self.duplicate_threshold = duplicate_threshold
+
+    def _deduplicate(self, passages: List[str]) -> List[str]:
+        kept, kept_sets, seen = [], [], set()
+        for passage in passages:
+            words = _tokenize(passage)
+            key = " ".join(words)
+            if not key or key in seen:
+                continue
+            word_set = set(words)
+            if any(len(word_set & other) / len(word_set | other) >= self.duplicate_threshold
+                   for other in kept_sets):
+                continue
+            seen.add(key)
+            kept.append(passage)
+            kept_sets.append(word_set)
+        return kept
+
+    def _bm25_scores(self, passages: List[str], query_terms: Iterable[str]) -> List[float]:
+        docs = [_tokenize(p) for p in passages]
+        n_docs = len(docs)
+        avg_len = sum(len(d) for d in docs) / n_docs or 1.0
+        doc_freq = Counter(term for d in docs for term in set(d))
+        query = set(query_terms)
+
+        scores = []
+        for doc in docs:
+            tf = Counter(doc)
+            norm = self.k1 * (1 - self.b + self.b * len(doc) / avg_len)
+            score = 0.0
+            for term in query:
+                freq = tf.get(term)
+                if not freq:
+                    continue
+                idf = math.log(1 + (n_docs - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+                score += idf * freq * (self.k1 + 1) / (freq + norm)
+            scores.append(score)
+        return scores
+
+    def compress(self, context: str, query_terms: Iterable[str]) -> CompressionResult:
+        """
+        Compress raw search context for the extraction prompt.
+
+        Args:
+            context: Raw search output.
+            query_terms: Terms describing what the user is looking for.
+
+        Returns:
+            The compressed context together with token accounting.
+        """
+        original_tokens = estimate_tokens(context or "")
+        passages = split_passages(context)
+        unique = self._deduplicate(passages)
+
+        if not unique:
+            selected = []
+        elif sum(estimate_tokens(p) for p in unique) <= self.token_budget:
+            selected = unique
+        else:
+            scores = self._bm25_scores(unique, query_terms)
+            ranked = sorted(range(len(unique)), key=lambda i: scores[i], reverse=True)
+            chosen, used = set(), 0
+            for i in ranked:
+                cost = estimate_tokens(unique[i])
+                if used + cost > self.token_budget and chosen:
+                    continue
+                chosen.add(i)
+                used += cost
+            selected = [unique[i] for i in sorted(chosen)]
+
+        compressed = "\n".join(selected) if selected else (context or "")
+        compressed_tokens = estimate_tokens(compressed)
+        result = CompressionResult(
+            context=compressed,
+            passages_total=len(passages),
+            passages_kept=len(selected),
+            duplicates_removed=len(passages) - len(unique),
+            original_tokens=original_tokens,
+            compressed_tokens=compressed_tokens,
+            tokens_saved=max(0, original_tokens - compressed_tokens),
+        )
+        _record(result)
+        return result
+
+
+# Running totals across requests
+_stats_lock = threading.Lock()
+_stats = {"requests": 0, "original_tokens": 0, "compressed_tokens": 0, "tokens_saved": 0}
+
+
+def _record(result: CompressionResult):
+    with _stats_lock:
+        _stats["requests"] += 1
+        _stats["original_tokens"] += result["original_tokens"]
+        _stats["compressed_tokens"] += result["compressed_tokens"]
+        _stats["tokens_saved"] += result["tokens_saved"]
+
+
+def get_compression_stats() -> dict:
+    """Get cumulative token savings of the search-context compressor."""
+    with _stats_lock:
+        return dict(_stats)
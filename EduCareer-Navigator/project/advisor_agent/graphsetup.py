@@ -1,31 +1,68 @@
+import threading
 from langgraph.graph import StateGraph
+from langgraph.types import Command
 from advisor_agent.universitiesstates import systemState
 from advisor_agent.UnisRecomender import find_universities
-from advisor_agent.UnisRanker import rank_unis
+from advisor_agent.UnisRanker import rank_unis, prerank_universities
 from advisor_agent.approval import approve_decision, final_decision
 from advisor_agent.recommendfinalized import returnfinalized
-from langgraph.checkpoint.sqlite import SqliteSaver
-import sqlite3
-
-
-# SQLite checkpointer
-db = sqlite3.connect("graph.db", check_same_thread=False)
-memorybox = SqliteSaver(db)
+from runtime.checkpoints import NothingToResumeError, get_checkpointer
 
 def create_advisor_graph():
     graph = StateGraph(systemState)
 
 
     graph.add_node("find_universities", find_universities)
+    graph.add_node("prerank_universities", prerank_universities)
     graph.add_node("rank_unis", rank_unis)
     graph.add_node("approve_decision", approve_decision)
     graph.add_node("recommend_finalized_universities", returnfinalized)
 
     graph.set_entry_point("find_universities")
 
-    graph.add_edge("find_universities", "approve_decision")
+    # Ranking starts in the background while the user answers the approval interrupt
+    graph.add_edge("find_universities", "prerank_universities")
+    graph.add_edge("prerank_universities", "approve_decision")
     graph.add_conditional_edges("approve_decision", final_decision)
     graph.add_edge("rank_unis", "recommend_finalized_universities")
 
     graph.set_finish_point("recommend_finalized_universities")
-    return graph.compile()
+    # Bound to the checkpointer so an interrupted run can be resumed from its saved state.
+    # SQLite (WAL, per-thread connections, shared across sessions), opened on first compile
+    return graph.compile(checkpointer=get_checkpointer("graph.db"), name="advisor_graph")
+
+
+# Compiled once per process and shared by every session
+_advisor_graph = None
+_advisor_graph_lock = threading.Lock()
+graph_stats = {"compiled": 0, "resumed": 0}
+
+
+def get_advisor_graph():
+    """Get the process-wide compiled advisor graph"""
+    global _advisor_graph
+    if _advisor_graph is None:
+        with _advisor_graph_lock:
+            if _advisor_graph is None:
+                _advisor_graph = create_advisor_graph()
+                graph_stats["compiled"] += 1
+    return _advisor_graph
+
+
+def resume_advisor(config, response: str):
+    """
+    Continue an interrupted advisor run from its stored checkpoint.
+
+    Args:
+        config: The run configuration holding the thread_id of the interrupted run.
+        response: The user's answer to the approval interrupt ("yes" or "no").
+
+    Returns:
+        The final state, or a state with "__interrupt__" if the run pauses again.
+    """
+    graph = get_advisor_graph()
+    snapshot = graph.get_state(config)
+    if not snapshot.interrupts:
+        raise NothingToResumeError(f"No interrupted advisor run for thread {config['configurable'].get('thread_id')}")
+    graph_stats["resumed"] += 1
+    return graph.invoke(Command(resume=response), config=config)
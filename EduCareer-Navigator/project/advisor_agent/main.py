@@ -1,8 +1,7 @@
 import streamlit as st
 import time
-from langgraph.types import Command
 from pathlib import Path
-from advisor_agent.graphsetup import create_advisor_graph
+from advisor_agent.graphsetup import get_advisor_graph, resume_advisor
 import uuid
 from advisor_agent.universitiesstates import systemState
 
@@ -14,7 +13,7 @@ st.set_page_config(
 )
 
 # --- Graph Initialization ---
-graph = create_advisor_graph()
+graph = get_advisor_graph()
 
 # --- Session State Management ---
 if "thread_id" not in st.session_state:
@@ -170,10 +169,7 @@ with right_col:
             if submitted_continue:
                 try:
                     with st.spinner("▶️ Processing your choice..."):
-                        resumed = graph.invoke(
-                            Command(resume=resume_response),
-                            config=st.session_state.config
-                        )
+                        resumed = resume_advisor(st.session_state.config, resume_response)
                         st.session_state.state = resumed
                         st.session_state.interrupted = "__interrupt__" in resumed
                         st.rerun()
@@ -1,4 +1,7 @@
-from advisor_agent.universitiesstates import systemState
+import logging
+from advisor_agent.universitiesstates import UniversityTable, systemState
+
+logger = logging.getLogger(__name__)
 
 def returnfinalized(state: systemState):
     """
@@ -9,19 +12,19 @@ def returnfinalized(state: systemState):
         if state.get("rank_unis") == "yes":
             # Return ranked universities
             return {
-                "universities": state.get("ranked_universities", []),
+                "universities": UniversityTable.coerce(state.get("ranked_universities")),
                 "ranked": True
             }
         else:
             # Return unranked universities
             return {
-                "universities": state.get("universities", []),
+                "universities": UniversityTable.coerce(state.get("universities")),
                 "ranked": False
             }
         
     except Exception as e:
-        print(f"An error occurred while finalizing universities: {e}")
+        logger.error("An error occurred while finalizing universities: %s", e)
         return {
-            "universities": [],
+            "universities": UniversityTable(),
             "ranked": False
         }
\ No newline at end of file
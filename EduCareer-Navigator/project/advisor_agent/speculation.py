@@ -0,0 +1,148 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Worker threads available for speculative work
+SPECULATION_MAX_WORKERS = int(os.getenv("SPECULATION_MAX_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+# CPU time one speculative job may use before it is abandoned
+SPECULATION_CPU_BUDGET_MS = float(os.getenv("SPECULATION_CPU_BUDGET_MS", "500"))
+# Uncollected results are dropped after this long (matches the 30 minute session timeout)
+SPECULATION_TTL_S = float(os.getenv("SPECULATION_TTL_S", "1800"))
+
+
+class SpeculationAborted(Exception):
+    """Raised inside a speculative job that was cancelled or ran out of CPU budget."""
+
+
+class _Task:
+    def __init__(self, fingerprint: Hashable):
+        self.fingerprint = fingerprint
+        self.cancelled = threading.Event()
+        self.submitted_at = time.monotonic()
+        self.compute_s = 0.0
+        self.future: Optional[Future] = None
+
+
+class SpeculativeExecutor:
+    """
+    Runs work ahead of time while the user is still deciding whether they need it.
+
+    Jobs are keyed (e.g. by conversation thread) and tagged with a fingerprint
+    of their inputs, so a result is only used if the inputs have not changed.
+    Each job receives a ``should_stop`` callable and should raise
+    :class:`SpeculationAborted` when it returns True (cancelled or over budget).
+
+    Results are held in this process only: a key collected in another
+    process (another API worker, or after a restart) is a miss, and the
+    caller computes the result itself.
+    """
+
+    def __init__(self, fn: Callable[..., Any], max_workers: int = SPECULATION_MAX_WORKERS,
+                 cpu_budget_ms: float = SPECULATION_CPU_BUDGET_MS, ttl_s: float = SPECULATION_TTL_S):
+        self.fn = fn
+        self.max_workers = max_workers
+        self.cpu_budget_s = cpu_budget_ms / 1000.0
+        self.ttl_s = ttl_s
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculative")
+        self._lock = threading.Lock()
+        self._tasks: Dict[Hashable, _Task] = {}
+        self._stats = {"submitted": 0, "skipped": 0, "used": 0, "misses": 0,
+                       "cancelled": 0, "aborted": 0, "hidden_latency_s": 0.0}
+
+    def _run(self, task: _Task, args: tuple) -> Any:
+        cpu_start = time.thread_time()
+        started = time.monotonic()
+
+        def should_stop() -> bool:
+            return task.cancelled.is_set() or time.thread_time() - cpu_start > self.cpu_budget_s
+
+        try:
+            return self.fn(*args, should_stop=should_stop)
+        except SpeculationAborted:
+            with self._lock:
+                self._stats["cancelled" if task.cancelled.is_set() else "aborted"] += 1
+            raise
+        finally:
+            task.compute_s = time.monotonic() - started
+
+    def _expire(self):
+        now = time.monotonic()
+        for key in [k for k, t in self._tasks.items() if now - t.submitted_at > self.ttl_s]:
+            self._tasks.pop(key).cancelled.set()
+
+    def submit(self, key: Hashable, fingerprint: Hashable, *args) -> bool:
+        """
+        Start a speculative job for ``key`` unless the workers are saturated.
+
+        Returns:
+            True if the job was queued.
+        """
+        with self._lock:
+            self._expire()
+            busy = sum(1 for t in self._tasks.values() if t.future is not None and not t.future.done())
+            if busy >= self.max_workers:
+                self._stats["skipped"] += 1
+                return False
+            previous = self._tasks.pop(key, None)
+            if previous is not None:
+                previous.cancelled.set()
+            task = _Task(fingerprint)
+            task.future = self._pool.submit(self._run, task, args)
+            self._tasks[key] = task
+            self._stats["submitted"] += 1
+        return True
+
+    def collect(self, key: Hashable, fingerprint: Hashable, timeout: Optional[float] = None) -> Optional[Any]:
+        """
+        Take the result for ``key`` if it was computed from the same inputs.
+
+        Waits for a job that is still running. Returns None when there is no
+        usable result (including a job that failed), in which case the caller
+        computes it inline.
+        """
+        with self._lock:
+            task = self._tasks.pop(key, None)
+        if task is None or task.fingerprint != fingerprint:
+            if task is not None:
+                task.cancelled.set()
+            with self._lock:
+                self._stats["misses"] += 1
+            return None
+
+        started = time.monotonic()
+        try:
+            result = task.future.result(timeout=timeout)
+        except Exception as e:
+            if not isinstance(e, (SpeculationAborted, CancelledError, TimeoutError)):
+                logger.warning("Speculative job for %s failed: %r", key, e)
+            with self._lock:
+                self._stats["misses"] += 1
+            return None
+        waited = time.monotonic() - started
+        with self._lock:
+            self._stats["used"] += 1
+            self._stats["hidden_latency_s"] += max(0.0, task.compute_s - waited)
+        return result
+
+    def cancel(self, key: Hashable):
+        """Drop the job for ``key``; a running job stops at its next checkpoint."""
+        with self._lock:
+            task = self._tasks.pop(key, None)
+        if task is not None:
+            task.cancelled.set()
+            if task.future.cancel():
+                with self._lock:
+                    self._stats["cancelled"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get job counts and the total latency hidden behind user think time."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = len(self._tasks)
+        stats["hidden_latency_s"] = round(stats["hidden_latency_s"], 4)
+        return stats
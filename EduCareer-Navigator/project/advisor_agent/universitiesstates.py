@@ -1,5 +1,8 @@
+import re
+import sys
+from array import array
 from pydantic import BaseModel, Field
-from typing import Optional, TypedDict
+from typing import Iterable, Iterator, Optional, TypedDict, Union
 # 1. Define your desired output structure using Pydantic
 
 # --- Step 1: Define the desired output structure using Pydantic ---
@@ -14,6 +17,159 @@ class University(BaseModel):
 class ListUniversitiesResponse(BaseModel):
     universities: list[University] = Field(description="A list of universities that match the user's criteria.")
 
+
+def _to_int(value) -> int:
+    """Integer value of a fee or mark that may arrive as a string such as '150,000 PKR'."""
+    if isinstance(value, int):
+        return value
+    match = re.search(r'[\d,]+', str(value))
+    digits = match.group().replace(',', '') if match else ""
+    return int(digits) if digits else 0
+
+
+class UniversityTable:
+    """
+    Columnar container for a list of universities.
+
+    Fees and marks are stored in parallel integer arrays and city names are
+    interned into a small lookup list, so large candidate sets stay compact in
+    state and checkpoints. The table behaves like a read-only list of
+    ``University``: indexing and iteration build lightweight per-row views on
+    demand, and slicing returns another table.
+    """
+
+    def __init__(self, name=(), city=(), admission_portal=(), fee_per_semester=(),
+                 min_inter_marks=(), merit_formula=(), cities=None):
+        """
+        Args:
+            name, admission_portal, merit_formula: Per-row strings.
+            city: Per-row indexes into ``cities`` (or city names when ``cities`` is None).
+            fee_per_semester, min_inter_marks: Per-row integers.
+            cities: Interned city names referenced by ``city``.
+        """
+        self.names = list(name)
+        self.admission_portals = list(admission_portal)
+        self.merit_formulas = list(merit_formula)
+        self.fees = array("q", (_to_int(v) for v in fee_per_semester))
+        self.min_marks = array("q", (_to_int(v) for v in min_inter_marks))
+        if cities is None:
+            self.cities, self.city_codes = [], array("l")
+            index = {}
+            for value in city:
+                value = sys.intern(str(value))
+                if value not in index:
+                    index[value] = len(self.cities)
+                    self.cities.append(value)
+                self.city_codes.append(index[value])
+        else:
+            self.cities = [sys.intern(str(value)) for value in cities]
+            self.city_codes = array("l", city)
+
+        lengths = {len(self.names), len(self.city_codes), len(self.admission_portals),
+                   len(self.fees), len(self.min_marks), len(self.merit_formulas)}
+        if len(lengths) > 1:
+            raise ValueError(f"UniversityTable columns have different lengths: {sorted(lengths)}")
+
+    @classmethod
+    def from_universities(cls, universities: Iterable[Union[University, dict]]) -> "UniversityTable":
+        """Build a table from University models (or their dicts)."""
+        columns = {field: [] for field in University.model_fields}
+        for uni in universities:
+            row = uni if isinstance(uni, dict) else uni.__dict__
+            for field, values in columns.items():
+                values.append(row.get(field, ""))
+        return cls(**columns)
+
+    @classmethod
+    def coerce(cls, value) -> "UniversityTable":
+        """Return ``value`` as a table; accepts a table, a list of universities, a column dict or None."""
+        if isinstance(value, cls):
+            return value
+        if not value:
+            return cls()
+        if isinstance(value, dict):
+            # Column dict left over when a checkpoint could not rebuild the table
+            return cls(**value)
+        return cls.from_universities(value)
+
+    def to_universities(self) -> list[University]:
+        """Convert back to a list of validated University models."""
+        return [University(**self._row(i)) for i in range(len(self))]
+
+    def take(self, indexes: Iterable[int]) -> "UniversityTable":
+        """New table with the given rows, in the given order."""
+        indexes = list(indexes)
+        return UniversityTable(
+            name=[self.names[i] for i in indexes],
+            city=[self.city_codes[i] for i in indexes],
+            admission_portal=[self.admission_portals[i] for i in indexes],
+            fee_per_semester=[self.fees[i] for i in indexes],
+            min_inter_marks=[self.min_marks[i] for i in indexes],
+            merit_formula=[self.merit_formulas[i] for i in indexes],
+            cities=self.cities,
+        )
+
+    def city_code(self, city: str) -> Optional[int]:
+        """Index of ``city`` in the interned city list (case-insensitive), or None."""
+        lowered = city.lower()
+        for code, value in enumerate(self.cities):
+            if value.lower() == lowered:
+                return code
+        return None
+
+    def fingerprint(self) -> tuple:
+        """Hashable identity of the table contents."""
+        return (tuple(self.names), tuple(self.cities), self.city_codes.tobytes(), self.fees.tobytes())
+
+    def model_dump(self) -> dict:
+        """Columns as plain lists; this is what checkpoints store."""
+        return {
+            "name": self.names,
+            "city": self.city_codes.tolist(),
+            "admission_portal": self.admission_portals,
+            "fee_per_semester": self.fees.tolist(),
+            "min_inter_marks": self.min_marks.tolist(),
+            "merit_formula": self.merit_formulas,
+            "cities": self.cities,
+        }
+
+    def _row(self, i: int) -> dict:
+        return {
+            "name": self.names[i],
+            "city": self.cities[self.city_codes[i]],
+            "admission_portal": self.admission_portals[i],
+            "fee_per_semester": self.fees[i],
+            "min_inter_marks": self.min_marks[i],
+            "merit_formula": self.merit_formulas[i],
+        }
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self.take(range(*key.indices(len(self))))
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("UniversityTable index out of range")
+        # Built without validation; the columns are already typed
+        return University.model_construct(**self._row(key))
+
+    def __iter__(self) -> Iterator[University]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, UniversityTable):
+            return len(self) == len(other) and all(
+                self._row(i) == other._row(i) for i in range(len(self))
+            )
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"UniversityTable({list(self)!r})"
+
     
 class systemState(TypedDict):
     """Student details and structured list of universities with their admission details."""
@@ -24,5 +180,5 @@ class systemState(TypedDict):
     location: str = Field(description="Preferred location for university")
     fee_budget: str = Field(description="Maximum fee budget per semester")
     rank_unis:str = Field(description="User wants to rank or not (yes or no)")
-    universities: Optional[list[University]] = Field(description="List of universities with their admission details")
-    ranked_universities: Optional[list[University]]= Field(description="List of universities ranked based on user budget and inter marks")
+    universities: Optional[UniversityTable] = Field(description="List of universities with their admission details")
+    ranked_universities: Optional[UniversityTable]= Field(description="List of universities ranked based on user budget and inter marks")
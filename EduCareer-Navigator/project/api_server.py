@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+Headless HTTP API for the guidance agents
+JSON endpoints for career prediction, university recommendation and supervisor
+chat, served by preforked uvicorn workers that each warm the model and graphs once
+
+Usage (from project/):
+    python api_server.py --workers 4
+    BACKEND_MODE=fake python api_server.py --port 8080   # offline, for load tests
+"""
+
+import argparse
+import functools
+import logging
+import os
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List
+
+from dotenv import load_dotenv
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", "8080"))
+API_WORKERS = int(os.getenv("API_WORKERS", str(os.cpu_count() or 2)))
+# Largest accepted /career/predict/batch request
+API_MAX_BATCH = int(os.getenv("API_MAX_BATCH", "256"))
+# Upper bound for a client's X-Timeout-S header
+API_MAX_TIMEOUT_S = float(os.getenv("API_MAX_TIMEOUT_S", "300"))
+
+_CAREER_INT_FIELDS = ("math_score", "bio_score")
+_CAREER_BOOL_FIELDS = ("interest_tech", "interest_art", "group_work", "logical_thinking", "likes_speaking")
+_STUDENT_INT_FIELDS = ("matric_marks", "inter_marks")
+_STUDENT_STR_FIELDS = ("degree_preference", "city", "location", "fee_budget")
+
+
+class BadRequest(ValueError):
+    """The request body is missing or has invalid fields."""
+
+
+# --- Worker lifecycle ---
+
+@asynccontextmanager
+async def lifespan(app: Starlette):
+    """Warm this worker once: compile the graphs, load the career model and start the pools."""
+    started = time.perf_counter()
+    # Imported here so the parent process that forks the workers stays light
+    from guidance_service import get_guidance_service
+    from runtime.telemetry import setup_telemetry
+
+    setup_telemetry()
+    service = get_guidance_service()
+    await service.warmup()
+    app.state.service = service
+    app.state.warm_s = round(time.perf_counter() - started, 3)
+    print(f"🔥 Worker {os.getpid()} warm in {app.state.warm_s}s")
+    try:
+        yield
+    finally:
+        from runtime.checkpoints import close_checkpointers
+        from runtime.clients import aclose_client_factory
+        from runtime.executors import close_executors
+        from runtime.llm_cache import close_response_cache
+        from runtime.telemetry import close_span_recorder
+        from database.mongodb_client import close_chat_db
+        close_checkpointers()
+        await aclose_client_factory()
+        close_response_cache()
+        close_span_recorder()
+        close_chat_db()
+        close_executors(wait=False)
+
+
+# --- Request handling ---
+
+def endpoint(handler):
+    """
+    Wrap a handler with request IDs, JSON parsing, deadlines and error mapping.
+
+    The handler receives ``(request, body, ctx)`` where ctx holds the
+    request_id and timeout_s, and returns a JSON-serializable dict.
+    """
+    @functools.wraps(handler)
+    async def wrapper(request: Request) -> JSONResponse:
+        from guidance_service import ServiceTimeoutError
+        from runtime.checkpoints import NothingToResumeError
+
+        started = time.perf_counter()
+        request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+        status, payload = 200, None
+        try:
+            body: Dict[str, Any] = {}
+            if request.method == "POST":
+                try:
+                    body = await request.json()
+                except ValueError:
+                    raise BadRequest("Request body must be valid JSON")
+                if not isinstance(body, dict):
+                    raise BadRequest("Request body must be a JSON object")
+            timeout_s = request.headers.get("x-timeout-s")
+            try:
+                timeout_s = min(float(timeout_s), API_MAX_TIMEOUT_S) if timeout_s else None
+            except ValueError:
+                raise BadRequest("X-Timeout-S must be a number of seconds")
+            payload = await handler(request, body, {"request_id": request_id, "timeout_s": timeout_s})
+        except BadRequest as e:
+            status, payload = 400, {"error": "bad_request", "detail": str(e)}
+        except ServiceTimeoutError as e:
+            status, payload = 504, {"error": "timeout", "detail": str(e)}
+        except NothingToResumeError as e:
+            status, payload = 409, {"error": "conflict", "detail": str(e)}
+        except Exception as e:
+            logger.exception("[%s] %s failed", request_id, request.url.path)
+            status, payload = 500, {"error": "internal", "detail": str(e)}
+
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+        payload = {"request_id": request_id, "elapsed_ms": elapsed_ms, **payload}
+        return JSONResponse(payload, status_code=status,
+                            headers={"X-Request-ID": request_id, "X-Worker-PID": str(os.getpid())})
+    return wrapper
+
+
+def to_json(value: Any) -> Any:
+    """Convert graph state (models, tables, messages) into plain JSON values."""
+    from langchain_core.messages import BaseMessage
+    from advisor_agent.universitiesstates import UniversityTable
+
+    if isinstance(value, dict):
+        return {k: to_json(v) for k, v in value.items() if k != "__interrupt__"}
+    if isinstance(value, UniversityTable):
+        return [university.model_dump() for university in value]
+    if isinstance(value, BaseMessage):
+        return {"role": value.type, "content": value.content}
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    if isinstance(value, (list, tuple)):
+        return [to_json(v) for v in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def _outcome(result: dict) -> Dict[str, Any]:
+    """Status fields for a graph result that may have paused at an interrupt."""
+    if "__interrupt__" in result:
+        return {"status": "interrupted", "question": result["__interrupt__"][0].value}
+    return {"status": "complete"}
+
+
+def _typed(body: dict, fields, kind, defaults: dict) -> dict:
+    state = dict(defaults)
+    for field in fields:
+        if field in body:
+            value = body[field]
+            if kind is int and (isinstance(value, bool) or not isinstance(value, int)):
+                raise BadRequest(f"{field} must be an integer")
+            if kind is not int and not isinstance(value, kind):
+                raise BadRequest(f"{field} must be a {kind.__name__}")
+            state[field] = value
+    return state
+
+
+def career_state(body: dict) -> dict:
+    """Career graph input from {"text": ...} or explicit profile fields."""
+    from supervisor_agent import parse_career_user_info
+
+    if "text" in body:
+        if not isinstance(body["text"], str):
+            raise BadRequest("text must be a string")
+        return parse_career_user_info(body["text"])
+    state = _typed(body, _CAREER_INT_FIELDS, int, parse_career_user_info(""))
+    return _typed(body, _CAREER_BOOL_FIELDS, bool, state)
+
+
+def student_state(body: dict) -> dict:
+    """Advisor graph input from {"text": ...} or explicit profile fields."""
+    from supervisor_agent import parse_student_unidata
+
+    if "text" in body:
+        if not isinstance(body["text"], str):
+            raise BadRequest("text must be a string")
+        return parse_student_unidata(body["text"])
+    state = _typed(body, _STUDENT_INT_FIELDS, int, parse_student_unidata(""))
+    return _typed(body, _STUDENT_STR_FIELDS, str, state)
+
+
+def _thread_id(body: dict, ctx: dict, required: bool = False) -> str:
+    thread_id = body.get("thread_id")
+    if thread_id is None and required:
+        raise BadRequest("thread_id is required")
+    if thread_id is not None and not isinstance(thread_id, str):
+        raise BadRequest("thread_id must be a string")
+    return thread_id or f"api-{ctx['request_id']}"
+
+
+def _chat_config(body: dict, thread_id: str) -> dict:
+    """Run config of a chat request; ``"cache": false`` keeps the supervisor off the response cache."""
+    from runtime.llm_cache import CACHE_OPT_OUT_KEY
+
+    cache = body.get("cache", True)
+    if not isinstance(cache, bool):
+        raise BadRequest("cache must be true or false")
+    return {"configurable": {"thread_id": thread_id, CACHE_OPT_OUT_KEY: cache}}
+
+
+def _messages(body: dict) -> List[dict]:
+    """Chat messages from {"messages": [...]} or a single {"message": "..."}."""
+    messages = body.get("messages")
+    if messages is None and isinstance(body.get("message"), str):
+        messages = [{"role": "user", "content": body["message"]}]
+    if not isinstance(messages, list) or not messages \
+            or not all(isinstance(m, dict) and isinstance(m.get("content"), str) for m in messages):
+        raise BadRequest('Send "message" (a string) or "messages" (a list of {"role", "content"})')
+    return messages
+
+
+def _response_text(body: dict) -> str:
+    response = body.get("response")
+    if not isinstance(response, str):
+        raise BadRequest("response must be a string")
+    return response
+
+
+# --- Endpoints ---
+
+@endpoint
+async def health(request: Request, body: dict, ctx: dict) -> dict:
+    from runtime.llm_cache import get_response_cache
+
+    response_cache = get_response_cache()
+    return {"status": "ok", "pid": os.getpid(), "warm_s": request.app.state.warm_s,
+            "service": request.app.state.service.get_stats(),
+            "llm_cache": response_cache.get_stats() if response_cache is not None else None}
+
+
+async def metrics(request: Request) -> PlainTextResponse:
+    """Span latency histograms and token counters of this worker, in the Prometheus text format."""
+    from runtime.telemetry import get_span_recorder
+
+    recorder = get_span_recorder()
+    if recorder is None:
+        return PlainTextResponse("Telemetry is disabled; set TELEMETRY_ENABLED=true\n", status_code=404)
+    return PlainTextResponse(recorder.registry.prometheus_text(),
+                             media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@endpoint
+async def career_predict(request: Request, body: dict, ctx: dict) -> dict:
+    config = {"configurable": {"thread_id": _thread_id(body, ctx)}}
+    result = await request.app.state.service.ainvoke("career", career_state(body), config, ctx["timeout_s"])
+    return {**_outcome(result), "result": to_json(result)}
+
+
+@endpoint
+async def career_predict_batch(request: Request, body: dict, ctx: dict) -> dict:
+    from career_agent.career_analyzer import analyze_career_batch
+
+    profiles = body.get("profiles")
+    if not isinstance(profiles, list) or not profiles:
+        raise BadRequest("profiles must be a non-empty list")
+    if len(profiles) > API_MAX_BATCH:
+        raise BadRequest(f"At most {API_MAX_BATCH} profiles per batch")
+    states: List[dict] = []
+    for i, profile in enumerate(profiles):
+        if not isinstance(profile, dict):
+            raise BadRequest(f"profiles[{i}] must be an object")
+        states.append(career_state(profile))
+    # One model call for the whole batch, in the CPU pool
+    results = await request.app.state.service.run_blocking("cpu", analyze_career_batch, states,
+                                                           timeout_s=ctx["timeout_s"])
+    return {"status": "complete", "count": len(results), "results": to_json(results)}
+
+
+@endpoint
+async def university_recommend(request: Request, body: dict, ctx: dict) -> dict:
+    thread_id = _thread_id(body, ctx)
+    config = {"configurable": {"thread_id": thread_id}}
+    result = await request.app.state.service.ainvoke("advisor", student_state(body), config, ctx["timeout_s"])
+    return {**_outcome(result), "thread_id": thread_id, "result": to_json(result)}
+
+
+@endpoint
+async def university_resume(request: Request, body: dict, ctx: dict) -> dict:
+    thread_id = _thread_id(body, ctx, required=True)
+    config = {"configurable": {"thread_id": thread_id}}
+    result = await request.app.state.service.aresume("advisor", config, _response_text(body), ctx["timeout_s"])
+    return {**_outcome(result), "thread_id": thread_id, "result": to_json(result)}
+
+
+@endpoint
+async def chat(request: Request, body: dict, ctx: dict) -> dict:
+    from supervisor_agent import system_prompt
+
+    messages = _messages(body)
+    if messages[0].get("role") != "system":
+        messages = [{"role": "system", "content": system_prompt}, *messages]
+
+    thread_id = _thread_id(body, ctx)
+    config = _chat_config(body, thread_id)
+    result, route = await request.app.state.service.aguidance(messages, config, ctx["timeout_s"])
+    reply = result["messages"][-1].content if result.get("messages") else None
+    return {**_outcome(result), "thread_id": thread_id, "route": route, "reply": reply,
+            "result": None if route == "supervisor" else to_json(result)}
+
+
+@endpoint
+async def chat_resume(request: Request, body: dict, ctx: dict) -> dict:
+    thread_id = _thread_id(body, ctx, required=True)
+    # Routed turns paused in the advisor graph, everything else in the supervisor
+    route = body.get("route") or "supervisor"
+    config = _chat_config(body, thread_id)
+    result = await request.app.state.service.aresume_guidance(route, config, _response_text(body), ctx["timeout_s"])
+    reply = result["messages"][-1].content if result.get("messages") else None
+    return {**_outcome(result), "thread_id": thread_id, "reply": reply,
+            "result": None if route == "supervisor" else to_json(result)}
+
+
+def _save_session(thread_id: str, messages: List[dict], user_id) -> Dict[str, Any]:
+    from database.mongodb_client import get_chat_db
+
+    return get_chat_db().save_chat_session(thread_id, messages, user_id=user_id,
+                                           metadata={"session_type": "api"})
+
+
+@endpoint
+async def chat_save(request: Request, body: dict, ctx: dict) -> dict:
+    thread_id = _thread_id(body, ctx, required=True)
+    user_id = body.get("user_id")
+    if user_id is not None and not isinstance(user_id, str):
+        raise BadRequest("user_id must be a string")
+    # MongoDB calls run in the "mongo" pool
+    saved = await request.app.state.service.run_blocking("mongo", _save_session, thread_id, _messages(body),
+                                                         user_id, timeout_s=ctx["timeout_s"])
+    return {"status": "complete", "thread_id": thread_id, "inserted": saved["inserted"], "skipped": saved["skipped"]}
+
+
+routes = [
+    Route("/health", health, methods=["GET"]),
+    Route("/metrics", metrics, methods=["GET"]),
+    Route("/career/predict", career_predict, methods=["POST"]),
+    Route("/career/predict/batch", career_predict_batch, methods=["POST"]),
+    Route("/university/recommend", university_recommend, methods=["POST"]),
+    Route("/university/resume", university_resume, methods=["POST"]),
+    Route("/chat", chat, methods=["POST"]),
+    Route("/chat/resume", chat_resume, methods=["POST"]),
+    Route("/chat/save", chat_save, methods=["POST"]),
+]
+
+app = Starlette(routes=routes, lifespan=lifespan)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the headless guidance API.")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--workers", type=int, default=API_WORKERS,
+                        help="Worker processes forked up front; each warms its own model and graphs")
+    parser.add_argument("--log-level", default="warning")
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    print(f"🚀 Guidance API on http://{args.host}:{args.port} with {args.workers} worker(s)")
+    uvicorn.run("api_server:app", host=args.host, port=args.port, workers=args.workers,
+                app_dir=os.path.dirname(os.path.abspath(__file__)), log_level=args.log_level)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+Concurrent load test for the guidance API
+
+Simulates N users, each running conversation scripts against the supervisor
+through the HTTP API: career questions, university questions that pause for
+approval and are resumed, open-ended chat, and a chat history save at the end
+of every conversation. By default it starts ``api_server.py`` itself with the
+offline stand-ins (BACKEND_MODE=fake) at the given backend latencies and an
+in-memory chat store, so it runs without API keys or MongoDB.
+
+Reports throughput, latency percentiles and error rates per stage, and the
+CPU and memory of the server processes (and of the load generator) over time.
+
+Usage:
+    python benchmarks/load_test.py --users 50 --duration 60
+    python benchmarks/load_test.py --users 200 --workers 4 --llm-latency-ms 800 --search-latency-ms 1500
+    python benchmarks/load_test.py --url http://127.0.0.1:8080 --server-pid 1234 --users 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+CAREER_MESSAGES = [
+    "Which career suits me? My math score is 85 and biology score is 60, I like technology and logical thinking",
+    "I have a math score of 55 and a biology score of 90, I enjoy group work and presentations. What career fits me?",
+    "Career advice please: math score of 70, biology score of 40, I am artistic and like speaking",
+]
+UNIVERSITY_MESSAGES = [
+    "Which universities in Lahore offer Computer Science with fee under 300000? Matric marks 950, inter marks 900",
+    "Recommend universities in Islamabad for BBA, my matric marks are 880 and inter 850, budget 250000",
+    "I want to study Electrical Engineering in Karachi, matric 1000, inter 960, fee under 400000",
+]
+CHAT_MESSAGES = [
+    ["Hi! What can you help me with?", "How do I choose between a degree and a career path?"],
+    ["Hello, I am confused about my future", "What information do you need from me to give advice?"],
+]
+
+# Conversation scripts: the user turns of one conversation (a turn that pauses
+# for approval is resumed with "yes" before the next one)
+SCRIPTS = {
+    "career": lambda rng: [rng.choice(CAREER_MESSAGES)],
+    "university": lambda rng: [rng.choice(UNIVERSITY_MESSAGES)],
+    "chat": lambda rng: list(rng.choice(CHAT_MESSAGES)),
+}
+
+
+# --- Measurements ---
+
+class LoadStats:
+    """Per-request records of one load test run."""
+
+    def __init__(self):
+        self.requests: List[tuple] = []  # (finished at, stage, seconds, error or None)
+        self.conversations = Counter()  # "completed" / "failed"
+        self.resources: List[Dict[str, float]] = []
+        self.started = time.perf_counter()
+
+    def record(self, stage: str, seconds: float, error: Optional[str] = None):
+        self.requests.append((time.perf_counter() - self.started, stage, seconds, error))
+
+    def summary(self, duration_s: float) -> Dict[str, Any]:
+        stages: Dict[str, Dict[str, Any]] = {}
+        for _, stage, seconds, error in self.requests:
+            entry = stages.setdefault(stage, {"latencies": [], "errors": Counter()})
+            entry["latencies"].append(seconds)
+            if error:
+                entry["errors"][error] += 1
+        rows = {}
+        for stage, entry in sorted(stages.items()):
+            latencies = sorted(entry["latencies"])
+            errors = sum(entry["errors"].values())
+            rows[stage] = {
+                "count": len(latencies), "errors": errors, "error_rate": round(errors / len(latencies), 4),
+                **{f"p{q}_ms": round(percentile(latencies, q) * 1000, 1) for q in (50, 90, 95, 99)},
+                "max_ms": round(latencies[-1] * 1000, 1), "error_types": dict(entry["errors"]),
+            }
+        total = len(self.requests)
+        errors = sum(1 for r in self.requests if r[3])
+        conversations = sum(self.conversations.values())
+        return {
+            "duration_s": round(duration_s, 2),
+            "requests": total, "requests_per_s": round(total / duration_s, 2),
+            "errors": errors, "error_rate": round(errors / total, 4) if total else 0.0,
+            "conversations": dict(self.conversations),
+            "conversations_per_s": round(self.conversations["completed"] / duration_s, 2),
+            "conversation_failure_rate": round(self.conversations["failed"] / conversations, 4) if conversations else 0.0,
+            "stages": rows, "resources": self.resources,
+        }
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), round(q / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[rank - 1]
+
+
+# --- CPU and memory (Linux /proc) ---
+
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def process_tree(pid: int) -> List[int]:
+    """``pid`` and all its descendants (e.g. the uvicorn workers)."""
+    pids, queue = [], [pid]
+    while queue:
+        current = queue.pop()
+        pids.append(current)
+        try:
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children") as f:
+                    queue.extend(int(child) for child in f.read().split())
+        except OSError:
+            continue
+    return pids
+
+
+def process_usage(pids: List[int]) -> tuple:
+    """(CPU seconds, resident MB) summed over ``pids``; processes that exited are skipped."""
+    cpu_s = rss_mb = 0.0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            cpu_s += (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS
+            with open(f"/proc/{pid}/status") as f:
+                rss_mb += next((int(line.split()[1]) for line in f if line.startswith("VmRSS:")), 0) / 1024
+        except (OSError, IndexError, ValueError):
+            continue
+    return cpu_s, rss_mb
+
+
+async def sample_resources(stats: LoadStats, server_pid: Optional[int], interval_s: float, stop: asyncio.Event):
+    """Append CPU % and RSS of the server tree and this process every ``interval_s``, printing each sample."""
+    if not os.path.isdir("/proc"):
+        print("(CPU/memory sampling needs Linux /proc; skipped)")
+        return
+    print(f"{'t s':>6} {'req/s':>8} {'errors':>7} {'server cpu %':>13} {'server MB':>10} {'procs':>6} {'client cpu %':>13}")
+    last_wall, last_requests = time.perf_counter(), 0
+    last_server = process_usage(process_tree(server_pid))[0] if server_pid else 0.0
+    last_client = process_usage([os.getpid()])[0]
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), interval_s)
+        except asyncio.TimeoutError:
+            pass
+        wall = time.perf_counter()
+        elapsed = wall - last_wall
+        if stop.is_set() and elapsed < interval_s / 2:
+            break  # too short a tail to give a meaningful rate
+        pids = process_tree(server_pid) if server_pid else []
+        server_cpu, server_mb = process_usage(pids) if pids else (0.0, 0.0)
+        client_cpu = process_usage([os.getpid()])[0]
+        requests = stats.requests[last_requests:]
+        sample = {
+            "t_s": round(wall - stats.started, 1),
+            "requests_per_s": round(len(requests) / elapsed, 1),
+            "errors": sum(1 for r in requests if r[3]),
+            "server_cpu_pct": round((server_cpu - last_server) / elapsed * 100, 1) if pids else None,
+            "server_rss_mb": round(server_mb, 1) if pids else None,
+            "server_processes": len(pids),
+            "client_cpu_pct": round((client_cpu - last_client) / elapsed * 100, 1),
+        }
+        stats.resources.append(sample)
+        print(f"{sample['t_s']:>6} {sample['requests_per_s']:>8} {sample['errors']:>7} "
+              f"{sample['server_cpu_pct'] if pids else '-':>13} {sample['server_rss_mb'] if pids else '-':>10} "
+              f"{len(pids):>6} {sample['client_cpu_pct']:>13}")
+        last_wall, last_requests, last_server, last_client = wall, len(stats.requests), server_cpu, client_cpu
+
+
+# --- Simulated users ---
+
+async def call(client: httpx.AsyncClient, stats: LoadStats, stage: str, path: str, body: dict) -> Optional[dict]:
+    """POST one request and record its latency; returns the JSON body, or None on any error."""
+    started = time.perf_counter()
+    error, payload = None, None
+    try:
+        response = await client.post(path, json=body)
+        if response.status_code == 200:
+            payload = response.json()
+        else:
+            error = f"http_{response.status_code}"
+    except httpx.TimeoutException:
+        error = "client_timeout"
+    except httpx.HTTPError as e:
+        error = type(e).__name__
+    stats.record(stage, time.perf_counter() - started, error)
+    return payload
+
+
+async def converse(client: httpx.AsyncClient, stats: LoadStats, scenario: str, user: int,
+                   rng: random.Random, args) -> bool:
+    """Run one scripted conversation and save it; False if any request failed."""
+    thread_id = f"load-{uuid.uuid4().hex}"
+    transcript = []
+    for text in SCRIPTS[scenario](rng):
+        transcript.append({"role": "user", "content": text})
+        reply = await call(client, stats, f"{scenario}:chat", "/chat",
+                           {"messages": transcript, "thread_id": thread_id, "cache": args.cache})
+        if reply is None:
+            return False
+        if reply.get("status") == "interrupted":
+            await think(rng, args)
+            reply = await call(client, stats, f"{scenario}:resume", "/chat/resume",
+                               {"thread_id": thread_id, "route": reply.get("route"), "response": "yes",
+                                "cache": args.cache})
+            if reply is None:
+                return False
+        answer = reply.get("reply") or json.dumps(reply.get("result"), default=str)[:2000]
+        transcript.append({"role": "assistant", "content": answer})
+        await think(rng, args)
+    if args.save:
+        saved = await call(client, stats, "history:save", "/chat/save",
+                           {"thread_id": thread_id, "messages": transcript, "user_id": f"load-user-{user}"})
+        return saved is not None
+    return True
+
+
+async def think(rng: random.Random, args):
+    """Pause like a user reading the answer (uniform around --think-ms)."""
+    if args.think_ms > 0:
+        await asyncio.sleep(rng.uniform(0.5, 1.5) * args.think_ms / 1000)
+
+
+async def run_user(client: httpx.AsyncClient, stats: LoadStats, user: int, deadline: float, args,
+                   scenarios: List[str], weights: List[float]):
+    rng = random.Random(args.seed * 100003 + user)
+    # Spread the users' first requests over the ramp-up period
+    await asyncio.sleep(args.ramp_up * user / max(args.users, 1))
+    done = 0
+    while time.perf_counter() < deadline and (not args.conversations or done < args.conversations):
+        scenario = rng.choices(scenarios, weights)[0]
+        ok = await converse(client, stats, scenario, user, rng, args)
+        stats.conversations["completed" if ok else "failed"] += 1
+        done += 1
+
+
+async def run_load(url: str, server_pid: Optional[int], args) -> Dict[str, Any]:
+    scenarios, weights = parse_mix(args.mix)
+    stats = LoadStats()
+    stop = asyncio.Event()
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    headers = {"X-Timeout-S": str(args.request_timeout)}
+    async with httpx.AsyncClient(base_url=url, limits=limits, headers=headers,
+                                 timeout=args.request_timeout + 10) as client:
+        sampler = asyncio.create_task(sample_resources(stats, server_pid, args.sample_interval, stop))
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(run_user(client, stats, user, deadline, args, scenarios, weights)
+                               for user in range(args.users)))
+        duration = time.perf_counter() - started
+        stop.set()
+        await sampler
+        try:
+            health = (await client.get("/health")).json()
+        except (httpx.HTTPError, ValueError):
+            health = None
+    report = stats.summary(duration)
+    report["server_health"] = health
+    return report
+
+
+def parse_mix(mix: str) -> tuple:
+    """"career=3,university=3,chat=2" -> (scenarios, weights)."""
+    scenarios, weights = [], []
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCRIPTS:
+            raise SystemExit(f"Unknown scenario {name!r} in --mix; expected {', '.join(SCRIPTS)}")
+        scenarios.append(name)
+        weights.append(float(weight or 1))
+    return scenarios, weights
+
+
+# --- Server under test ---
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args, workdir: str) -> tuple:
+    """Start api_server.py with the offline stand-ins in ``workdir``; returns (process, url, log path)."""
+    port = args.port or free_port()
+    env = dict(os.environ)
+    env.update({
+        "BACKEND_MODE": args.backend_mode,
+        "FAKE_LLM_LATENCY_MS": str(args.llm_latency_ms),
+        "FAKE_SEARCH_LATENCY_MS": str(args.search_latency_ms),
+        "FAKE_LATENCY_JITTER_MS": str(args.jitter_ms),
+        "FAKE_ERROR_RATE": str(args.error_rate),
+        "MONGODB_URI": args.mongodb_uri,
+        "PYTHONUNBUFFERED": "1",
+        "PYTHONPATH": os.pathsep.join(filter(None, [str(PROJECT_DIR), env.get("PYTHONPATH")])),
+    })
+    log_path = os.path.join(workdir, "api_server.log")
+    with open(log_path, "w") as log:
+        process = subprocess.Popen(
+            [sys.executable, str(PROJECT_DIR / "api_server.py"), "--host", "127.0.0.1", "--port", str(port),
+             "--workers", str(args.workers)],
+            cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+    # Ready once every worker has warmed its graphs and model
+    deadline = time.perf_counter() + args.startup_timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"api_server.py exited with {process.returncode}; see {log_path}")
+        with open(log_path, errors="replace") as f:
+            if f.read().count("🔥 Worker") >= args.workers:
+                return process, f"http://127.0.0.1:{port}", log_path
+        time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError(f"Workers not warm after {args.startup_timeout}s; see {log_path}")
+
+
+def stop_server(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+# --- Report ---
+
+def print_report(report: Dict[str, Any], args, target: str):
+    print(f"\nLoad test against {target}: {args.users} users, {report['duration_s']} s")
+    conversations = report["conversations"]
+    print(f"  Conversations: {conversations.get('completed', 0)} completed, {conversations.get('failed', 0)} failed "
+          f"({report['conversation_failure_rate']:.1%}), {report['conversations_per_s']}/s")
+    print(f"  Requests: {report['requests']} ({report['requests_per_s']}/s), "
+          f"errors {report['errors']} ({report['error_rate']:.1%})")
+    print(f"\n  {'stage':<22} {'count':>7} {'err %':>6} {'p50 ms':>9} {'p90 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for stage, row in report["stages"].items():
+        print(f"  {stage:<22} {row['count']:>7} {row['error_rate'] * 100:>6.1f} {row['p50_ms']:>9} {row['p90_ms']:>9} "
+              f"{row['p95_ms']:>9} {row['p99_ms']:>9} {row['max_ms']:>9}")
+    for stage, row in report["stages"].items():
+        if row["error_types"]:
+            print(f"  errors in {stage}: " + ", ".join(f"{name} x{count}" for name, count in row["error_types"].items()))
+    samples = [s for s in report["resources"] if s["server_cpu_pct"] is not None]
+    if samples:
+        print(f"\n  Server: peak CPU {max(s['server_cpu_pct'] for s in samples)}%, "
+              f"mean CPU {sum(s['server_cpu_pct'] for s in samples) / len(samples):.1f}%, "
+              f"peak RSS {max(s['server_rss_mb'] for s in samples)} MB "
+              f"({samples[-1]['server_processes']} processes, {os.cpu_count()} CPUs)")
+    if report["resources"]:
+        print(f"  Load generator: peak CPU {max(s['client_cpu_pct'] for s in report['resources'])}% "
+              "(near 100% means the client, not the server, is the bottleneck)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the guidance API with simulated users.")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent simulated users")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to keep starting conversations")
+    parser.add_argument("--conversations", type=int, default=0, help="Stop each user after this many (0: no limit)")
+    parser.add_argument("--ramp-up", type=float, default=5, help="Seconds over which the users start")
+    parser.add_argument("--think-ms", type=float, default=500, help="Mean pause between a user's requests")
+    parser.add_argument("--mix", default="career=3,university=3,chat=2", help="Scenario weights")
+    parser.add_argument("--cache", action="store_true", help="Let the supervisor serve repeats from its response cache")
+    parser.add_argument("--no-save", dest="save", action="store_false", help="Skip the chat history save stage")
+    parser.add_argument("--request-timeout", type=float, default=60, help="Per-request deadline (X-Timeout-S)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--sample-interval", type=float, default=2, help="Seconds between CPU/memory samples")
+    parser.add_argument("--json", help="Also write the full report (with the resource time series) here")
+    server = parser.add_argument_group("server under test")
+    server.add_argument("--url", help="Test a running server instead of starting one")
+    server.add_argument("--server-pid", type=int, help="PID of that server, for CPU/memory sampling")
+    server.add_argument("--workers", type=int, default=2, help="Workers of the started server")
+    server.add_argument("--port", type=int, default=0, help="Port of the started server (default: a free one)")
+    server.add_argument("--backend-mode", default="fake", help="BACKEND_MODE of the started server")
+    server.add_argument("--llm-latency-ms", type=float, default=300, help="Fake LLM call latency")
+    server.add_argument("--search-latency-ms", type=float, default=500, help="Fake web search latency")
+    server.add_argument("--jitter-ms", type=float, default=50, help="Fake latency jitter")
+    server.add_argument("--error-rate", type=float, default=0.0, help="Fake backend error rate")
+    server.add_argument("--mongodb-uri", default="mongomock://", help="Chat store (needs mongomock for the default)")
+    server.add_argument("--startup-timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    process = None
+    with tempfile.TemporaryDirectory(prefix="load_test_") as workdir:
+        try:
+            if args.url:
+                url, server_pid, target = args.url.rstrip("/"), args.server_pid, args.url
+            else:
+                process, url, _ = start_server(args, workdir)
+                server_pid = process.pid
+                target = (f"{url} ({args.workers} workers, BACKEND_MODE={args.backend_mode}, "
+                          f"LLM {args.llm_latency_ms:g} ms, search {args.search_latency_ms:g} ms)")
+                print(f"Started {target}")
+            report = asyncio.run(run_load(url, server_pid, args))
+        finally:
+            if process is not None:
+                stop_server(process)
+
+    print_report(report, args, target)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nFull report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
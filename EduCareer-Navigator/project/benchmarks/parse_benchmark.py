@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for supervisor input parsing
+
+Compares the single-pass ProfileExtractor with the previous regex parsers
+on a corpus of typical messages and reports where their outputs differ.
+
+Usage:
+    python benchmarks/parse_benchmark.py
+    python benchmarks/parse_benchmark.py --repeat 20000 --show-diffs
+"""
+
+import argparse
+import re
+import sys
+import timeit
+from pathlib import Path
+
+# Import project modules when run as a script
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from profile_extractor import ProfileExtractor
+
+CORPUS = [
+    "I want to study Computer Science in Lahore, matric 1000, inter 950, budget Rs. 300,000",
+    "Looking for a degree in Software Engineering at Isb. My matric marks are 1020 and intermediate 980. I can afford 250k per semester",
+    "Which universities in Pindi offer BBA? Matriculation 890, inter 870, fee under PKR 150000",
+    "I am interested in medicine, my fsc marks are 1010 and matric 1050, budget 2.5 lac, campus is in Karachi",
+    "I have a math score of 85 and a biology score of 70, I like technology and teamwork",
+    "Career advice please: math score of 60, biology score of 90, I am artistic and enjoy presentations",
+    "I enjoy problem-solving and logical thinking, also public speaking. What career fits me?",
+    "Suggest universities for Electrical Engineering in Faisalabad with 900 inter marks and 350,000 PKR fee",
+    "hello, can you help me?",
+    "I started at a smart school and want to study economics in Multan, matric 1001 inter 1002",
+]
+
+
+# --- Previous implementation, kept here as the baseline ---
+
+def legacy_career_profile(text: str) -> dict:
+    data = {
+        "math_score": 75, "bio_score": 75, "interest_tech": False, "interest_art": False,
+        "group_work": False, "logical_thinking": False, "likes_speaking": False,
+        "career_predictions": [], "career_recommendations": [], "final_recommendation": None,
+        "confidence_threshold": 0.7, "user_approval": None, "current_step": "", "processing_complete": False
+    }
+    math_score_match = re.search(r"math score of (\d+)", text, re.IGNORECASE)
+    if math_score_match:
+        data["math_score"] = int(math_score_match.group(1))
+    bio_score_match = re.search(r"biology score of (\d+)", text, re.IGNORECASE)
+    if bio_score_match:
+        data["bio_score"] = int(bio_score_match.group(1))
+    if "tech" in text.lower() or "technology" in text.lower():
+        data["interest_tech"] = True
+    if "art" in text.lower() or "artistic" in text.lower():
+        data["interest_art"] = True
+    if "group work" in text.lower() or "teamwork" in text.lower():
+        data["group_work"] = True
+    if "logical thinking" in text.lower() or "problem-solving" in text.lower():
+        data["logical_thinking"] = True
+    if "speaking" in text.lower() or "presentations" in text.lower():
+        data["likes_speaking"] = True
+    return data
+
+
+def legacy_student_profile(text: str) -> dict:
+    profile = {
+        "matric_marks": 0, "inter_marks": 0, "degree_preference": "", "city": "", "location": "",
+        "fee_budget": "", "universities": [], "ranked_universities": [], "rank_unis": "no"
+    }
+    matric_match = re.search(r"(?:matric|matriculation)\s.*?(\d{3,4})", text, re.IGNORECASE)
+    if matric_match:
+        profile["matric_marks"] = int(matric_match.group(1))
+    inter_match = re.search(r"(?:inter|intermediate)\s.*?(\d{3,4})", text, re.IGNORECASE)
+    if inter_match:
+        profile["inter_marks"] = int(inter_match.group(1))
+    degree_match = re.search(r"(?:study|degree in|major in|interested in)\s+([A-Za-z\s]+?)(?:in|,|at|with|$)", text, re.IGNORECASE)
+    if degree_match:
+        profile["degree_preference"] = degree_match.group(1).strip().replace("a degree in", "").strip()
+    known_cities = ["Lahore", "Karachi", "Islamabad", "Rawalpindi", "Faisalabad", "Peshawar", "Quetta", "Multan", "Sialkot"]
+    for city in known_cities:
+        if re.search(r'\b' + city + r'\b', text, re.IGNORECASE):
+            profile["city"] = city
+            break
+    location_match = re.search(r"(?:location|campus is in|located in)\s+([A-Za-z\s]+?)(?:,|\.|$)", text, re.IGNORECASE)
+    if location_match:
+        profile["location"] = location_match.group(1).strip()
+    elif profile["city"]:
+        profile["location"] = profile["city"]
+    fee_budget_str = ""
+    for pattern in [r"((?:Rs\.?|PKR)\s*[\d,]+\.?\d*)", r"([\d,]+\.?\d*\s*(?:k|lac|lakh|PKR))"]:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            fee_budget_str = match.group(1).strip()
+            break
+    if not fee_budget_str:
+        fallback_match = re.search(r"(?:fee|budget|afford|cost)\D*?(\d[\d,.]*)", text, re.IGNORECASE)
+        if fallback_match:
+            fee_budget_str = fallback_match.group(1).strip()
+    profile["fee_budget"] = fee_budget_str
+    return profile
+
+
+def _per_call_us(fn, repeat: int) -> float:
+    seconds = timeit.timeit(lambda: [fn(text) for text in CORPUS], number=repeat)
+    return seconds / (repeat * len(CORPUS)) * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark supervisor input parsing.")
+    parser.add_argument("--repeat", type=int, default=5000, help="Passes over the corpus")
+    parser.add_argument("--show-diffs", action="store_true", help="Print fields where the parsers disagree")
+    args = parser.parse_args(argv)
+
+    extractor = ProfileExtractor()
+    cases = [
+        ("career", legacy_career_profile, extractor.career_profile),
+        ("student", legacy_student_profile, extractor.student_profile),
+    ]
+
+    print(f"📏 {len(CORPUS)} messages x {args.repeat} passes")
+    for name, legacy, current in cases:
+        legacy_us = _per_call_us(legacy, args.repeat)
+        current_us = _per_call_us(current, args.repeat)
+        print(f"  {name:8s} legacy {legacy_us:7.2f} µs/msg   single-pass {current_us:7.2f} µs/msg   "
+              f"speedup {legacy_us / current_us:5.2f}x")
+
+        diffs = 0
+        for text in CORPUS:
+            old, new = legacy(text), current(text)
+            changed = {k: (old[k], new[k]) for k in old if old[k] != new[k]}
+            if changed:
+                diffs += 1
+                if args.show_diffs:
+                    print(f"    ≠ {text!r}")
+                    for field, (before, after) in changed.items():
+                        print(f"        {field}: {before!r} -> {after!r}")
+        print(f"    {diffs}/{len(CORPUS)} messages parsed differently")
+
+
+if __name__ == "__main__":
+    main()
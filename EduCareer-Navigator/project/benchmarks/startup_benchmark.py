@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Cold-start report for the supervisor
+
+Imports a module in fresh interpreters under ``python -X importtime`` and
+reports the import time, the heaviest imports and any checkpoint databases
+created by the import itself. With --warmup, also times ``warmup()`` (graph
+compilation, checkpoint stores, LLM client and career model), i.e. the work
+importing ``supervisor_agent`` used to do eagerly.
+
+Usage:
+    python benchmarks/startup_benchmark.py
+    python benchmarks/startup_benchmark.py --runs 5 --top 15 --warmup
+    python benchmarks/startup_benchmark.py --module api_server
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+# Prints the wall time of the import (and of warmup) and the databases the import
+# opened on stdout; -X importtime writes to stderr
+SNIPPET = """
+import os, time
+started = time.perf_counter()
+import {module}
+print("import", time.perf_counter() - started)
+print("databases", *sorted(name for name in os.listdir() if name.endswith(".db")))
+if {warmup}:
+    from supervisor_agent import warmup
+    started = time.perf_counter()
+    warmup()
+    print("warmup", time.perf_counter() - started)
+"""
+
+
+def parse_importtime(stderr: str, module: str) -> List[Tuple[str, int, int, int]]:
+    """
+    (name, self_us, cumulative_us, depth) for each ``-X importtime`` line of the import of ``module``.
+
+    Lines after the module's own line (imports done later, e.g. by warmup) are left out.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+        if depth == 0 and name.strip() == module:
+            break
+    return rows
+
+
+def run_once(module: str, warmup: bool) -> Dict[str, object]:
+    """Import ``module`` in a fresh interpreter, in an empty working directory."""
+    env = dict(os.environ)
+    env.setdefault("BACKEND_MODE", "fake")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(PROJECT_DIR), env.get("PYTHONPATH")]))
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    with tempfile.TemporaryDirectory(prefix="startup_benchmark_") as workdir:
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", SNIPPET.format(module=module, warmup=warmup)],
+            cwd=workdir, env=env, capture_output=True, text=True,
+        )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+    timings, databases = {}, []
+    for line in proc.stdout.splitlines():
+        parts = line.split()
+        if len(parts) == 2 and parts[0] in ("import", "warmup"):
+            timings[parts[0]] = float(parts[1])
+        elif parts and parts[0] == "databases":
+            databases = parts[1:]
+    return {"timings": timings, "rows": parse_importtime(proc.stderr, module), "databases": databases}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report cold-start import time.")
+    parser.add_argument("--module", default="supervisor_agent", help="Module to import")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to measure")
+    parser.add_argument("--top", type=int, default=10, help="Heaviest imports to list")
+    parser.add_argument("--warmup", action="store_true", help="Also time warmup() after the import")
+    args = parser.parse_args()
+
+    runs = [run_once(args.module, args.warmup) for _ in range(args.runs)]
+    imports = [run["timings"]["import"] for run in runs]
+    print(f"Cold import of {args.module} ({args.runs} runs)")
+    print(f"  median {statistics.median(imports) * 1000:8.1f} ms   min {min(imports) * 1000:8.1f} ms")
+    if args.warmup:
+        warmups = [run["timings"]["warmup"] for run in runs]
+        print(f"  warmup() median {statistics.median(warmups) * 1000:8.1f} ms")
+        total = statistics.median([i + w for i, w in zip(imports, warmups)])
+        print(f"  import + warmup() median {total * 1000:8.1f} ms (the eager-import equivalent)")
+
+    # Heaviest imports of the last run: cumulative for direct imports of the module, self time overall
+    rows = runs[-1]["rows"]
+    direct = sorted((r for r in rows if r[3] == 1), key=lambda r: r[2], reverse=True)[:args.top]
+    own = sorted(rows, key=lambda r: r[1], reverse=True)[:args.top]
+    print(f"\nTop {len(direct)} direct imports by cumulative time")
+    for name, _, cumulative_us, _ in direct:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+    print(f"\nTop {len(own)} modules by self time")
+    for name, self_us, _, _ in own:
+        print(f"  {self_us / 1000:8.1f} ms  {name}")
+
+    databases = runs[-1]["databases"]
+    print(f"\nCheckpoint databases created by the import: {', '.join(databases) if databases else 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Where a turn's time goes, from a telemetry trace file
+
+Reads the JSONL spans written with TELEMETRY_ENABLED=true and prints, per
+graph, node, tool, LLM and search call: count, p50/p95 and total wall time,
+tokens and errors, heaviest first.
+
+Usage:
+    python benchmarks/trace_report.py
+    python benchmarks/trace_report.py path/to/traces.jsonl
+"""
+
+import json
+import os
+import statistics
+import sys
+from typing import Any, Dict, List, Tuple
+
+TELEMETRY_TRACE_PATH = os.getenv("TELEMETRY_TRACE_PATH", "traces.jsonl")
+
+
+def summarize_traces(path: str) -> List[Dict[str, Any]]:
+    """Count, p50/p95 and total time and tokens per (kind, name) in a JSONL trace file."""
+    groups: Dict[Tuple[str, str], List[dict]] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                groups.setdefault((record["kind"], record["name"]), []).append(record)
+    rows = []
+    for (kind, name), records in groups.items():
+        durations = sorted(r["duration_ms"] for r in records)
+        rows.append({
+            "kind": kind, "name": name, "count": len(records),
+            "p50_ms": statistics.median(durations),
+            "p95_ms": durations[min(len(durations) - 1, int(len(durations) * 0.95))],
+            "total_ms": sum(durations),
+            "tokens": sum(r.get("prompt_tokens", 0) + r.get("completion_tokens", 0) for r in records),
+            "errors": sum(r["status"] == "error" for r in records),
+        })
+    return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else TELEMETRY_TRACE_PATH
+    rows = summarize_traces(path)
+    print(f"{'kind':<6} {'name':<32} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'total ms':>10} {'tokens':>8} {'errors':>6}")
+    for row in rows:
+        print(f"{row['kind']:<6} {row['name'][:32]:<32} {row['count']:>6} {row['p50_ms']:>9.1f} "
+              f"{row['p95_ms']:>9.1f} {row['total_ms']:>10.1f} {row['tokens']:>8} {row['errors']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,16 @@
+import logging
 from typing import List
 import numpy as np
 from career_agent.career_states import CareerState, CareerRecommendation
-from career_agent.career_predictor import CareerPredictor
+from career_agent.career_predictor import get_career_predictor
+from runtime.executors import run_in_pool
+from runtime.telemetry import graph_runs
+
+logger = logging.getLogger(__name__)
 
 def analyze_career_predictions(state: CareerState) -> CareerState:
     """Analyze career predictions and create detailed recommendations."""
-    predictor = CareerPredictor()
+    predictor = get_career_predictor()
     
     # Get career predictions with confidence scores
     predictions = predictor.predict_career(state)
@@ -14,30 +19,25 @@ def analyze_career_predictions(state: CareerState) -> CareerState:
     # Get prediction probabilities for confidence scores
     if predictor.model is not None:
         # Prepare features for getting probabilities
-        features = np.array([[
-            state["math_score"],
-            state["bio_score"],
-            1 if state["interest_tech"] else 0,
-            1 if state["interest_art"] else 0,
-            1 if state["group_work"] else 0,
-            1 if state["logical_thinking"] else 0,
-            1 if state["likes_speaking"] else 0
-        ]])
+        features = np.array([predictor.features(state)])
         
         try:
             probabilities = predictor.model.predict_proba(features)[0]
             classes = predictor.model.classes_
-            # Create mapping of career names to probabilities
-            career_probabilities = dict(zip(classes, probabilities))
+            # Create mapping of career names to probabilities (plain Python types so checkpoints can store them)
+            career_probabilities = dict(zip(map(str, classes), probabilities.tolist()))
         except Exception as e:
-            print(f"⚠️  Error getting probabilities: {e}")
+            logger.warning("⚠️  Error getting probabilities: %s", e)
             career_probabilities = {}
     else:
         career_probabilities = {}
     
-    # Create detailed recommendations for each prediction
+    return _recommend(state, predictor, career_probabilities)
+
+def _recommend(state: CareerState, predictor, career_probabilities: dict) -> CareerState:
+    """Create detailed recommendations for each of the state's predictions."""
     recommendations = []
-    for career_name in predictions:
+    for career_name in state["career_predictions"]:
         # Get confidence score from model probabilities
         confidence_score = career_probabilities.get(career_name, 0.85)
         career_detail = predictor.get_career_details(career_name, confidence_score)
@@ -51,6 +51,31 @@ def analyze_career_predictions(state: CareerState) -> CareerState:
     
     return state
 
+def analyze_career_batch(states: List[CareerState]) -> List[CareerState]:
+    """
+    Validate, analyze and rank many profiles with a single model call.
+    
+    Gives the same recommendations as running the career graph on each
+    profile, without checkpoints; used for batch prediction.
+    """
+    predictor = get_career_predictor()
+    states = [validate_user_inputs(dict(state)) for state in states]
+    if predictor.model is None:
+        return [rank_career_recommendations(analyze_career_predictions(state)) for state in states]
+    
+    classes, probabilities = predictor.predict_proba_batch(states)
+    results = []
+    for state, row in zip(states, probabilities):
+        # Top 3 careers with >10% confidence, as in CareerPredictor.predict_career
+        state["career_predictions"] = [classes[idx] for idx in np.argsort(row)[::-1][:3] if row[idx] > 0.1]
+        state = _recommend(state, predictor, dict(zip(classes, row.tolist())))
+        results.append(rank_career_recommendations(state))
+    return results
+
+async def aanalyze_career_predictions(state: CareerState) -> CareerState:
+    """Async variant used by ``ainvoke``/``astream``: runs the sklearn model in the CPU pool."""
+    return await run_in_pool("cpu", analyze_career_predictions, state)
+
 def _adjust_for_preferences(career: CareerRecommendation, state: CareerState) -> CareerRecommendation:
     """Adjust career recommendation based on user preferences (using only CSV features)."""
     # Adjust confidence score based on the 7 features from CSV
@@ -111,6 +136,7 @@ def rank_career_recommendations(state: CareerState) -> CareerState:
 
 def validate_user_inputs(state: CareerState) -> CareerState:
     """Validate user inputs and provide feedback."""
+    graph_runs.count("career")
     validation_issues = []
     
     # Check score ranges
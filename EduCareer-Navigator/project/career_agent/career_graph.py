@@ -1,21 +1,20 @@
+import threading
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph
-from langgraph.checkpoint.sqlite import SqliteSaver
-import sqlite3
+from runtime.checkpoints import get_checkpointer
 from career_agent.career_states import CareerState
-from career_agent.career_analyzer import validate_user_inputs, analyze_career_predictions, rank_career_recommendations
+from career_agent.career_analyzer import (validate_user_inputs, analyze_career_predictions,
+                                          aanalyze_career_predictions, rank_career_recommendations)
 # from career_approval import request_user_approval, finalize_recommendation, get_approval_decision
 
-# SQLite checkpointer for career graph
-career_db = sqlite3.connect("career_graph.db", check_same_thread=False)
-career_memorybox = SqliteSaver(career_db)
-
 def create_career_graph():
     """Create a simpler career graph without approval workflow."""
     graph = StateGraph(CareerState)
     
     # Add nodes
     graph.add_node("validate_inputs", validate_user_inputs)
-    graph.add_node("analyze_predictions", analyze_career_predictions)
+    # Async runs send the sklearn model to the CPU pool instead of the graph pool
+    graph.add_node("analyze_predictions", RunnableLambda(analyze_career_predictions, afunc=aanalyze_career_predictions))
     graph.add_node("rank_recommendations", rank_career_recommendations)
     
     # Set entry point
@@ -28,4 +27,20 @@ def create_career_graph():
     # Set finish point
     graph.set_finish_point("rank_recommendations")
     
-    return graph.compile() 
\ No newline at end of file
+    # SQLite checkpointer for career graph (WAL, per-thread connections), opened on first compile
+    return graph.compile(checkpointer=get_checkpointer("career_graph.db"), name="career_graph")
+
+
+# Compiled once per process and shared by every session
+_career_graph = None
+_career_graph_lock = threading.Lock()
+
+
+def get_career_graph():
+    """Get the process-wide compiled career graph"""
+    global _career_graph
+    if _career_graph is None:
+        with _career_graph_lock:
+            if _career_graph is None:
+                _career_graph = create_career_graph()
+    return _career_graph
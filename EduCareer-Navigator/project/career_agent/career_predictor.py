@@ -1,10 +1,12 @@
-import joblib
-import pandas as pd
+import logging
 import numpy as np
 import os
+import threading
 from typing import List, Tuple
 from career_agent.career_states import CareerState, CareerRecommendation
 
+logger = logging.getLogger(__name__)
+
 class CareerPredictor:
     def __init__(self, model_path: str = None):
         """Initialize the career predictor with the trained model."""
@@ -20,36 +22,38 @@ class CareerPredictor:
             for path in possible_paths:
                 if os.path.exists(path):
                     model_path = path
-                    print(f"✅ Found model at: {path}")
+                    logger.info("✅ Found model at: %s", path)
                     break
             else:
                 model_path = "career_predictor_model.pkl"  # Default fallback
-                print(f"⚠️  Model not found in any expected location, using default: {model_path}")
+                logger.warning("⚠️  Model not found in any expected location, using default: %s", model_path)
         """Initialize the career predictor with the trained model."""
+        # joblib (and sklearn, when unpickling) load with the first predictor, not at import
+        import joblib
         try:
             self.model = joblib.load(model_path)
-            print(f"✅ Model loaded successfully from {model_path}")
+            logger.info("✅ Model loaded successfully from %s", model_path)
             
             # Load metadata if available
             metadata_path = model_path.replace('.pkl', '_metadata.pkl')
             try:
                 self.metadata = joblib.load(metadata_path)
-                print(f"✅ Model metadata loaded: {self.metadata}")
+                logger.info("✅ Model metadata loaded: %s", self.metadata)
             except FileNotFoundError:
-                print(f"⚠️  Metadata file not found, using default feature columns")
+                logger.warning("⚠️  Metadata file not found, using default feature columns")
                 self.metadata = {
                     'feature_columns': ['Math', 'Bio', 'Interest_Tech', 'Interest_Art', 'Group_Work', 'Logical_Thinking', 'Likes_Speaking']
                 }
                 
         except FileNotFoundError:
-            print(f"❌ Model file {model_path} not found. Please train the model first.")
+            logger.error("❌ Model file %s not found. Please train the model first.", model_path)
             self.model = None
             self.metadata = None
     
     def predict_career(self, state: CareerState) -> List[str]:
         """Predict career based on user inputs (exactly matching CSV features)."""
         if self.model is None:
-            print("⚠️  Using fallback prediction - model not loaded")
+            logger.warning("⚠️  Using fallback prediction - model not loaded")
             return ["IT"]  # Default fallback
         
         # Verify feature columns match training data
@@ -57,18 +61,10 @@ class CareerPredictor:
             'Math', 'Bio', 'Interest_Tech', 'Interest_Art', 'Group_Work', 'Logical_Thinking', 'Likes_Speaking'
         ])
         
-        print(f"🔍 Expected features: {expected_features}")
+        logger.debug("🔍 Expected features: %s", expected_features)
         
         # Prepare features for prediction (exactly matching CSV columns)
-        features = np.array([[
-            state["math_score"],        # Math
-            state["bio_score"],         # Bio
-            1 if state["interest_tech"] else 0,      # Interest_Tech
-            1 if state["interest_art"]else 0,       # Interest_Art
-            1 if state["group_work"] else 0,         # Group_Work
-            1 if state["logical_thinking"] else 0,   # Logical_Thinking
-            1 if state["likes_speaking"] else 0      # Likes_Speaking
-        ]])
+        features = np.array([self.features(state)])
         
         # print(f"🔍 Input features: {features[0]}")
         # print(f"🔍 Feature mapping: Math={state["math_score"]}, Bio={state["bio_score"]}, Tech={state["interest_tech"]}, Art={state["interest_art"]}, Group={state["group_work"]}, Logical={state["logical_thinking"]}, Speaking={state["likes_speaking"]}")
@@ -78,8 +74,8 @@ class CareerPredictor:
             probabilities = self.model.predict_proba(features)[0]
             classes = self.model.classes_
             
-            print(f"🔍 Model classes: {classes}")
-            print(f"🔍 Raw probabilities: {probabilities}")
+            logger.debug("🔍 Model classes: %s", classes)
+            logger.debug("🔍 Raw probabilities: %s", probabilities)
             
             # Get top 3 predictions with confidence scores
             top_indices = np.argsort(probabilities)[::-1][:3]
@@ -87,16 +83,34 @@ class CareerPredictor:
             
             for idx in top_indices:
                 if probabilities[idx] > 0.1:  # Only include predictions with >10% confidence
-                    predictions.append(classes[idx])
-                    print(f"🔍 Selected: {classes[idx]} (confidence: {probabilities[idx]:.3f})")
+                    predictions.append(str(classes[idx]))
+                    logger.debug("🔍 Selected: %s (confidence: %.3f)", classes[idx], probabilities[idx])
             
-            print(f"🔍 Final predictions: {predictions}")
+            logger.debug("🔍 Final predictions: %s", predictions)
             return predictions[:3]  # Return top 3 predictions
             
         except Exception as e:
-            print(f"❌ Error during prediction: {e}")
+            logger.error("❌ Error during prediction: %s", e)
             return ["IT"]  # Fallback
     
+    @staticmethod
+    def features(state: CareerState) -> List[int]:
+        """Model input row for ``state`` (Math, Bio, Interest_Tech, Interest_Art, Group_Work, Logical_Thinking, Likes_Speaking)."""
+        return [
+            state["math_score"],
+            state["bio_score"],
+            1 if state["interest_tech"] else 0,
+            1 if state["interest_art"] else 0,
+            1 if state["group_work"] else 0,
+            1 if state["logical_thinking"] else 0,
+            1 if state["likes_speaking"] else 0
+        ]
+    
+    def predict_proba_batch(self, states: List[CareerState]) -> Tuple[List[str], np.ndarray]:
+        """Class names and per-state probabilities from a single model call over all states."""
+        features = np.array([self.features(state) for state in states])
+        return [str(c) for c in self.model.classes_], self.model.predict_proba(features)
+    
     def get_career_details(self, career_name: str, confidence_score: float = None) -> CareerRecommendation:
         """Get detailed information about a specific career."""
         career_info = self._get_career_database().get(career_name, {})
@@ -175,4 +189,19 @@ class CareerPredictor:
                 "education_requirements": "Bachelor's in Education or related field",
                 "companies": ["Schools", "Universities", "Training centers", "Online platforms"]
             }
-        } 
\ No newline at end of file
+        } 
+
+
+# Loaded once per process and shared by every request
+_career_predictor = None
+_career_predictor_lock = threading.Lock()
+
+
+def get_career_predictor() -> CareerPredictor:
+    """Get the process-wide career predictor (the model is loaded on first use)"""
+    global _career_predictor
+    if _career_predictor is None:
+        with _career_predictor_lock:
+            if _career_predictor is None:
+                _career_predictor = CareerPredictor()
+    return _career_predictor
@@ -7,7 +7,7 @@ import uuid
 # Add parent directory to path to import modules
 sys.path.append(str(Path(__file__).parent.parent))
 
-from career_agent.career_graph import create_career_graph
+from career_agent import career_graph
 from career_agent.career_states import CareerState, CareerRecommendation
 from langgraph.types import Command
 
@@ -24,7 +24,7 @@ st.set_page_config(
 def get_career_graph():
     """Get the career recommendation graph."""
     try:
-        return create_career_graph()
+        return career_graph.get_career_graph()
     except Exception as e:
         st.error(f"Error initializing career graph: {e}")
         return None
@@ -2,6 +2,8 @@
 Database utilities for the Guidance Assistant
 """
 
-from .mongodb_client import ChatHistoryDB, get_chat_db, close_chat_db
+from .mongodb_client import (ChatHistoryDB, ChatWriteBehind, get_chat_db, close_chat_db,
+                             get_chat_writer, close_chat_writer)
 
-__all__ = ['ChatHistoryDB', 'get_chat_db', 'close_chat_db'] 
\ No newline at end of file
+__all__ = ['ChatHistoryDB', 'ChatWriteBehind', 'get_chat_db', 'close_chat_db',
+           'get_chat_writer', 'close_chat_writer'] 
\ No newline at end of file
@@ -19,6 +19,17 @@ MONGODB_SOCKET_TIMEOUT_MS = int(os.getenv("MONGODB_SOCKET_TIMEOUT_MS", "10000"))
 # Index settings
 CREATE_INDEXES = os.getenv("CREATE_INDEXES", "true").lower() == "true"
 
+# Write-behind buffer for chat messages (batched in a background thread)
+MONGODB_WRITE_BATCH_SIZE = int(os.getenv("MONGODB_WRITE_BATCH_SIZE", "100"))
+MONGODB_WRITE_FLUSH_INTERVAL_MS = float(os.getenv("MONGODB_WRITE_FLUSH_INTERVAL_MS", "500"))
+MONGODB_WRITE_QUEUE_MAX = int(os.getenv("MONGODB_WRITE_QUEUE_MAX", "10000"))
+MONGODB_WRITE_MAX_RETRIES = int(os.getenv("MONGODB_WRITE_MAX_RETRIES", "5"))
+MONGODB_WRITE_RETRY_BACKOFF_MS = float(os.getenv("MONGODB_WRITE_RETRY_BACKOFF_MS", "200"))
+MONGODB_WRITE_SHUTDOWN_TIMEOUT_S = float(os.getenv("MONGODB_WRITE_SHUTDOWN_TIMEOUT_S", "10"))
+
+# Chat history pages (messages fetched per "load older" step)
+MONGODB_HISTORY_PAGE_SIZE = int(os.getenv("MONGODB_HISTORY_PAGE_SIZE", "50"))
+
 # Logging
 MONGODB_LOGGING = os.getenv("MONGODB_LOGGING", "false").lower() == "true"
 
@@ -32,6 +43,13 @@ def get_mongodb_config() -> dict:
         "server_selection_timeout_ms": MONGODB_SERVER_SELECTION_TIMEOUT_MS,
         "socket_timeout_ms": MONGODB_SOCKET_TIMEOUT_MS,
         "create_indexes": CREATE_INDEXES,
+        "write_batch_size": MONGODB_WRITE_BATCH_SIZE,
+        "write_flush_interval_ms": MONGODB_WRITE_FLUSH_INTERVAL_MS,
+        "write_queue_max": MONGODB_WRITE_QUEUE_MAX,
+        "write_max_retries": MONGODB_WRITE_MAX_RETRIES,
+        "write_retry_backoff_ms": MONGODB_WRITE_RETRY_BACKOFF_MS,
+        "write_shutdown_timeout_s": MONGODB_WRITE_SHUTDOWN_TIMEOUT_S,
+        "history_page_size": MONGODB_HISTORY_PAGE_SIZE,
         "logging": MONGODB_LOGGING
     }
 
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Remove duplicate session messages and create the unique session index
+Run from project/: python -m database.dedupe_messages [--apply]
+"""
+
+import argparse
+from typing import List, Optional
+
+from database.mongodb_client import get_chat_db, close_chat_db
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Report (or with --apply, delete) repeated copies of saved session messages.")
+    parser.add_argument("--apply", action="store_true",
+                        help="Delete the duplicates (keeping the first saved copy) and create the index")
+    args = parser.parse_args(argv)
+
+    db = get_chat_db()
+    try:
+        report = db.remove_duplicate_messages(dry_run=not args.apply)
+        if not args.apply:
+            print(f"🔍 {report['duplicates']} duplicate session messages in {report['threads']} threads "
+                  f"would be removed; rerun with --apply to delete them")
+            return
+        print(f"✅ Removed {report['removed']} duplicate session messages in {report['threads']} threads")
+        if db.ensure_session_index():
+            print("✅ Unique session index is in place")
+    finally:
+        close_chat_db()
+
+
+if __name__ == "__main__":
+    main()
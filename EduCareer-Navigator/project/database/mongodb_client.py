@@ -4,12 +4,39 @@ Simple MongoDB client for storing chat history
 """
 
 import os
+import threading
+import time
+from collections import deque
 from datetime import datetime
 from typing import List, Dict, Optional, Any
-from pymongo import MongoClient
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, MongoClient
 from pymongo.collection import Collection
 from pymongo.database import Database
+from pymongo.errors import BulkWriteError, OperationFailure
 import json
+from database.config import (
+    MONGODB_WRITE_BATCH_SIZE, MONGODB_WRITE_FLUSH_INTERVAL_MS, MONGODB_WRITE_QUEUE_MAX,
+    MONGODB_WRITE_MAX_RETRIES, MONGODB_WRITE_RETRY_BACKOFF_MS, MONGODB_WRITE_SHUTDOWN_TIMEOUT_S,
+    MONGODB_HISTORY_PAGE_SIZE,
+)
+
+
+# Characters of a session's first message kept as its preview in chat_sessions
+SESSION_PREVIEW_CHARS = 80
+
+
+def message_doc(thread_id: str, role: str, content: str,
+                user_id: Optional[str] = None, metadata: Optional[Dict] = None) -> Dict[str, Any]:
+    """Document stored for one chat message (``save_chat_message`` and the write-behind buffer)"""
+    return {
+        "thread_id": thread_id,
+        "role": role,
+        "content": content,
+        "user_id": user_id,
+        "timestamp": datetime.utcnow(),
+        "metadata": metadata or {}
+    }
 
 class ChatHistoryDB:
     """Simple MongoDB client for chat history storage"""
@@ -27,6 +54,8 @@ class ChatHistoryDB:
         self.client: Optional[MongoClient] = None
         self.db: Optional[Database] = None
         self.chat_collection: Optional[Collection] = None
+        self.sessions_collection: Optional[Collection] = None
+        self.session_index_ready = False
         
         # Connect to MongoDB
         self._connect()
@@ -34,20 +63,98 @@ class ChatHistoryDB:
     def _connect(self):
         """Establish connection to MongoDB"""
         try:
-            self.client = MongoClient(self.connection_string)
+            if self.connection_string.startswith("mongomock://"):
+                # In-memory stand-in for offline runs and load tests (pip install mongomock)
+                import mongomock
+                self.client = mongomock.MongoClient()
+            else:
+                self.client = MongoClient(self.connection_string)
             self.db = self.client[self.database_name]
             self.chat_collection = self.db["chat_history"]
+            # One summary per thread, kept up to date on every write (see _record_sessions)
+            self.sessions_collection = self.db["chat_sessions"]
             
             # Create indexes for better performance
             self.chat_collection.create_index("thread_id")
             self.chat_collection.create_index("timestamp")
             self.chat_collection.create_index("user_id")
+            # Serve history pages (newest first, keyset on timestamp and _id) and
+            # "latest thread of a user" without scanning the collection
+            self.chat_collection.create_index(
+                [("thread_id", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)],
+                name="thread_timestamp_id")
+            self.chat_collection.create_index(
+                [("user_id", ASCENDING), ("timestamp", DESCENDING)], name="user_timestamp")
+            self.sessions_collection.create_index(
+                [("user_id", ASCENDING), ("last_message_time", DESCENDING)], name="user_last_message")
+            self.ensure_session_index()
             
             print(f"✅ Connected to MongoDB database: {self.database_name}")
         except Exception as e:
             print(f"❌ Failed to connect to MongoDB: {e}")
             raise
     
+    def ensure_session_index(self) -> bool:
+        """
+        Create the unique (thread_id, message_order) index that makes session saves idempotent
+        
+        Never modifies data: if existing messages violate the index, it is left
+        uncreated until they are removed with ``python -m database.dedupe_messages``.
+        
+        Returns:
+            Whether the index exists
+        """
+        try:
+            self.chat_collection.create_index(
+                [("thread_id", ASCENDING), ("message_order", ASCENDING)],
+                name="thread_message_order_unique", unique=True,
+                # Messages saved one at a time (save_chat_message) have no order and are not constrained
+                partialFilterExpression={"message_order": {"$exists": True}},
+            )
+        except OperationFailure as e:
+            if e.code == 11000:
+                # Sessions saved repeatedly before the index existed hold duplicate copies
+                print("⚠️ Duplicate session messages prevent the unique session index; "
+                      "review and remove them with: python -m database.dedupe_messages")
+            else:
+                print(f"⚠️ Could not create the unique session index: {e}")
+            self.session_index_ready = False
+            return False
+        self.session_index_ready = True
+        return True
+    
+    def remove_duplicate_messages(self, dry_run: bool = False) -> Dict[str, int]:
+        """
+        Delete repeated copies of session messages, keeping the first saved
+        
+        Args:
+            dry_run: Only count the copies that would be deleted
+        
+        Returns:
+            Dictionary with the affected ``threads``, the ``duplicates`` found
+            and the number of messages ``removed``
+        """
+        if self.chat_collection is None:
+            raise Exception("Database not connected")
+        
+        pipeline = [
+            {"$match": {"message_order": {"$exists": True}}},
+            {"$group": {"_id": {"thread_id": "$thread_id", "message_order": "$message_order"},
+                        "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gt": 1}}},
+        ]
+        duplicate_ids = []
+        thread_ids = set()
+        for group in self.chat_collection.aggregate(pipeline):
+            duplicate_ids.extend(sorted(group["ids"])[1:])
+            thread_ids.add(group["_id"]["thread_id"])
+        report = {"threads": len(thread_ids), "duplicates": len(duplicate_ids), "removed": 0}
+        if dry_run or not duplicate_ids:
+            return report
+        report["removed"] = self.chat_collection.delete_many({"_id": {"$in": duplicate_ids}}).deleted_count
+        self.rebuild_session_summaries({"thread_id": {"$in": list(thread_ids)}})
+        return report
+    
     def save_chat_message(self, thread_id: str, role: str, content: str, 
                          user_id: Optional[str] = None, metadata: Optional[Dict] = None) -> str:
         """
@@ -66,56 +173,107 @@ class ChatHistoryDB:
         if self.chat_collection is None:
             raise Exception("Database not connected")
         
-        message_doc = {
-            "thread_id": thread_id,
-            "role": role,
-            "content": content,
-            "user_id": user_id,
-            "timestamp": datetime.utcnow(),
-            "metadata": metadata or {}
-        }
-        
-        result = self.chat_collection.insert_one(message_doc)
+        doc = message_doc(thread_id, role, content, user_id, metadata)
+        result = self.chat_collection.insert_one(doc)
+        self._record_sessions([doc])
         return str(result.inserted_id)
     
+    def insert_messages(self, docs: List[Dict]) -> int:
+        """
+        Insert message documents in one unordered bulk write
+        
+        Safe to retry with the same documents: they carry their ``_id``, so
+        ones an earlier attempt already stored are rejected as duplicates.
+        
+        Args:
+            docs: Message documents (see ``message_doc``) with an ``_id``
+            
+        Returns:
+            Number of documents newly inserted
+        """
+        if self.chat_collection is None:
+            raise Exception("Database not connected")
+        
+        rejected = set()
+        try:
+            self.chat_collection.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(error.get("code") != 11000 for error in errors):
+                raise
+            rejected = {error["index"] for error in errors}
+        
+        inserted = [doc for i, doc in enumerate(docs) if i not in rejected]
+        self._record_sessions(inserted)
+        return len(inserted)
+    
     def save_chat_session(self, thread_id: str, messages: List[Dict], 
-                         user_id: Optional[str] = None, metadata: Optional[Dict] = None) -> List[str]:
+                         user_id: Optional[str] = None, metadata: Optional[Dict] = None,
+                         start_order: int = 0) -> Dict[str, Any]:
         """
         Save an entire chat session
         
+        Idempotent: a message is identified by (thread_id, its position in
+        ``messages`` plus ``start_order``), so saving the same or a longer
+        session again writes only the messages not saved before, in one
+        insert_many.
+        
         Args:
             thread_id: Unique identifier for the chat session
             messages: List of message dictionaries with 'role' and 'content'
             user_id: Optional user identifier
             metadata: Optional additional metadata
+            start_order: Position of the first message; pass ``next_message_order``
+                to append messages to a thread loaded from the database
             
         Returns:
-            List of message IDs
+            Dict with 'inserted' and 'skipped' (already saved) counts and the 'inserted_ids'
         """
         if self.chat_collection is None:
             raise Exception("Database not connected")
         
-        message_ids = []
         timestamp = datetime.utcnow()
-        
-        for i, message in enumerate(messages):
-            if message.get("role") == "system":
-                continue  # Skip system messages
-                
-            message_doc = {
+        message_docs = [
+            {
                 "thread_id": thread_id,
                 "role": message["role"],
                 "content": message["content"],
                 "user_id": user_id,
                 "timestamp": timestamp,
-                "message_order": i,
+                "message_order": start_order + i,
                 "metadata": metadata or {}
             }
-            
-            result = self.chat_collection.insert_one(message_doc)
-            message_ids.append(str(result.inserted_id))
-        
-        return message_ids
+            for i, message in enumerate(messages)
+            if message.get("role") != "system"  # Skip system messages
+        ]
+        if not message_docs:
+            return {"inserted": 0, "skipped": 0, "inserted_ids": []}
+        
+        # Positions already stored for this thread (answered from the unique index)
+        saved_orders = {doc["message_order"] for doc in self.chat_collection.find(
+            {"thread_id": thread_id, "message_order": {"$in": [doc["message_order"] for doc in message_docs]}},
+            {"message_order": 1, "_id": 0},
+        )}
+        new_docs = [doc for doc in message_docs if doc["message_order"] not in saved_orders]
+        
+        rejected = set()
+        if new_docs:
+            try:
+                self.chat_collection.insert_many(new_docs, ordered=False)
+            except BulkWriteError as e:
+                # A concurrent save of the same session stored some of them first
+                errors = e.details.get("writeErrors", [])
+                if any(error.get("code") != 11000 for error in errors):
+                    raise
+                rejected = {error["index"] for error in errors}
+        
+        self._record_sessions([doc for i, doc in enumerate(new_docs) if i not in rejected])
+        inserted_ids = [str(doc["_id"]) for i, doc in enumerate(new_docs) if i not in rejected]
+        return {
+            "inserted": len(inserted_ids),
+            "skipped": len(message_docs) - len(inserted_ids),
+            "inserted_ids": inserted_ids,
+        }
     
     def get_chat_history(self, thread_id: str, limit: Optional[int] = None) -> List[Dict]:
         """
@@ -132,7 +290,8 @@ class ChatHistoryDB:
             raise Exception("Database not connected")
         
         query = {"thread_id": thread_id}
-        cursor = self.chat_collection.find(query).sort("timestamp", 1)
+        # Messages of one save share a timestamp; their order comes from message_order
+        cursor = self.chat_collection.find(query).sort([("timestamp", 1), ("message_order", 1)])
         
         if limit:
             cursor = cursor.limit(limit)
@@ -146,41 +305,188 @@ class ChatHistoryDB:
         
         return messages
     
-    def get_user_chat_sessions(self, user_id: str, limit: Optional[int] = None) -> List[Dict]:
+    def get_chat_history_page(self, thread_id: str, before: Optional[str] = None,
+                              page_size: int = MONGODB_HISTORY_PAGE_SIZE) -> Dict[str, Any]:
+        """
+        Retrieve one page of a thread's messages, newest page first
+        
+        Pages are keyset-paginated on (timestamp, _id), so each page is an
+        index range read however deep the history goes. Only role and
+        content (plus the sort key) are fetched.
+        
+        Args:
+            thread_id: Thread identifier
+            before: Cursor returned with the previous page; None for the newest page
+            page_size: Maximum number of messages in the page
+            
+        Returns:
+            Dict with the page's "messages" (oldest first) and "next_cursor",
+            the cursor of the next older page or None when there is none
+        """
+        if self.chat_collection is None:
+            raise Exception("Database not connected")
+        
+        query: Dict[str, Any] = {"thread_id": thread_id}
+        if before:
+            timestamp, _id = _decode_history_cursor(before)
+            query["$or"] = [{"timestamp": {"$lt": timestamp}},
+                            {"timestamp": timestamp, "_id": {"$lt": _id}}]
+        
+        # One extra document tells whether an older page exists
+        docs = list(self.chat_collection.find(query, {"role": 1, "content": 1, "timestamp": 1})
+                    .sort([("timestamp", DESCENDING), ("_id", DESCENDING)])
+                    .limit(page_size + 1))
+        has_more = len(docs) > page_size
+        docs = docs[:page_size]
+        
+        return {
+            "messages": [{"role": doc["role"], "content": doc["content"]} for doc in reversed(docs)],
+            "next_cursor": _encode_history_cursor(docs[-1]) if has_more else None,
+        }
+    
+    def next_message_order(self, thread_id: str) -> int:
         """
-        Get all chat sessions for a specific user
+        Position after the last session message saved for a thread
+        
+        Args:
+            thread_id: Thread identifier
+            
+        Returns:
+            The highest saved message_order plus one, or 0 if there is none
+        """
+        if self.chat_collection is None:
+            raise Exception("Database not connected")
+        
+        doc = self.chat_collection.find_one(
+            {"thread_id": thread_id, "message_order": {"$exists": True}},
+            {"message_order": 1, "_id": 0}, sort=[("message_order", DESCENDING)],
+        )
+        return doc["message_order"] + 1 if doc else 0
+    
+    def get_latest_thread_id(self, user_id: str) -> Optional[str]:
+        """
+        Get the thread of a user's most recent message
         
         Args:
             user_id: User identifier
-            limit: Maximum number of sessions to retrieve
             
         Returns:
-            List of chat sessions
+            Thread identifier, or None when the user has no messages
+        """
+        if self.chat_collection is None:
+            raise Exception("Database not connected")
+        
+        doc = self.chat_collection.find_one({"user_id": user_id}, {"thread_id": 1, "_id": 0},
+                                            sort=[("timestamp", DESCENDING)])
+        return doc["thread_id"] if doc else None
+    
+    def _record_sessions(self, docs: List[Dict]):
+        """
+        Fold newly inserted messages into their threads' chat_sessions summaries
+        
+        One upsert per thread: $inc the message count, $min/$max the first and
+        last message times; user and preview are set when the summary is
+        created. A failure here is logged rather than raised, so it never
+        fails (and retries) the message write itself; the backfill
+        (python -m database.sessions_backfill) repairs any drift.
+        """
+        threads: Dict[str, Dict[str, Any]] = {}
+        for doc in docs:
+            summary = threads.get(doc["thread_id"])
+            if summary is None:
+                threads[doc["thread_id"]] = {"first": doc, "last": doc, "count": 1}
+                continue
+            summary["count"] += 1
+            if doc["timestamp"] < summary["first"]["timestamp"]:
+                summary["first"] = doc
+            if doc["timestamp"] > summary["last"]["timestamp"]:
+                summary["last"] = doc
+        
+        for thread_id, summary in threads.items():
+            try:
+                self.sessions_collection.update_one(
+                    {"_id": thread_id},
+                    {
+                        "$inc": {"message_count": summary["count"]},
+                        "$min": {"first_message_time": summary["first"]["timestamp"]},
+                        "$max": {"last_message_time": summary["last"]["timestamp"]},
+                        "$setOnInsert": {"user_id": summary["first"].get("user_id"),
+                                         "preview": _preview(summary["first"]["content"])},
+                    },
+                    upsert=True,
+                )
+            except Exception as e:
+                print(f"⚠️ Failed to update session summary for {thread_id}: {e}")
+    
+    def rebuild_session_summaries(self, query: Optional[Dict] = None) -> int:
+        """
+        Recompute chat_sessions summaries from the messages themselves
+        
+        Used to backfill summaries for history written before chat_sessions
+        existed, and to resync threads whose messages were removed.
+        
+        Args:
+            query: Filter on chat_history selecting the messages (and so the
+                threads) to rebuild; None rebuilds every thread
+            
+        Returns:
+            Number of summaries written
         """
         if self.chat_collection is None:
             raise Exception("Database not connected")
         
         pipeline = [
-            {"$match": {"user_id": user_id}},
+            {"$match": query or {}},
+            # Sorted first, so $first is each thread's earliest message
+            {"$sort": {"thread_id": 1, "timestamp": 1, "_id": 1}},
             {"$group": {
                 "_id": "$thread_id",
-                "last_message": {"$last": "$$ROOT"},
+                "user_id": {"$first": "$user_id"},
                 "message_count": {"$sum": 1},
-                "first_message": {"$first": "$$ROOT"}
-            }},
-            {"$sort": {"last_message.timestamp": -1}}
+                "first_message_time": {"$min": "$timestamp"},
+                "last_message_time": {"$max": "$timestamp"},
+                "first_content": {"$first": "$content"}
+            }}
         ]
         
+        written = 0
+        for doc in self.chat_collection.aggregate(pipeline, allowDiskUse=True):
+            content = doc.pop("first_content")
+            self.sessions_collection.replace_one({"_id": doc["_id"]}, {**doc, "preview": _preview(content)},
+                                                 upsert=True)
+            written += 1
+        return written
+    
+    def get_user_chat_sessions(self, user_id: str, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Get all chat sessions for a specific user, most recent first
+        
+        Reads the chat_sessions summaries through their (user_id,
+        last_message_time) index instead of grouping the user's messages.
+        
+        Args:
+            user_id: User identifier
+            limit: Maximum number of sessions to retrieve
+            
+        Returns:
+            List of chat sessions
+        """
+        if self.sessions_collection is None:
+            raise Exception("Database not connected")
+        
+        cursor = self.sessions_collection.find({"user_id": user_id}).sort("last_message_time", DESCENDING)
+        
         if limit:
-            pipeline.append({"$limit": limit})
+            cursor = cursor.limit(limit)
         
         sessions = []
-        for doc in self.chat_collection.aggregate(pipeline):
+        for doc in cursor:
             session = {
                 "thread_id": doc["_id"],
                 "message_count": doc["message_count"],
-                "last_message_time": doc["last_message"]["timestamp"].isoformat(),
-                "first_message_time": doc["first_message"]["timestamp"].isoformat()
+                "last_message_time": doc["last_message_time"].isoformat(),
+                "first_message_time": doc["first_message_time"].isoformat(),
+                "preview": doc.get("preview", "")
             }
             sessions.append(session)
         
@@ -200,6 +506,7 @@ class ChatHistoryDB:
             raise Exception("Database not connected")
         
         result = self.chat_collection.delete_many({"thread_id": thread_id})
+        self.sessions_collection.delete_one({"_id": thread_id})
         return result.deleted_count > 0
     
     def delete_user_chat_history(self, user_id: str) -> bool:
@@ -216,6 +523,7 @@ class ChatHistoryDB:
             raise Exception("Database not connected")
         
         result = self.chat_collection.delete_many({"user_id": user_id})
+        self.sessions_collection.delete_many({"user_id": user_id})
         return result.deleted_count > 0
     
     def search_chat_history(self, query: str, user_id: Optional[str] = None, 
@@ -303,22 +611,219 @@ class ChatHistoryDB:
             self.client.close()
             print("✅ MongoDB connection closed")
 
+def _preview(content: str) -> str:
+    """First SESSION_PREVIEW_CHARS characters of a message, on one line"""
+    text = " ".join(str(content).split())
+    return text if len(text) <= SESSION_PREVIEW_CHARS else text[:SESSION_PREVIEW_CHARS - 1] + "…"
+
+
+def _encode_history_cursor(doc: Dict[str, Any]) -> str:
+    """Opaque cursor pointing just past ``doc`` in newest-first order"""
+    return f"{doc['timestamp'].isoformat()}_{doc['_id']}"
+
+
+def _decode_history_cursor(cursor: str):
+    timestamp, _id = cursor.rsplit("_", 1)
+    return datetime.fromisoformat(timestamp), ObjectId(_id)
+
+class ChatWriteBehind:
+    """
+    Background write-behind buffer for chat messages
+    
+    ``enqueue`` returns at once; a writer thread collects messages into
+    batches of up to ``batch_size`` (or whatever arrived within
+    ``flush_interval_ms`` of the oldest) and stores each batch with one bulk
+    insert. The database connection is opened by the writer, off the
+    request path. A failed batch is retried with exponential backoff; the
+    message IDs are assigned on enqueue, so a retry never duplicates a
+    message. Messages are dropped (and counted) only when the buffer is full
+    or a batch exhausts its retries.
+    """
+    
+    def __init__(self, get_db=None, batch_size: int = MONGODB_WRITE_BATCH_SIZE,
+                 flush_interval_ms: float = MONGODB_WRITE_FLUSH_INTERVAL_MS,
+                 max_queue: int = MONGODB_WRITE_QUEUE_MAX, max_retries: int = MONGODB_WRITE_MAX_RETRIES,
+                 retry_backoff_ms: float = MONGODB_WRITE_RETRY_BACKOFF_MS):
+        """
+        Initialize the buffer (the writer thread starts with the first message)
+        
+        Args:
+            get_db: Returns the ChatHistoryDB to write to (defaults to ``get_chat_db``)
+            batch_size: Most messages per bulk insert
+            flush_interval_ms: Longest a message waits for its batch to fill
+            max_queue: Messages buffered before ``enqueue`` starts refusing
+            max_retries: Retries of a failed batch before it is dropped
+            retry_backoff_ms: First retry delay; doubles with each retry (capped at 30 s)
+        """
+        self._get_db = get_db or get_chat_db
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_ms / 1000.0
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self.retry_backoff_s = retry_backoff_ms / 1000.0
+        self._cond = threading.Condition()
+        self._buffer = deque()  # (enqueued at, document)
+        self._in_flight = 0
+        self._flush_waiters = 0
+        self._closing = False
+        self._thread = None
+        self._flush_ms = deque(maxlen=512)
+        self._stats = {"enqueued": 0, "written": 0, "batches": 0, "retries": 0, "failed": 0, "dropped": 0}
+    
+    def enqueue(self, thread_id: str, role: str, content: str,
+                user_id: Optional[str] = None, metadata: Optional[Dict] = None) -> Optional[str]:
+        """
+        Queue one message for writing
+        
+        Returns:
+            The message ID, or None if the buffer is full or closed
+        """
+        doc = message_doc(thread_id, role, content, user_id, metadata)
+        doc["_id"] = ObjectId()
+        with self._cond:
+            if self._closing or len(self._buffer) + self._in_flight >= self.max_queue:
+                self._stats["dropped"] += 1
+                return None
+            self._buffer.append((time.monotonic(), doc))
+            self._stats["enqueued"] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="chat-write-behind", daemon=True)
+                self._thread.start()
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify_all()
+        return str(doc["_id"])
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Write everything queued so far now, waiting up to ``timeout`` seconds
+        
+        Returns:
+            True if the buffer was fully written (or given up on) in time
+        """
+        with self._cond:
+            self._flush_waiters += 1
+            self._cond.notify_all()
+            try:
+                return self._cond.wait_for(lambda: not self._buffer and not self._in_flight, timeout)
+            finally:
+                self._flush_waiters -= 1
+    
+    def close(self, timeout: float = MONGODB_WRITE_SHUTDOWN_TIMEOUT_S) -> bool:
+        """Stop accepting messages and write the rest, waiting up to ``timeout`` seconds"""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is None:
+            return True
+        thread.join(timeout)
+        return not thread.is_alive()
+    
+    def _next_batch(self) -> Optional[List[Dict]]:
+        """Wait for a full or due batch; None once closed and drained"""
+        with self._cond:
+            while not self._buffer:
+                if self._closing:
+                    return None
+                self._cond.wait()
+            deadline = self._buffer[0][0] + self.flush_interval_s
+            while len(self._buffer) < self.batch_size and not self._closing and not self._flush_waiters:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = [self._buffer.popleft()[1] for _ in range(min(self.batch_size, len(self._buffer)))]
+            self._in_flight = len(batch)
+            return batch
+    
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._write(batch)
+            with self._cond:
+                self._in_flight = 0
+                self._cond.notify_all()
+    
+    def _write(self, batch: List[Dict]):
+        """Insert one batch, retrying with exponential backoff"""
+        started = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            try:
+                written = self._get_db().insert_messages(batch)
+                with self._cond:
+                    self._stats["written"] += written
+                    self._stats["batches"] += 1
+                    self._flush_ms.append((time.perf_counter() - started) * 1000)
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    print(f"❌ Dropped {len(batch)} chat messages after {attempt + 1} attempts: {e}")
+                    with self._cond:
+                        self._stats["failed"] += len(batch)
+                    return
+                with self._cond:
+                    self._stats["retries"] += 1
+                time.sleep(min(self.retry_backoff_s * 2 ** attempt, 30.0))
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth, write counters and flush latency (ms) of recent batches"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats["queue_depth"] = len(self._buffer) + self._in_flight
+            recent = list(self._flush_ms)
+        flush_ms = sorted(recent)
+        stats["flush_ms"] = {
+            "last": round(recent[-1], 2) if recent else None,
+            "p50": round(flush_ms[len(flush_ms) // 2], 2) if flush_ms else None,
+            "p95": round(flush_ms[min(len(flush_ms) - 1, int(len(flush_ms) * 0.95))], 2) if flush_ms else None,
+            "max": round(flush_ms[-1], 2) if flush_ms else None,
+        }
+        return stats
+
+
 # Global instance for easy access
 chat_db = None
+_chat_db_lock = threading.Lock()
 
 def get_chat_db() -> ChatHistoryDB:
     """Get or create the global chat database instance"""
     global chat_db
     if chat_db is None:
-        # Try to get connection string from environment variable
-        connection_string = os.getenv("MONGODB_URI", "mongodb://localhost:27017/")
-        database_name = os.getenv("MONGODB_DATABASE", "guidance_assistant")
-        chat_db = ChatHistoryDB(connection_string, database_name)
+        # Concurrent API requests may ask for it at once; connect only one client
+        with _chat_db_lock:
+            if chat_db is None:
+                # Try to get connection string from environment variable
+                connection_string = os.getenv("MONGODB_URI", "mongodb://localhost:27017/")
+                database_name = os.getenv("MONGODB_DATABASE", "guidance_assistant")
+                chat_db = ChatHistoryDB(connection_string, database_name)
     return chat_db
 
+chat_writer = None
+_chat_writer_lock = threading.Lock()
+
+def get_chat_writer() -> ChatWriteBehind:
+    """Get or create the global write-behind buffer for chat messages"""
+    global chat_writer
+    if chat_writer is None:
+        with _chat_writer_lock:
+            if chat_writer is None:
+                chat_writer = ChatWriteBehind()
+    return chat_writer
+
+def close_chat_writer(timeout: float = MONGODB_WRITE_SHUTDOWN_TIMEOUT_S) -> bool:
+    """Write the buffered chat messages and stop the writer thread"""
+    global chat_writer
+    with _chat_writer_lock:
+        writer, chat_writer = chat_writer, None
+    return writer.close(timeout) if writer is not None else True
+
 def close_chat_db():
     """Close the global chat database connection"""
     global chat_db
+    # Buffered messages need the connection; write them first
+    close_chat_writer()
     if chat_db is not None:
         chat_db.close()
         chat_db = None 
\ No newline at end of file
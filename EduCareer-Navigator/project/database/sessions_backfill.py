@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Backfill the chat_sessions summaries from existing chat history
+Run from project/: python -m database.sessions_backfill [--user USER_ID] [--thread THREAD_ID]
+"""
+
+import argparse
+import time
+from typing import List, Optional
+
+from database.mongodb_client import get_chat_db, close_chat_db
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Rebuild the chat_sessions summaries from chat_history.")
+    parser.add_argument("--user", dest="user_id", help="Only rebuild this user's sessions")
+    parser.add_argument("--thread", action="append", dest="thread_ids",
+                        help="Only rebuild this thread (repeatable)")
+    args = parser.parse_args(argv)
+
+    query = {}
+    if args.user_id:
+        query["user_id"] = args.user_id
+    if args.thread_ids:
+        query["thread_id"] = {"$in": args.thread_ids}
+
+    db = get_chat_db()
+    started = time.perf_counter()
+    try:
+        written = db.rebuild_session_summaries(query or None)
+    finally:
+        close_chat_db()
+    print(f"✅ Rebuilt {written} session summaries in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Asyncio service layer for the supervisor, career and advisor graphs
+Runs many sessions on one event loop, with blocking work in sized thread
+pools and a deadline on every request
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+
+from langgraph.types import Command
+
+from runtime import config as runtime_config
+from runtime.checkpoints import NothingToResumeError, PooledSqliteSaver
+from runtime.executors import get_executor, get_pool_stats, run_in_pool
+from supervisor_router import BOTH, UNIVERSITY
+from career_agent.career_graph import get_career_graph
+from advisor_agent.graphsetup import get_advisor_graph
+from supervisor_agent import get_supervisor_agent, arun_guidance, astream_guidance, warmup
+
+
+class ServiceTimeoutError(TimeoutError):
+    """A request did not finish within its deadline and was cancelled."""
+
+
+class GuidanceService:
+    """
+    Async entry points for the guidance graphs.
+
+    ``ainvoke``/``astream`` run the compiled supervisor, career or advisor
+    graph natively on the event loop; ``aguidance``/``astream_guidance`` add
+    the supervisor's local routing and bounded context. Blocking pieces run in
+    the sized pools of ``runtime.executors``:
+
+    - synchronous graph nodes and tools: the loop's default executor, which
+      ``start`` replaces with the "graph" pool
+    - the sklearn career model: the "cpu" pool (async career node)
+    - SQLite checkpoint reads and writes: the "sqlite" pool
+    - MongoDB chat history: the "mongo" pool, via ``run_blocking``
+
+    Every request has a deadline (``timeout_s``, overridable per call). When it
+    passes, or the caller cancels, the run is cancelled on the loop and
+    ``ServiceTimeoutError`` is raised; blocking calls already running in a
+    pool finish in their thread and their results are dropped.
+    """
+
+    GRAPHS = ("supervisor", "career", "advisor")
+
+    def __init__(self, timeout_s: float = runtime_config.SERVICE_REQUEST_TIMEOUT_S):
+        self.timeout_s = timeout_s
+        # Built on first use, or up front by ``warmup``
+        self._graphs = {"supervisor": get_supervisor_agent, "career": get_career_graph, "advisor": get_advisor_graph}
+        self._loops = set()
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "completed": 0, "timeouts": 0, "cancelled": 0, "errors": 0,
+                       "in_flight": 0, "busy_s": 0.0}
+
+    # --- Setup ---
+
+    async def warmup(self):
+        """Build the graphs and load the career model in the pools, then ``start``."""
+        await run_in_pool("cpu", warmup)
+        self.start()
+
+    def start(self):
+        """Install the pools on the running loop and the checkpoint stores (done on first request)."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if loop in self._loops:
+                return
+            self._loops.add(loop)
+        loop.set_default_executor(get_executor("graph"))
+        sqlite_pool = get_executor("sqlite")
+        for get_graph in self._graphs.values():
+            graph = get_graph()
+            if isinstance(graph.checkpointer, PooledSqliteSaver):
+                graph.checkpointer.executor = sqlite_pool
+
+    def _graph(self, name: str):
+        if name not in self._graphs:
+            raise ValueError(f"Unknown graph {name!r}; expected one of {self.GRAPHS}")
+        return self._graphs[name]()
+
+    # --- Request accounting ---
+
+    async def _run(self, coro, timeout_s: Optional[float]):
+        """Await ``coro`` under the request deadline, counting the outcome."""
+        self.start()
+        timeout_s = self.timeout_s if timeout_s is None else timeout_s
+        started = time.perf_counter()
+        self._count("requests", in_flight=1)
+        try:
+            result = await asyncio.wait_for(coro, timeout_s)
+            self._count("completed")
+            return result
+        except asyncio.TimeoutError:
+            self._count("timeouts")
+            raise ServiceTimeoutError(f"Request exceeded {timeout_s:g}s and was cancelled") from None
+        except asyncio.CancelledError:
+            self._count("cancelled")
+            raise
+        except Exception:
+            self._count("errors")
+            raise
+        finally:
+            self._count(in_flight=-1, busy_s=time.perf_counter() - started)
+
+    async def _stream(self, stream: AsyncIterator, timeout_s: Optional[float]) -> AsyncIterator:
+        """Re-yield ``stream`` with one deadline for the whole stream."""
+        self.start()
+        timeout_s = self.timeout_s if timeout_s is None else timeout_s
+        started = time.perf_counter()
+        deadline = started + timeout_s
+        self._count("requests", in_flight=1)
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(stream.__anext__(), max(0.0, deadline - time.perf_counter()))
+                except StopAsyncIteration:
+                    break
+                yield item
+            self._count("completed")
+        except asyncio.TimeoutError:
+            self._count("timeouts")
+            raise ServiceTimeoutError(f"Stream exceeded {timeout_s:g}s and was cancelled") from None
+        except (asyncio.CancelledError, GeneratorExit):
+            self._count("cancelled")
+            raise
+        except Exception:
+            self._count("errors")
+            raise
+        finally:
+            await stream.aclose()
+            self._count(in_flight=-1, busy_s=time.perf_counter() - started)
+
+    def _count(self, outcome: Optional[str] = None, in_flight: int = 0, busy_s: float = 0.0):
+        with self._lock:
+            if outcome:
+                self._stats[outcome] += 1
+            self._stats["in_flight"] += in_flight
+            self._stats["busy_s"] += busy_s
+
+    # --- Graphs ---
+
+    async def ainvoke(self, graph: str, input: Any, config: Dict[str, Any],
+                      timeout_s: Optional[float] = None) -> Any:
+        """
+        Run one graph to completion (or to its next interrupt).
+
+        Args:
+            graph: "supervisor", "career" or "advisor".
+            input: The graph input (state dict, or a ``Command`` to resume).
+            config: The run configuration with the session's thread_id.
+            timeout_s: Deadline for this request (defaults to the service's).
+
+        Returns:
+            The graph output, with "__interrupt__" if it paused.
+        """
+        return await self._run(self._graph(graph).ainvoke(input, config=config), timeout_s)
+
+    async def astream(self, graph: str, input: Any, config: Dict[str, Any],
+                      stream_mode: Any = "updates", timeout_s: Optional[float] = None) -> AsyncIterator:
+        """Stream one graph's chunks in ``stream_mode`` under the request deadline."""
+        stream = self._graph(graph).astream(input, config=config, stream_mode=stream_mode)
+        async for chunk in self._stream(stream, timeout_s):
+            yield chunk
+
+    async def aresume(self, graph: str, config: Dict[str, Any], response: Any,
+                      timeout_s: Optional[float] = None) -> Any:
+        """Continue an interrupted run of ``graph`` from its checkpoint."""
+        snapshot = await self._graph(graph).aget_state(config)
+        if not snapshot.interrupts:
+            raise NothingToResumeError(f"No interrupted run for thread {config['configurable'].get('thread_id')}")
+        return await self.ainvoke(graph, Command(resume=response), config, timeout_s)
+
+    # --- Supervisor guidance ---
+
+    async def aguidance(self, messages: list, config: Dict[str, Any],
+                        timeout_s: Optional[float] = None) -> tuple:
+        """Async ``run_guidance``: returns (result, route)."""
+        return await self._run(arun_guidance(messages, config), timeout_s)
+
+    async def astream_guidance(self, messages: list, config: Dict[str, Any],
+                               timeout_s: Optional[float] = None) -> AsyncIterator:
+        """Async ``stream_guidance``: yields the same (kind, payload) events."""
+        async for event in self._stream(astream_guidance(messages, config), timeout_s):
+            yield event
+
+    async def aresume_guidance(self, route: str, config: Dict[str, Any], response: Any,
+                               timeout_s: Optional[float] = None) -> Any:
+        """Async ``resume_guidance``: continue a paused turn in the graph its ``route`` ran."""
+        if route == UNIVERSITY:
+            return await self.aresume("advisor", config, response, timeout_s)
+        if route == BOTH:
+            career = (await get_career_graph().aget_state(config)).values
+            return {**career, **await self.aresume("advisor", config, response, timeout_s)}
+        return await self.aresume("supervisor", config, response, timeout_s)
+
+    # --- Other blocking calls ---
+
+    async def run_blocking(self, pool: str, fn, *args, timeout_s: Optional[float] = None, **kwargs) -> Any:
+        """Run blocking ``fn`` (e.g. a MongoDB call) in the named pool under the request deadline."""
+        return await self._run(run_in_pool(pool, fn, *args, **kwargs), timeout_s)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get request outcomes and pool usage."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["busy_s"] = round(stats["busy_s"], 3)
+        stats["pools"] = get_pool_stats()
+        return stats
+
+
+# Global instance for easy access
+guidance_service = None
+_service_lock = threading.Lock()
+
+
+def get_guidance_service() -> GuidanceService:
+    """Get or create the global guidance service"""
+    global guidance_service
+    if guidance_service is None:
+        with _service_lock:
+            if guidance_service is None:
+                guidance_service = GuidanceService()
+    return guidance_service
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Single-pass profile extraction for supervisor input parsing
+Finds scores, marks, interests, cities and fee budget in one scan of the text
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Canonical city -> lowercase names and aliases it is known by
+CITY_ALIASES: Dict[str, List[str]] = {
+    "Lahore": ["lahore", "lhr"],
+    "Karachi": ["karachi", "khi"],
+    "Islamabad": ["islamabad", "isb", "islo"],
+    "Rawalpindi": ["rawalpindi", "pindi", "rwp"],
+    "Faisalabad": ["faisalabad", "fsd", "lyallpur"],
+    "Peshawar": ["peshawar", "psh"],
+    "Quetta": ["quetta"],
+    "Multan": ["multan"],
+    "Sialkot": ["sialkot", "skt"],
+}
+
+# Career profile flag -> keywords; a trailing "*" matches any word starting with the keyword
+INTEREST_KEYWORDS: Dict[str, List[str]] = {
+    "interest_tech": ["tech*"],
+    "interest_art": ["art*"],
+    "group_work": ["group work", "teamwork", "team work"],
+    "logical_thinking": ["logical thinking", "problem-solving", "problem solving"],
+    "likes_speaking": ["speaking", "presentation*"],
+}
+
+# Keywords followed by the number they introduce
+SCORE_KEYWORDS: Dict[str, List[str]] = {
+    "math_score": ["math score", "maths score", "mathematics score"],
+    "bio_score": ["biology score", "bio score"],
+}
+MARKS_KEYWORDS: Dict[str, List[str]] = {
+    "matric_marks": ["matric", "matriculation", "ssc"],
+    "inter_marks": ["inter", "intermediate", "fsc", "hssc"],
+}
+FEE_KEYWORDS = ["fee", "fees", "budget", "afford", "cost"]
+CURRENCY_PREFIXES = ["rs", "pkr"]
+AMOUNT_SUFFIXES = ["k", "lac", "lakh", "pkr"]
+
+# Free-text fields are still regexes, compiled once
+DEGREE_RE = re.compile(
+    r"(?:study|degree in|major in|interested in)\s+([A-Za-z\s]+?)(?=\s+(?:in|at|with)\b|,|\.|$)",
+    re.IGNORECASE,
+)
+LOCATION_RE = re.compile(r"(?:location|campus is in|located in)\s+([A-Za-z\s]+?)(?:,|\.|$)", re.IGNORECASE)
+
+# How far (in characters) a score keyword may be from its number
+_SCORE_WINDOW = 20
+
+
+# A scanned token: (start, end, kind, value). kind is "number" or a keyword
+# category; value is the number text or the keyword's canonical value.
+Token = Tuple[int, int, str, str]
+
+
+def trie_pattern(keywords: Dict[str, str]) -> str:
+    """
+    Regex source matching any of ``keywords``, factored as a character trie.
+
+    Shared prefixes are matched once ("i(?:nter(?:mediate)?|sb)"), so the
+    regex engine walks the keywords like an Aho-Corasick goto table instead of
+    trying every alternative at every position. Each keyword maps to the regex
+    source appended after it (e.g. a boundary check).
+    """
+    trie: dict = {}
+    for keyword, suffix in keywords.items():
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[None] = suffix
+
+    def emit(node: dict) -> str:
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items(), key=lambda kv: kv[0] or "")
+                    if char is not None]
+        if None in node:
+            # Longer keywords first, so "intermediate" wins over "inter"
+            branches.append(node[None])
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    return emit(trie)
+
+
+class KeywordScanner:
+    """
+    Keyword gazetteer compiled into a single trie-shaped regular expression.
+
+    One ``finditer`` pass over the lowercased text yields every keyword hit
+    and every number such as "1,050" or "2.5"; adding keywords or aliases does
+    not add passes over the text. Every alternative starts with a literal
+    character, so the regex engine skips positions that cannot start a token.
+    Keywords only match whole words; a trailing "*" lets one match any word
+    that starts with it.
+    """
+
+    _NUMBER_REST = r"\d*(?:,\d+)*(?:\.\d+)?"
+
+    def __init__(self):
+        self._entries: Dict[str, List[Tuple[str, str]]] = {}
+        self._prefixes: Dict[str, List[Tuple[str, str]]] = {}
+        self._pattern: Optional[re.Pattern] = None
+        self._matches: Dict[str, List[Tuple[str, str]]] = {}  # matched word -> entries
+
+    def add(self, keyword: str, kind: str, value: str):
+        """Register ``keyword`` as a token of ``kind`` with canonical ``value``."""
+        table = self._prefixes if keyword.endswith("*") else self._entries
+        table.setdefault(keyword.rstrip("*").lower(), []).append((kind, value))
+        self._pattern = None
+        self._matches = {}
+
+    def add_all(self, table: Dict[str, Iterable[str]], kind: str):
+        for value, keywords in table.items():
+            for keyword in keywords:
+                self.add(keyword, kind, value)
+
+    def build(self):
+        """Compile the keywords into one pattern (done lazily on first scan)."""
+        keywords = {digit: self._NUMBER_REST for digit in "0123456789"}
+        keywords.update({keyword: "(?![a-z])" for keyword in self._entries})
+        keywords.update({keyword: "[a-z]*" for keyword in self._prefixes})
+        self._pattern = re.compile(trie_pattern(keywords))
+
+    def _lookup(self, word: str) -> List[Tuple[str, str]]:
+        entries = self._matches.get(word)
+        if entries is None:
+            entries = self._entries.get(word)
+            if entries is None:
+                entries = next((e for prefix, e in self._prefixes.items() if word.startswith(prefix)), [])
+            self._matches[word] = entries
+        return entries
+
+    def scan(self, text: str) -> List[Token]:
+        """Keyword and number tokens of ``text``, in text order."""
+        if self._pattern is None:
+            self.build()
+        lowered = text.lower()
+        lookup = self._lookup
+        tokens = []
+        for match in self._pattern.finditer(lowered):
+            start, end = match.span()
+            word = match.group()
+            if word[0] <= "9":
+                tokens.append((start, end, "number", word))
+            elif start == 0 or not lowered[start - 1].isalpha():
+                for kind, value in lookup(word):
+                    tokens.append((start, end, kind, value))
+        return tokens
+
+
+def _digits(number: str) -> str:
+    return number.split(".")[0].replace(",", "")
+
+
+class ProfileExtractor:
+    """
+    Extracts career and student profiles from a free-text message.
+
+    One scanner holds every keyword (cities with their aliases, interests,
+    score and marks labels, fee words and currency units). A single scan
+    produces ordered tokens, and numbers are attached to the keyword next to
+    them. Extend the alias tables (or pass your own) to teach it new
+    spellings.
+    """
+
+    def __init__(self, city_aliases: Dict[str, List[str]] = CITY_ALIASES,
+                 interest_keywords: Dict[str, List[str]] = INTEREST_KEYWORDS):
+        self.scanner = KeywordScanner()
+        self.scanner.add_all(city_aliases, "city")
+        self.scanner.add_all(interest_keywords, "interest")
+        self.scanner.add_all(SCORE_KEYWORDS, "score")
+        self.scanner.add_all(MARKS_KEYWORDS, "marks")
+        self.scanner.add_all({"fee": FEE_KEYWORDS}, "fee")
+        self.scanner.add_all({"currency": CURRENCY_PREFIXES}, "currency")
+        self.scanner.add_all({"unit": AMOUNT_SUFFIXES}, "unit")
+
+    def add_alias(self, city: str, alias: str):
+        """Teach the extractor another name for ``city``."""
+        self.scanner.add(alias, "city", city)
+
+    def scan(self, text: str) -> Dict[str, object]:
+        """
+        Scan ``text`` once and return every field found.
+
+        Returns:
+            A dict with any of math_score, bio_score, matric_marks, inter_marks
+            (ints), city (canonical name), fee_budget (the matched text) and the
+            interest flags set to True.
+        """
+        found: Dict[str, object] = {}
+        pending: Dict[str, Tuple[str, int]] = {}  # field -> (kind, keyword end)
+        fee: Optional[Tuple[int, str]] = None     # (priority, text); lower priority wins
+        currency: Optional[Token] = None
+        last_number: Optional[Token] = None
+        number_used = False  # whether last_number already filled a field
+
+        for token in self.scanner.scan(text):
+            start, end, kind, value = token
+            if kind == "number":
+                number_used = False
+                if pending:
+                    digits = _digits(value)
+                    for field, (pending_kind, keyword_end) in list(pending.items()):
+                        if pending_kind == "marks" and 3 <= len(digits) <= 4:
+                            found[field] = int(digits)
+                            number_used = True
+                            del pending[field]
+                        elif pending_kind == "score" and len(digits) <= 3 and start - keyword_end <= _SCORE_WINDOW:
+                            found[field] = int(digits)
+                            number_used = True
+                            del pending[field]
+                        elif pending_kind == "fee":
+                            if fee is None:
+                                fee = (2, value)
+                            del pending[field]
+                if currency is not None:
+                    if not text[currency[1]:start].strip(" .") and (fee is None or fee[0] > 0):
+                        # "Rs. 150,000" / "PKR 200000"
+                        fee = (0, text[currency[0]:end])
+                    currency = None
+                last_number = token
+            elif kind == "interest":
+                found[value] = True
+            elif kind == "city":
+                found.setdefault("city", value)
+            elif kind == "score" or kind == "marks":
+                if value in found:
+                    continue
+                if kind == "marks" and last_number is not None and not number_used \
+                        and not text[last_number[1]:start].strip() \
+                        and 3 <= len(_digits(last_number[3])) <= 4:
+                    # "900 inter marks"
+                    found[value] = int(_digits(last_number[3]))
+                    number_used = True
+                else:
+                    pending[value] = (kind, end)
+            elif kind == "fee":
+                pending.setdefault("fee_budget", ("fee", end))
+            elif kind == "currency":
+                currency = token
+            elif kind == "unit":
+                if last_number is not None and not text[last_number[1]:start].strip() \
+                        and (fee is None or fee[0] > 1):
+                    # "150k" / "2.5 lac" / "250,000 PKR"
+                    fee = (1, text[last_number[0]:end])
+
+        if fee is not None:
+            found["fee_budget"] = fee[1].strip()
+        return found
+
+    def career_profile(self, text: str) -> dict:
+        """Career graph input for ``text`` (defaults for anything not mentioned)."""
+        found = self.scan(text)
+        return {
+            "math_score": found.get("math_score", 75),
+            "bio_score": found.get("bio_score", 75),
+            "interest_tech": found.get("interest_tech", False),
+            "interest_art": found.get("interest_art", False),
+            "group_work": found.get("group_work", False),
+            "logical_thinking": found.get("logical_thinking", False),
+            "likes_speaking": found.get("likes_speaking", False),
+            "career_predictions": [],
+            "career_recommendations": [],
+            "final_recommendation": None,
+            "confidence_threshold": 0.7,
+            "user_approval": None,
+            "current_step": "",
+            "processing_complete": False
+        }
+
+    def student_profile(self, text: str) -> dict:
+        """Advisor graph input for ``text`` (defaults for anything not mentioned)."""
+        found = self.scan(text)
+        profile = {
+            "matric_marks": found.get("matric_marks", 0),
+            "inter_marks": found.get("inter_marks", 0),
+            "degree_preference": "",
+            "city": found.get("city", ""),
+            "location": "",
+            "fee_budget": found.get("fee_budget", ""),
+            "universities": [],
+            "ranked_universities": [],
+            "rank_unis": "no"
+        }
+
+        degree_match = DEGREE_RE.search(text)
+        if degree_match:
+            profile["degree_preference"] = degree_match.group(1).strip().replace("a degree in", "").strip()
+
+        location_match = LOCATION_RE.search(text)
+        if location_match:
+            profile["location"] = location_match.group(1).strip()
+        elif profile["city"]:
+            profile["location"] = profile["city"]
+        return profile
+
+
+# Shared instance; the scanner is read-only once built
+profile_extractor = ProfileExtractor()
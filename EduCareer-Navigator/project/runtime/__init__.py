@@ -0,0 +1,18 @@
+"""
+Shared runtime utilities for the Guidance Assistant
+"""
+
+from .clients import ClientFactory, get_client_factory, close_client_factory
+from .coalesce import SingleFlight
+from .checkpoints import PooledSqliteSaver, NothingToResumeError, get_checkpointer, close_checkpointers
+from .offline import BackendUnavailableError, CassetteMissError
+from .executors import get_executor, run_in_pool, close_executors
+from .llm_cache import ResponseCache, get_response_cache, close_response_cache
+from .telemetry import SpanRecorder, get_span_recorder, setup_telemetry, span, close_span_recorder
+
+__all__ = ['ClientFactory', 'get_client_factory', 'close_client_factory', 'SingleFlight',
+           'PooledSqliteSaver', 'NothingToResumeError', 'get_checkpointer', 'close_checkpointers',
+           'BackendUnavailableError', 'CassetteMissError',
+           'get_executor', 'run_in_pool', 'close_executors',
+           'ResponseCache', 'get_response_cache', 'close_response_cache',
+           'SpanRecorder', 'get_span_recorder', 'setup_telemetry', 'span', 'close_span_recorder']
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Concurrent-safe SQLite checkpoint store shared by the supervisor and both agents
+"""
+
+import asyncio
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from runtime import config
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class NothingToResumeError(ValueError):
+    """The thread has no interrupted run to resume."""
+
+# Application types stored in checkpoints, on top of LangGraph's built-in safe types.
+# Anything else is refused when a checkpoint is read.
+CHECKPOINT_MSGPACK_ALLOWLIST = [
+    ("advisor_agent.universitiesstates", "UniversityTable"),
+]
+
+
+def checkpoint_serializer() -> JsonPlusSerializer:
+    """Checkpoint serializer that deserializes only safe and allow-listed types"""
+    return JsonPlusSerializer(allowed_msgpack_modules=CHECKPOINT_MSGPACK_ALLOWLIST)
+
+
+class _RecordingCursor:
+    """Collects the statements of one write so they can be committed in a batch."""
+
+    def __init__(self):
+        self.ops: List[Tuple[str, str, Any]] = []
+
+    def execute(self, sql: str, params: Sequence[Any] = ()):
+        self.ops.append(("execute", sql, tuple(params)))
+
+    def executemany(self, sql: str, seq_of_params: Sequence[Sequence[Any]]):
+        self.ops.append(("executemany", sql, [tuple(p) for p in seq_of_params]))
+
+
+class _GroupCommitWriter:
+    """Single writer thread that commits queued writes together.
+
+    Callers block until the transaction containing their write has been
+    committed, so every write is durable and visible to other connections
+    when ``submit`` returns; under load many writes share one commit.
+    A write that cannot be committed raises in its caller, and a caller
+    never waits longer than ``write_timeout_s``.
+    """
+
+    def __init__(self, connect, batch_size: int, commit_delay_s: float,
+                 write_timeout_s: float = config.CHECKPOINT_WRITE_TIMEOUT_S):
+        self._connect = connect
+        self.batch_size = batch_size
+        self.commit_delay_s = commit_delay_s
+        self.write_timeout_s = write_timeout_s
+        self._queue: "queue.Queue" = queue.Queue()
+        self.stats = {"writes": 0, "commits": 0, "errors": 0}
+        self._thread = threading.Thread(target=self._run, name="checkpoint-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, ops: List[Tuple[str, str, Any]]):
+        if not ops:
+            return
+        if not self._thread.is_alive():
+            raise sqlite3.OperationalError("checkpoint writer is not running")
+        future: Future = Future()
+        self._queue.put((ops, future))
+        try:
+            future.result(timeout=self.write_timeout_s)
+        except FutureTimeoutError:
+            raise TimeoutError(
+                f"checkpoint write not committed within {self.write_timeout_s:g}s"
+            ) from None
+
+    def _next_batch(self) -> Tuple[list, bool]:
+        first = self._queue.get()
+        if first is _STOP:
+            return [], True
+        batch, stop = [first], False
+        deadline = time.monotonic() + self.commit_delay_s
+        while len(batch) < self.batch_size:
+            try:
+                remaining = deadline - time.monotonic()
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stop = True
+                break
+            batch.append(item)
+        return batch, stop
+
+    def _open(self) -> sqlite3.Connection:
+        conn = self._connect()
+        # Transactions are managed explicitly so savepoints nest inside them
+        conn.isolation_level = None
+        return conn
+
+    def _run(self):
+        try:
+            conn = self._open()
+        except Exception as e:
+            logger.warning("Checkpoint writer cannot open the database: %s", e)
+            conn = None
+        try:
+            while True:
+                batch, stop = self._next_batch()
+                if batch:
+                    try:
+                        if conn is None:
+                            conn = self._open()
+                        committed = self._commit(conn, batch)
+                    except Exception as e:
+                        # Could not connect: fail this batch and retry on the next one
+                        logger.warning("Checkpoint writer cannot open the database: %s", e)
+                        self._fail(batch, e)
+                        committed = False
+                    if not committed and conn is not None:
+                        # Start the next batch on a fresh connection
+                        self._close_quietly(conn)
+                        conn = None
+                if stop:
+                    return
+        except Exception as e:
+            logger.exception("Checkpoint writer stopped")
+            self._drain(e)
+        finally:
+            if conn is not None:
+                self._close_quietly(conn)
+
+    def _commit(self, conn: sqlite3.Connection, batch: list) -> bool:
+        done = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for ops, future in batch:
+                # A savepoint per write keeps one bad write from failing the whole batch
+                conn.execute("SAVEPOINT write")
+                try:
+                    for kind, sql, params in ops:
+                        getattr(conn, kind)(sql, params)
+                    conn.execute("RELEASE write")
+                    done.append(future)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write")
+                    conn.execute("RELEASE write")
+                    self.stats["errors"] += 1
+                    future.set_exception(e)
+            conn.execute("COMMIT")
+        except Exception as e:
+            try:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+            except Exception:
+                pass
+            logger.warning("Checkpoint commit of %d writes failed: %s", len(batch), e)
+            self._fail(batch, e)
+            return False
+        self.stats["writes"] += len(done)
+        self.stats["commits"] += 1
+        for future in done:
+            future.set_result(None)
+        return True
+
+    def _fail(self, batch: list, error: BaseException):
+        """Fail every write in ``batch`` that has not been resolved yet."""
+        for _, future in batch:
+            if not future.done():
+                self.stats["errors"] += 1
+                future.set_exception(error)
+
+    def _drain(self, error: BaseException):
+        """Fail every queued write (the writer thread is exiting)."""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not _STOP:
+                self._fail([item], error)
+
+    @staticmethod
+    def _close_quietly(conn: sqlite3.Connection):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout=10)
+
+
+class PooledSqliteSaver(SqliteSaver):
+    """``SqliteSaver`` with WAL journaling, per-thread connections and group commit.
+
+    Reads use a connection owned by the calling thread, so sessions no longer
+    queue behind one shared connection and lock. Writes go through a single
+    writer thread that commits them in batches. The async methods run the
+    same code on a thread pool, so the saver also works with ``ainvoke``/``astream``.
+    """
+
+    def __init__(self, path: str,
+                 batch_size: int = config.CHECKPOINT_BATCH_SIZE,
+                 commit_delay_ms: float = config.CHECKPOINT_COMMIT_DELAY_MS,
+                 busy_timeout_ms: int = config.CHECKPOINT_BUSY_TIMEOUT_MS,
+                 synchronous: str = config.CHECKPOINT_SYNCHRONOUS,
+                 write_timeout_s: float = config.CHECKPOINT_WRITE_TIMEOUT_S,
+                 serde: Optional[JsonPlusSerializer] = None):
+        """
+        Initialize the checkpoint store
+
+        Args:
+            path: SQLite database file
+            batch_size: Maximum writes committed in one transaction
+            commit_delay_ms: How long the writer waits for more writes before committing
+            busy_timeout_ms: How long a connection waits on a locked database
+            synchronous: SQLite ``synchronous`` level (NORMAL is safe with WAL)
+            write_timeout_s: Longest a write waits for its commit before raising
+            serde: Checkpoint serializer (defaults to ``checkpoint_serializer()``)
+        """
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.synchronous = synchronous
+        self.executor = None  # default loop executor unless a service layer sets one
+        self._local = threading.local()
+        self._connections: Dict[threading.Thread, sqlite3.Connection] = {}
+        self._connections_lock = threading.Lock()
+        super().__init__(self._connect(), serde=serde or checkpoint_serializer())
+        self._writer = _GroupCommitWriter(self._connect, batch_size, commit_delay_ms / 1000.0,
+                                          write_timeout_s)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False,
+                               timeout=self.busy_timeout_ms / 1000.0)
+        # Only takes effect on a new database; lets retention release pages incrementally
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        with self._connections_lock:
+            # Reap connections left behind by threads that have exited
+            for thread in [t for t in self._connections if not t.is_alive()]:
+                self._connections.pop(thread).close()
+            self._connections[threading.current_thread()] = conn
+        return conn
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """The calling thread's connection (opened on first use)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    @conn.setter
+    def conn(self, value: sqlite3.Connection):
+        self._local.conn = value
+
+    def _ensure_setup(self):
+        if not self.is_setup:
+            with self.lock:
+                self.setup()
+
+    @contextmanager
+    def cursor(self, transaction: bool = True) -> Iterator[Any]:
+        """Read cursor on the thread's connection, or a write recorder committed by the writer."""
+        self._ensure_setup()
+        if not transaction:
+            cur = self.conn.cursor()
+            try:
+                yield cur
+            finally:
+                cur.close()
+            return
+        recorder = _RecordingCursor()
+        yield recorder
+        self._writer.submit(recorder.ops)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get writer statistics (writes, commits, errors and open connections)."""
+        stats = dict(self._writer.stats)
+        with self._connections_lock:
+            stats["connections"] = len(self._connections)
+        return stats
+
+    def close(self):
+        """Flush pending writes and close every connection."""
+        self._writer.close()
+        with self._connections_lock:
+            connections = list(self._connections.values())
+            self._connections = {}
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    # --- Async variant ---
+
+    async def _run_sync(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, lambda: fn(*args, **kwargs))
+
+    async def aget_tuple(self, config):
+        return await self._run_sync(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        items = await self._run_sync(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await self._run_sync(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        return await self._run_sync(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id):
+        return await self._run_sync(self.delete_thread, thread_id)
+
+    async def aget_delta_channel_history(self, *, config, channels):
+        return await self._run_sync(self.get_delta_channel_history, config=config, channels=channels)
+
+
+# One store per database file for the whole process
+_checkpointers: Dict[str, PooledSqliteSaver] = {}
+_checkpointers_lock = threading.Lock()
+
+
+def get_checkpointer(path: str) -> PooledSqliteSaver:
+    """Get or create the process-wide checkpoint store for ``path``"""
+    key = os.path.abspath(path)
+    with _checkpointers_lock:
+        saver = _checkpointers.get(key)
+        if saver is None:
+            saver = _checkpointers[key] = PooledSqliteSaver(path)
+        return saver
+
+
+def close_checkpointers():
+    """Flush and close every checkpoint store"""
+    with _checkpointers_lock:
+        savers = list(_checkpointers.values())
+        _checkpointers.clear()
+    for saver in savers:
+        saver.close()
+
+
+atexit.register(close_checkpointers)
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Shared, long-lived clients for the LLM and search backends
+"""
+
+import asyncio
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import httpx
+from langchain_core.caches import BaseCache
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import RunnableLambda
+
+from runtime import config, offline
+
+BACKEND_MODES = ("live", "fake", "record", "replay")
+
+
+class ClientFactory:
+    """Builds and caches LLM clients, chains and search wrappers.
+
+    All ``ChatOpenAI`` instances share one keep-alive HTTP connection pool, so
+    repeated advisor requests reuse open TLS connections instead of paying a
+    handshake per call. Clients and chains are cached per model configuration.
+
+    ``mode`` selects the backends: ``live`` uses the real APIs, ``fake`` the
+    deterministic offline stand-ins, ``record`` calls the real APIs and
+    captures every interaction to a cassette, and ``replay`` serves them
+    back from the cassette without network access.
+    """
+
+    def __init__(self,
+                 mode: str = config.BACKEND_MODE,
+                 cassette_path: str = config.CASSETTE_PATH,
+                 max_connections: int = config.HTTP_POOL_MAX_CONNECTIONS,
+                 max_keepalive: int = config.HTTP_POOL_MAX_KEEPALIVE,
+                 keepalive_expiry: float = config.HTTP_KEEPALIVE_EXPIRY_S,
+                 llm_concurrency: int = config.LLM_MAX_CONCURRENCY,
+                 search_concurrency: int = config.SEARCH_MAX_CONCURRENCY):
+        """
+        Initialize the factory
+
+        Args:
+            mode: Backend mode ('live', 'fake', 'record' or 'replay')
+            cassette_path: JSONL cassette used by the record and replay modes
+            max_connections: Maximum open connections in the shared HTTP pool
+            max_keepalive: Maximum idle connections kept alive in the pool
+            keepalive_expiry: Seconds an idle connection is kept open
+            llm_concurrency: Maximum concurrent calls to the LLM backend
+            search_concurrency: Maximum concurrent calls to the search backend
+        """
+        if mode not in BACKEND_MODES:
+            raise ValueError(f"Unknown backend mode {mode!r}; expected one of {BACKEND_MODES}")
+        self.mode = mode
+        self.cassette = offline.Cassette(cassette_path) if mode in ("record", "replay") else None
+
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        timeout = httpx.Timeout(config.LLM_REQUEST_TIMEOUT_S)
+        self.http_client = httpx.Client(limits=limits, timeout=timeout)
+        self.http_async_client = httpx.AsyncClient(limits=limits, timeout=timeout)
+
+        self._lock = threading.Lock()
+        self._llms: Dict[Tuple, BaseChatModel] = {}
+        self._chains: Dict[Tuple, Any] = {}
+        # googleapiclient's httplib2 transport is not thread-safe, so search
+        # wrappers are kept per thread and reused for that thread's lifetime.
+        self._search_local = threading.local()
+        self._limits = {
+            "llm": threading.BoundedSemaphore(llm_concurrency),
+            "search": threading.BoundedSemaphore(search_concurrency),
+        }
+
+    def get_llm(self, model: Optional[str] = None, temperature: Optional[float] = None,
+                cache: Optional[BaseCache] = None, **kwargs) -> BaseChatModel:
+        """
+        Get a cached ChatOpenAI client bound to the shared connection pool
+
+        In ``fake`` and ``replay`` modes an offline stand-in with the same
+        interface is returned instead; in ``record`` mode the live client is
+        wrapped by a recorder.
+
+        Args:
+            model: Model name (defaults to LLM_DEFAULT_MODEL or the library default)
+            temperature: Sampling temperature
+            cache: Response cache consulted before each call (a separate client
+                from the uncached one with the same configuration)
+            **kwargs: Extra ChatOpenAI keyword arguments
+
+        Returns:
+            A chat model shared by all callers with the same configuration
+        """
+        model = model or config.LLM_DEFAULT_MODEL or None
+        key = (model, temperature, cache, tuple(sorted(kwargs.items())))
+        with self._lock:
+            llm = self._llms.get(key)
+            if llm is None and self.mode == "fake":
+                llm = self._llms[key] = offline.FakeChatModel(cache=cache)
+            elif llm is None and self.mode == "replay":
+                llm = self._llms[key] = offline.CassetteChatModel(cassette=self.cassette, cache=cache)
+            if llm is None:
+                params = dict(kwargs)
+                if model is not None:
+                    params["model"] = model
+                if temperature is not None:
+                    params["temperature"] = temperature
+                params.setdefault("max_retries", config.LLM_MAX_RETRIES)
+                # Imported on first live use; the offline modes never load the SDK
+                from langchain_openai import ChatOpenAI
+                llm = ChatOpenAI(
+                    http_client=self.http_client,
+                    http_async_client=self.http_async_client,
+                    # In record mode the recorder consults the cache, so hits are not recorded as calls
+                    cache=cache if self.mode == "live" else None,
+                    **params,
+                )
+                if self.mode == "record":
+                    llm = offline.CassetteChatModel(cassette=self.cassette, inner=llm, cache=cache)
+                self._llms[key] = llm
+            return llm
+
+    def get_chain(self, name: str, builder: Callable[[], Any]) -> Any:
+        """
+        Get a prebuilt chain, building it once on first use
+
+        Args:
+            name: Unique chain name, including anything that affects its configuration
+            builder: Zero-argument callable that constructs the chain
+
+        Returns:
+            The cached chain
+        """
+        with self._lock:
+            chain = self._chains.get(name)
+        if chain is None:
+            chain = builder()
+            with self._lock:
+                chain = self._chains.setdefault(name, chain)
+        return chain
+
+    def get_structured_chain(self, name: str, prompt: PromptTemplate, schema: Any,
+                             model: Optional[str] = None,
+                             temperature: Optional[float] = None) -> Any:
+        """
+        Get a cached ``prompt | llm.with_structured_output(schema)`` chain
+
+        Args:
+            name: Stable name of the prompt (one per call site); with the
+                schema, model and temperature it identifies the cached chain
+            prompt: Prompt template feeding the model
+            schema: Pydantic model describing the structured output
+            model: Model name
+            temperature: Sampling temperature
+
+        Returns:
+            The cached runnable chain
+        """
+        name = f"structured:{name}:{schema.__name__}:{model}:{temperature}"
+
+        def build():
+            if self.mode == "fake":
+                return RunnableLambda(offline.FakeStructuredExtractor(schema))
+            if self.mode == "replay":
+                return offline.cassette_structured_chain(self.cassette, schema)
+            chain = prompt | self._live_llm(model, temperature).with_structured_output(schema)
+            if self.mode == "record":
+                chain = offline.cassette_structured_chain(self.cassette, schema, inner=chain)
+            return chain
+
+        return self.get_chain(name, build)
+
+    def _live_llm(self, model: Optional[str], temperature: Optional[float]) -> BaseChatModel:
+        """Get the real ChatOpenAI client, unwrapping the recorder in record mode."""
+        llm = self.get_llm(model, temperature)
+        return getattr(llm, "inner", None) or llm
+
+    def get_search(self) -> Any:
+        """Get the calling thread's long-lived search client (Google or a stand-in)."""
+        search = getattr(self._search_local, "search", None)
+        if search is None:
+            if self.mode == "fake":
+                search = offline.FakeSearch()
+            elif self.mode == "replay":
+                search = offline.CassetteSearch(self.cassette)
+            else:
+                from langchain_google_community.search import GoogleSearchAPIWrapper
+                search = GoogleSearchAPIWrapper()
+                if self.mode == "record":
+                    search = offline.CassetteSearch(self.cassette, inner=search)
+            self._search_local.search = search
+        return search
+
+    @contextmanager
+    def limit(self, backend: str):
+        """
+        Hold one of the backend's concurrency slots for the duration of a call
+
+        Args:
+            backend: Backend name ('llm' or 'search')
+        """
+        semaphore = self._limits[backend]
+        semaphore.acquire()
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+    def close(self):
+        """Close the shared HTTP connection pools (use ``aclose`` from inside an event loop)."""
+        self.http_client.close()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is not None:
+            # A loop is running in this thread; let it close the async pool
+            loop.create_task(self.http_async_client.aclose())
+        else:
+            try:
+                asyncio.run(self.http_async_client.aclose())
+            except Exception:
+                # Connections opened on an event loop that is already closed
+                pass
+        self._clear()
+
+    async def aclose(self):
+        """Close the shared HTTP connection pools from an event loop."""
+        self.http_client.close()
+        await self.http_async_client.aclose()
+        self._clear()
+
+    def _clear(self):
+        with self._lock:
+            self._llms.clear()
+            self._chains.clear()
+
+
+# Global instance for easy access
+client_factory = None
+_factory_lock = threading.Lock()
+
+
+def get_client_factory() -> ClientFactory:
+    """Get or create the global client factory"""
+    global client_factory
+    if client_factory is None:
+        with _factory_lock:
+            if client_factory is None:
+                client_factory = ClientFactory()
+    return client_factory
+
+
+def close_client_factory():
+    """Close the global client factory"""
+    global client_factory
+    if client_factory is not None:
+        client_factory.close()
+        client_factory = None
+
+
+async def aclose_client_factory():
+    """Close the global client factory from an event loop (the API lifespan)"""
+    global client_factory
+    if client_factory is not None:
+        factory, client_factory = client_factory, None
+        await factory.aclose()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Single-flight coalescing of identical concurrent requests
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time and shares its outcome.
+
+    The first caller for a key executes the work; callers arriving with the
+    same key while it is in flight wait on the same future instead of
+    repeating it. Threads and asyncio tasks share one in-flight table, so a
+    thread can wait on work started by a task and vice versa. Exceptions are
+    propagated to every waiter.
+    """
+
+    def __init__(self, name: str = "singleflight"):
+        """
+        Initialize the coalescing group
+
+        Args:
+            name: Name used when reporting statistics
+        """
+        self.name = name
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._stats = {"calls": 0, "executed": 0, "coalesced": 0, "errors": 0}
+
+    def _claim(self, key: Hashable) -> Tuple[Future, bool]:
+        """Return the in-flight future for ``key`` and whether the caller leads."""
+        with self._lock:
+            self._stats["calls"] += 1
+            future = self._inflight.get(key)
+            if future is not None:
+                self._stats["coalesced"] += 1
+                return future, False
+            future = Future()
+            self._inflight[key] = future
+            self._stats["executed"] += 1
+            return future, True
+
+    def _settle(self, key: Hashable, future: Future, result: Any = None,
+                error: BaseException = None):
+        with self._lock:
+            self._inflight.pop(key, None)
+            if error is not None:
+                self._stats["errors"] += 1
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    @staticmethod
+    def _waiter(future: Future) -> "asyncio.Future":
+        """An asyncio future for this task that mirrors the shared ``future``.
+
+        Cancelling the returned future cancels only the waiting task, never
+        the shared future the leader and the other waiters depend on.
+        """
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+
+        def copy(done: Future):
+            if waiter.done():
+                return
+            error = done.exception()
+            if error is not None:
+                waiter.set_exception(error)
+            else:
+                waiter.set_result(done.result())
+
+        def relay(done: Future):
+            try:
+                loop.call_soon_threadsafe(copy, done)
+            except RuntimeError:
+                pass  # the waiting loop has closed
+
+        future.add_done_callback(relay)
+        return waiter
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Run ``fn`` once for all concurrent callers with the same key
+
+        Args:
+            key: Normalized request key
+            fn: Zero-argument callable doing the work
+
+        Returns:
+            The shared result of ``fn``
+        """
+        future, leader = self._claim(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            self._settle(key, future, error=e)
+            raise
+        self._settle(key, future, result)
+        return result
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Async variant of :meth:`do` for coroutine functions
+
+        Args:
+            key: Normalized request key
+            fn: Zero-argument coroutine function doing the work
+
+        Returns:
+            The shared result of ``fn``
+        """
+        future, leader = self._claim(key)
+        if not leader:
+            return await self._waiter(future)
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._settle(key, future, error=e)
+            raise
+        self._settle(key, future, result)
+        return result
+
+    def in_flight(self) -> int:
+        """Number of keys currently being executed."""
+        with self._lock:
+            return len(self._inflight)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get call statistics; ``coalesced`` is the number of calls saved."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["name"] = self.name
+        return stats
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Runtime configuration settings for the shared LLM and search clients
+"""
+
+import os
+
+# Default model configuration
+LLM_DEFAULT_MODEL = os.getenv("LLM_DEFAULT_MODEL", "")
+LLM_REQUEST_TIMEOUT_S = float(os.getenv("LLM_REQUEST_TIMEOUT_S", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+
+# HTTP connection pool settings (shared by every ChatOpenAI instance)
+HTTP_POOL_MAX_CONNECTIONS = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "20"))
+HTTP_POOL_MAX_KEEPALIVE = int(os.getenv("HTTP_POOL_MAX_KEEPALIVE", "10"))
+HTTP_KEEPALIVE_EXPIRY_S = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_S", "120"))
+
+# Per-backend concurrency limits
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+SEARCH_MAX_CONCURRENCY = int(os.getenv("SEARCH_MAX_CONCURRENCY", "4"))
+
+# Backend mode: "live" (real APIs), "fake" (offline stand-ins),
+# "record" (live calls captured to a cassette) or "replay" (cassette only)
+BACKEND_MODE = os.getenv("BACKEND_MODE", "live").lower()
+CASSETTE_PATH = os.getenv("CASSETTE_PATH", "cassettes/backends.jsonl")
+
+# Offline stand-in behaviour
+FAKE_SEED = int(os.getenv("FAKE_SEED", "42"))
+FAKE_SEARCH_LATENCY_MS = float(os.getenv("FAKE_SEARCH_LATENCY_MS", "0"))
+FAKE_LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "0"))
+FAKE_LATENCY_JITTER_MS = float(os.getenv("FAKE_LATENCY_JITTER_MS", "0"))
+FAKE_ERROR_RATE = float(os.getenv("FAKE_ERROR_RATE", "0"))
+
+# Checkpoint store (SQLite, WAL mode)
+CHECKPOINT_BATCH_SIZE = int(os.getenv("CHECKPOINT_BATCH_SIZE", "64"))
+CHECKPOINT_COMMIT_DELAY_MS = float(os.getenv("CHECKPOINT_COMMIT_DELAY_MS", "0"))
+CHECKPOINT_BUSY_TIMEOUT_MS = int(os.getenv("CHECKPOINT_BUSY_TIMEOUT_MS", "5000"))
+CHECKPOINT_SYNCHRONOUS = os.getenv("CHECKPOINT_SYNCHRONOUS", "NORMAL").upper()
+CHECKPOINT_WRITE_TIMEOUT_S = float(os.getenv("CHECKPOINT_WRITE_TIMEOUT_S", "30"))
+
+# Checkpoint retention
+CHECKPOINT_KEEP_LAST = int(os.getenv("CHECKPOINT_KEEP_LAST", "20"))
+CHECKPOINT_THREAD_TTL_HOURS = float(os.getenv("CHECKPOINT_THREAD_TTL_HOURS", "72"))
+CHECKPOINT_VACUUM_PAGES = int(os.getenv("CHECKPOINT_VACUUM_PAGES", "1000"))
+CHECKPOINT_RETENTION_INTERVAL_S = float(os.getenv("CHECKPOINT_RETENTION_INTERVAL_S", "3600"))
+CHECKPOINT_RETENTION_ENABLED = os.getenv("CHECKPOINT_RETENTION_ENABLED", "true").lower() == "true"
+
+# Async service layer: thread pools for blocking work and request deadline
+SERVICE_GRAPH_WORKERS = int(os.getenv("SERVICE_GRAPH_WORKERS", "16"))
+SERVICE_CPU_WORKERS = int(os.getenv("SERVICE_CPU_WORKERS", str(os.cpu_count() or 2)))
+SERVICE_SQLITE_WORKERS = int(os.getenv("SERVICE_SQLITE_WORKERS", "4"))
+SERVICE_MONGO_WORKERS = int(os.getenv("SERVICE_MONGO_WORKERS", "4"))
+SERVICE_REQUEST_TIMEOUT_S = float(os.getenv("SERVICE_REQUEST_TIMEOUT_S", "120"))
+
+# Supervisor LLM response cache (SQLite)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.db")
+LLM_CACHE_TTL_S = float(os.getenv("LLM_CACHE_TTL_S", "86400"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+
+# Telemetry: per-node, per-tool and per-LLM-call spans, and log verbosity
+TELEMETRY_ENABLED = os.getenv("TELEMETRY_ENABLED", "false").lower() == "true"
+TELEMETRY_TRACE_PATH = os.getenv("TELEMETRY_TRACE_PATH", "traces.jsonl")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+
+def get_runtime_config() -> dict:
+    """Get runtime configuration as a dictionary."""
+    return {
+        "llm_default_model": LLM_DEFAULT_MODEL,
+        "llm_request_timeout_s": LLM_REQUEST_TIMEOUT_S,
+        "llm_max_retries": LLM_MAX_RETRIES,
+        "http_pool_max_connections": HTTP_POOL_MAX_CONNECTIONS,
+        "http_pool_max_keepalive": HTTP_POOL_MAX_KEEPALIVE,
+        "http_keepalive_expiry_s": HTTP_KEEPALIVE_EXPIRY_S,
+        "llm_max_concurrency": LLM_MAX_CONCURRENCY,
+        "search_max_concurrency": SEARCH_MAX_CONCURRENCY,
+        "backend_mode": BACKEND_MODE,
+        "cassette_path": CASSETTE_PATH,
+        "fake_seed": FAKE_SEED,
+        "fake_search_latency_ms": FAKE_SEARCH_LATENCY_MS,
+        "fake_llm_latency_ms": FAKE_LLM_LATENCY_MS,
+        "fake_latency_jitter_ms": FAKE_LATENCY_JITTER_MS,
+        "fake_error_rate": FAKE_ERROR_RATE,
+        "checkpoint_batch_size": CHECKPOINT_BATCH_SIZE,
+        "checkpoint_commit_delay_ms": CHECKPOINT_COMMIT_DELAY_MS,
+        "checkpoint_busy_timeout_ms": CHECKPOINT_BUSY_TIMEOUT_MS,
+        "checkpoint_synchronous": CHECKPOINT_SYNCHRONOUS,
+        "checkpoint_write_timeout_s": CHECKPOINT_WRITE_TIMEOUT_S,
+        "checkpoint_keep_last": CHECKPOINT_KEEP_LAST,
+        "checkpoint_thread_ttl_hours": CHECKPOINT_THREAD_TTL_HOURS,
+        "checkpoint_vacuum_pages": CHECKPOINT_VACUUM_PAGES,
+        "checkpoint_retention_interval_s": CHECKPOINT_RETENTION_INTERVAL_S,
+        "checkpoint_retention_enabled": CHECKPOINT_RETENTION_ENABLED,
+        "service_graph_workers": SERVICE_GRAPH_WORKERS,
+        "service_cpu_workers": SERVICE_CPU_WORKERS,
+        "service_sqlite_workers": SERVICE_SQLITE_WORKERS,
+        "service_mongo_workers": SERVICE_MONGO_WORKERS,
+        "service_request_timeout_s": SERVICE_REQUEST_TIMEOUT_S,
+        "llm_cache_enabled": LLM_CACHE_ENABLED,
+        "llm_cache_path": LLM_CACHE_PATH,
+        "llm_cache_ttl_s": LLM_CACHE_TTL_S,
+        "llm_cache_max_entries": LLM_CACHE_MAX_ENTRIES,
+        "telemetry_enabled": TELEMETRY_ENABLED,
+        "telemetry_trace_path": TELEMETRY_TRACE_PATH,
+        "log_level": LOG_LEVEL,
+    }
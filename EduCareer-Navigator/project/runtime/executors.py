@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Sized thread pools for blocking work called from asyncio code
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from functools import partial
+from typing import Any, Callable, Dict
+
+from runtime import config
+
+# Pool name -> worker count. "graph" runs synchronous graph nodes and tools,
+# "cpu" the sklearn career model, "sqlite" checkpoint reads/writes and
+# "mongo" chat history calls.
+POOL_SIZES = {
+    "graph": config.SERVICE_GRAPH_WORKERS,
+    "cpu": config.SERVICE_CPU_WORKERS,
+    "sqlite": config.SERVICE_SQLITE_WORKERS,
+    "mongo": config.SERVICE_MONGO_WORKERS,
+}
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    """Thread pool that counts submitted, running and completed calls."""
+
+    def __init__(self, max_workers: int, name: str):
+        super().__init__(max_workers=max_workers, thread_name_prefix=f"{name}-pool")
+        self.workers = max_workers
+        self._counts_lock = threading.Lock()
+        self.counts = {"submitted": 0, "active": 0, "completed": 0}
+
+    def _count(self, key: str, delta: int = 1):
+        with self._counts_lock:
+            self.counts[key] += delta
+
+    def submit(self, fn, /, *args, **kwargs):
+        self._count("submitted")
+
+        def call():
+            self._count("active")
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._count("active", -1)
+                self._count("completed")
+
+        return super().submit(call)
+
+
+_executors: Dict[str, CountingExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(name: str) -> CountingExecutor:
+    """Get or create the process-wide pool called ``name``"""
+    if name not in POOL_SIZES:
+        raise ValueError(f"Unknown pool {name!r}; expected one of {tuple(POOL_SIZES)}")
+    with _executors_lock:
+        executor = _executors.get(name)
+        if executor is None:
+            executor = _executors[name] = CountingExecutor(POOL_SIZES[name], name)
+        return executor
+
+
+async def run_in_pool(name: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run blocking ``fn`` in the named pool without blocking the event loop
+
+    Context variables (e.g. the LangGraph run config) are copied into the
+    worker thread. If the awaiting task is cancelled, the call keeps running
+    to completion in its thread but its result is discarded.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(name), partial(copy_context().run, fn, *args, **kwargs))
+
+
+def get_pool_stats() -> Dict[str, Dict[str, int]]:
+    """Get per-pool size and call counters"""
+    with _executors_lock:
+        executors = dict(_executors)
+    return {name: {"workers": executor.workers, **executor.counts} for name, executor in executors.items()}
+
+
+def close_executors(wait: bool = True):
+    """Shut down every pool"""
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait, cancel_futures=True)
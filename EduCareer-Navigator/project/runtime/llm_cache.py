@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Persistent response cache for the supervisor's chat model
+Serves repeated LLM calls (same model, tools and normalized messages) from SQLite
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.caches import BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+from langchain_core.runnables.config import ensure_config
+
+from runtime import config
+
+# Run config key ("configurable") that turns the cache off for a session
+CACHE_OPT_OUT_KEY = "llm_cache"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _normalize_text(text: str, casefold: bool) -> str:
+    text = _WHITESPACE_RE.sub(" ", text).strip()
+    # "What can you do?" and "what can you do" are the same question
+    return text.casefold().rstrip("?!. ") if casefold else text
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Canonical form of a serialized message list, used in the cache key.
+
+    Keeps what determines the answer (role, content, tool calls with their
+    arguments, tool results) and drops what changes between identical calls:
+    message and tool call IDs, response and usage metadata. Whitespace is
+    collapsed everywhere; user messages are also compared case-insensitively
+    without trailing punctuation. Tool results are otherwise kept verbatim,
+    so a call whose tool output differs is a different key.
+    """
+    try:
+        messages = json.loads(prompt)
+    except ValueError:
+        return prompt
+    if not isinstance(messages, list):
+        return prompt
+
+    canonical = []
+    for message in messages:
+        fields = message.get("kwargs", {}) if isinstance(message, dict) else {}
+        role = fields.get("type") or (message.get("id") or ["?"])[-1]
+        content = fields.get("content", "")
+        if isinstance(content, str):
+            content = _normalize_text(content, casefold=role == "human")
+        entry = {"role": role, "content": content}
+        if fields.get("tool_calls"):
+            entry["tool_calls"] = [{"name": call.get("name"), "args": call.get("args")}
+                                   for call in fields["tool_calls"]]
+        if role == "tool" and fields.get("name"):
+            entry["name"] = fields["name"]
+        canonical.append(entry)
+    return json.dumps(canonical, sort_keys=True, ensure_ascii=False)
+
+
+class ResponseCache(BaseCache):
+    """
+    LangChain cache backed by a SQLite file, with a TTL and LRU eviction.
+
+    Attach it to a chat model (``cache=``); LangChain then looks up every call
+    before it reaches the API. The key is a hash of the model's LLM string
+    (model name, parameters and the bound tool schema) and the normalized
+    messages. Entries expire ``ttl_s`` after they were written; beyond
+    ``max_entries`` the least recently used are evicted. A run whose config
+    has ``configurable[CACHE_OPT_OUT_KEY] = False`` neither reads nor writes
+    the cache. Several processes can share the file (WAL mode).
+    """
+
+    def __init__(self, path: str = config.LLM_CACHE_PATH,
+                 ttl_s: float = config.LLM_CACHE_TTL_S,
+                 max_entries: int = config.LLM_CACHE_MAX_ENTRIES):
+        """
+        Initialize the cache
+
+        Args:
+            path: SQLite database file
+            ttl_s: Seconds an entry is served after it was written (0 never expires)
+            max_entries: Entries kept before the least recently used are evicted
+        """
+        self.path = path
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False,
+                                     timeout=config.CHECKPOINT_BUSY_TIMEOUT_MS / 1000.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " created_at REAL NOT NULL, last_used_at REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_used ON llm_cache (last_used_at)")
+        self._conn.commit()
+        self._stats = {"hits": 0, "misses": 0, "bypassed": 0, "writes": 0, "expired": 0, "evicted": 0}
+
+    # --- Keys and opt-out ---
+
+    @staticmethod
+    def key(prompt: str, llm_string: str) -> str:
+        """Cache key of one model call."""
+        return hashlib.sha256(f"{llm_string}\x00{normalize_prompt(prompt)}".encode()).hexdigest()
+
+    def _enabled(self) -> bool:
+        """False when the current run opted out of the cache."""
+        configurable = ensure_config().get("configurable") or {}
+        if configurable.get(CACHE_OPT_OUT_KEY, True) is False:
+            self._count("bypassed")
+            return False
+        return True
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._stats[name] += amount
+
+    # --- BaseCache ---
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        """Cached generations for this call, or None."""
+        if not self._enabled():
+            return None
+        key = self.key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl_s and now - row[1] > self.ttl_s:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self._stats["expired"] += 1
+                row = None
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_used_at = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            self._conn.commit()
+            self._stats["hits"] += 1
+        return _loads(row[0])
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        """Store the generations of a call that missed."""
+        if not self._enabled():
+            return
+        value = _dumps(return_val)
+        if value is None:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, last_used_at, hits) VALUES (?, ?, ?, ?, 0)",
+                (self.key(prompt, llm_string), value, now, now),
+            )
+            self._stats["writes"] += 1
+            self._evict(now)
+            self._conn.commit()
+
+    def clear(self, **kwargs: Any) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    # --- Eviction and stats ---
+
+    def _evict(self, now: float):
+        """Delete expired entries, then the least recently used beyond ``max_entries``."""
+        if self.ttl_s:
+            expired = self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_s,)).rowcount
+            self._stats["expired"] += expired
+        over = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - self.max_entries
+        if over > 0:
+            # Evict a tenth more than needed so writes at the limit do not evict one by one
+            batch = over + self.max_entries // 10
+            evicted = self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY last_used_at LIMIT ?)",
+                (batch,),
+            ).rowcount
+            self._stats["evicted"] += evicted
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit, miss and eviction counters, the hit rate and the number of entries."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _dumps(generations: Sequence[Generation]) -> Optional[str]:
+    """Serialize chat generations; anything else is not cached."""
+    if not all(isinstance(g, ChatGeneration) for g in generations):
+        return None
+    entries = []
+    for generation in generations:
+        # Without its ID, a served message gets the new run's ID like a fresh one
+        message = message_to_dict(generation.message.model_copy(update={"id": None}))
+        entries.append({"message": message, "generation_info": generation.generation_info})
+    return json.dumps(entries)
+
+
+def _loads(value: str) -> List[ChatGeneration]:
+    entries = json.loads(value)
+    messages = messages_from_dict([entry["message"] for entry in entries])
+    return [ChatGeneration(message=message, generation_info=entry["generation_info"])
+            for message, entry in zip(messages, entries)]
+
+
+# Global instance for easy access
+response_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Get or create the global response cache (None when LLM_CACHE_ENABLED is off)"""
+    global response_cache
+    if not config.LLM_CACHE_ENABLED:
+        return None
+    if response_cache is None:
+        with _cache_lock:
+            if response_cache is None:
+                response_cache = ResponseCache()
+    return response_cache
+
+
+def close_response_cache():
+    """Close the global response cache"""
+    global response_cache
+    with _cache_lock:
+        if response_cache is not None:
+            response_cache.close()
+            response_cache = None
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Offline stand-ins and record/replay cassettes for the search and LLM backends
+"""
+
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage, message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import Field, PrivateAttr
+
+from runtime import config
+
+
+class BackendUnavailableError(RuntimeError):
+    """Injected failure raised by an offline stand-in."""
+
+
+class CassetteMissError(KeyError):
+    """Raised in replay mode when an interaction was never recorded."""
+
+
+def _digest(*parts: Any) -> str:
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class FaultProfile:
+    """Latency and error distribution applied to each fake backend call."""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = config.FAKE_LATENCY_JITTER_MS,
+                 error_rate: float = config.FAKE_ERROR_RATE, seed: int = config.FAKE_SEED):
+        """
+        Args:
+            latency_ms: Mean added latency per call
+            jitter_ms: Standard deviation of the (normal) latency distribution
+            error_rate: Probability that a call raises BackendUnavailableError
+            seed: Seed for the latency/error random stream
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def apply(self, backend: str):
+        """Sleep for a sampled latency and possibly raise an injected error."""
+        with self._lock:
+            delay = max(0.0, self._rng.gauss(self.latency_ms, self.jitter_ms)) if self.jitter_ms else self.latency_ms
+            fail = self.error_rate > 0 and self._rng.random() < self.error_rate
+        if delay:
+            time.sleep(delay / 1000.0)
+        if fail:
+            raise BackendUnavailableError(f"Injected {backend} failure")
+
+
+# --- Fake search ---
+
+_CATALOGUE = [
+    ("Lahore University of Management Sciences", "Lahore", "lums.edu.pk"),
+    ("University of Engineering and Technology", "Lahore", "uet.edu.pk"),
+    ("FAST National University", "Lahore", "nu.edu.pk"),
+    ("University of the Punjab", "Lahore", "pu.edu.pk"),
+    ("National University of Sciences and Technology", "Islamabad", "nust.edu.pk"),
+    ("COMSATS University", "Islamabad", "comsats.edu.pk"),
+    ("Quaid-i-Azam University", "Islamabad", "qau.edu.pk"),
+    ("Institute of Business Administration", "Karachi", "iba.edu.pk"),
+    ("NED University of Engineering and Technology", "Karachi", "neduet.edu.pk"),
+    ("Habib University", "Karachi", "habib.edu.pk"),
+    ("Arid Agriculture University", "Rawalpindi", "uaar.edu.pk"),
+    ("University of Agriculture", "Faisalabad", "uaf.edu.pk"),
+    ("University of Peshawar", "Peshawar", "uop.edu.pk"),
+    ("University of Balochistan", "Quetta", "uob.edu.pk"),
+    ("Bahauddin Zakariya University", "Multan", "bzu.edu.pk"),
+    ("University of Sialkot", "Sialkot", "uskt.edu.pk"),
+]
+
+_LISTING_RE = re.compile(
+    r"(?P<name>[A-Z][^()\n]+?) \((?P<city>[A-Za-z ]+)\): fee per semester (?P<fee>[\d,]+) PKR, "
+    r"minimum inter marks (?P<marks>\d+), merit formula (?P<merit>[^,]+), admission portal (?P<portal>\S+?)\.(?=\s|$)"
+)
+
+
+class FakeSearch:
+    """Deterministic stand-in for ``GoogleSearchAPIWrapper``.
+
+    The same query always yields the same snippets, which follow a fixed
+    format that :class:`FakeStructuredExtractor` can parse back.
+    """
+
+    def __init__(self, faults: Optional[FaultProfile] = None, results: int = 6):
+        self.faults = faults or FaultProfile(config.FAKE_SEARCH_LATENCY_MS)
+        self.results = results
+
+    def run(self, query: str) -> str:
+        """Return search snippets for ``query`` joined into one string."""
+        self.faults.apply("search")
+        rng = random.Random(_digest("search", query))
+        lowered = query.lower()
+        matches = [u for u in _CATALOGUE if u[1].lower() in lowered] or list(_CATALOGUE)
+        picks = rng.sample(matches, min(self.results, len(matches)))
+
+        snippets = []
+        for name, city, domain in picks:
+            fee = rng.randrange(60, 600) * 1000
+            marks = rng.randrange(600, 1000)
+            test = rng.choice([30, 40, 50])
+            snippets.append(
+                f"{name} ({city}): fee per semester {fee:,} PKR, minimum inter marks {marks}, "
+                f"merit formula {100 - test}% Inter + {test}% Test, admission portal https://admissions.{domain}."
+            )
+        snippets.append("Admission news and scholarship updates for the upcoming session...")
+        return " ".join(snippets)
+
+
+# --- Fake structured output ---
+
+class FakeStructuredExtractor:
+    """Deterministic stand-in for ``prompt | llm.with_structured_output(schema)``."""
+
+    def __init__(self, schema: Any, faults: Optional[FaultProfile] = None):
+        self.schema = schema
+        self.faults = faults or FaultProfile(config.FAKE_LLM_LATENCY_MS)
+
+    def __call__(self, inputs: Dict[str, Any]) -> Any:
+        self.faults.apply("llm")
+        if self.schema.__name__ == "ListUniversitiesResponse":
+            return self._universities(inputs.get("context", ""))
+        return self._defaults()
+
+    def _universities(self, context: str) -> Any:
+        universities = []
+        for match in _LISTING_RE.finditer(str(context)):
+            universities.append({
+                "name": match.group("name").strip(),
+                "city": match.group("city").strip(),
+                "admission_portal": match.group("portal"),
+                "fee_per_semester": int(match.group("fee").replace(",", "")),
+                "min_inter_marks": int(match.group("marks")),
+                "merit_formula": match.group("merit").strip(),
+            })
+        return self.schema(universities=universities)
+
+    def _defaults(self) -> Any:
+        values = {}
+        for name, field in self.schema.model_fields.items():
+            annotation = getattr(field.annotation, "__origin__", field.annotation)
+            if annotation is int:
+                values[name] = 0
+            elif annotation is float:
+                values[name] = 0.0
+            elif annotation is bool:
+                values[name] = False
+            elif annotation is list:
+                values[name] = []
+            else:
+                values[name] = "not available"
+        return self.schema(**values)
+
+
+# --- Fake chat model for the react agent ---
+
+_CAREER_HINTS = ("career", "math score", "biology score", "interest in")
+_UNIVERSITY_HINTS = ("universit", "matric", "intermediate", "fee", "budget", "admission")
+
+
+class FakeChatModel(BaseChatModel):
+    """Deterministic tool-calling chat model standing in for ``ChatOpenAI``.
+
+    A user turn is routed to the career or university tool by keywords; a
+    tool result is summarised into the final answer.
+    """
+
+    latency_ms: float = Field(default_factory=lambda: config.FAKE_LLM_LATENCY_MS)
+    _faults: FaultProfile = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        self._faults = FaultProfile(self.latency_ms)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-guidance-chat"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, tools: Optional[List[dict]] = None, **kwargs: Any) -> ChatResult:
+        self._faults.apply("llm")
+        last = messages[-1] if messages else None
+        tool_names = {t["function"]["name"] for t in tools or []}
+
+        if isinstance(last, ToolMessage):
+            message = AIMessage(content=f"Here is what I found for you:\n\n{last.content}")
+        else:
+            text = str(last.content if last is not None else "")
+            lowered = text.lower()
+            tool = None
+            if any(h in lowered for h in _CAREER_HINTS) and "CareerSuggestionAgent" in tool_names:
+                tool = "CareerSuggestionAgent"
+            elif any(h in lowered for h in _UNIVERSITY_HINTS) and "UniversityRecommendationsAgent" in tool_names:
+                tool = "UniversityRecommendationsAgent"
+
+            if tool:
+                call_id = "call_" + _digest("tool_call", tool, text)[:16]
+                message = AIMessage(content="", tool_calls=[
+                    {"name": tool, "args": {"__arg1": text}, "id": call_id, "type": "tool_call"}
+                ])
+            else:
+                message = AIMessage(content=(
+                    "I can help with career guidance (share your math and biology scores and interests) "
+                    "or university recommendations (share your matric/inter marks, degree, city and budget)."
+                ))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+# --- Record / replay ---
+
+class Cassette:
+    """Append-only JSONL store of recorded backend interactions."""
+
+    def __init__(self, path: str = config.CASSETTE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, str] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[entry["key"]] = entry["response"]
+
+    def get(self, key: str) -> str:
+        with self._lock:
+            if key not in self._entries:
+                raise CassetteMissError(f"No recorded interaction for key {key[:12]} in {self.path}")
+            return self._entries[key]
+
+    def put(self, key: str, backend: str, request: Any, response: str):
+        with self._lock:
+            self._entries[key] = response
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"key": key, "backend": backend,
+                                    "request": request, "response": response}) + "\n")
+
+
+class CassetteSearch:
+    """Records or replays ``search.run`` calls."""
+
+    def __init__(self, cassette: Cassette, inner: Any = None):
+        self.cassette = cassette
+        self.inner = inner
+
+    def run(self, query: str) -> str:
+        key = _digest("search", query)
+        if self.inner is None:
+            return json.loads(self.cassette.get(key))
+        result = self.inner.run(query)
+        self.cassette.put(key, "search", query, json.dumps(result))
+        return result
+
+
+def cassette_structured_chain(cassette: Cassette, schema: Any, inner: Any = None):
+    """Wrap a structured-output chain so its calls are recorded or replayed."""
+    def invoke(inputs: Dict[str, Any]) -> Any:
+        request = {k: str(v) for k, v in inputs.items()}
+        key = _digest("structured", schema.__name__, request)
+        if inner is None:
+            return schema.model_validate_json(cassette.get(key))
+        response = inner.invoke(inputs)
+        cassette.put(key, "structured", request, response.model_dump_json())
+        return response
+    return RunnableLambda(invoke)
+
+
+def _message_fingerprint(message: BaseMessage) -> dict:
+    """Stable identity of a message; graph-assigned message ids are ignored."""
+    return {
+        "type": message.type,
+        "content": message.content,
+        "tool_calls": [{"name": c["name"], "args": c["args"], "id": c.get("id")}
+                       for c in getattr(message, "tool_calls", None) or []],
+        "tool_call_id": getattr(message, "tool_call_id", None),
+    }
+
+
+class CassetteChatModel(BaseChatModel):
+    """Records or replays chat completions, including tool calls."""
+
+    cassette: Any
+    inner: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "cassette-chat"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, tools: Optional[List[dict]] = None, **kwargs: Any) -> ChatResult:
+        request = {"messages": [_message_fingerprint(m) for m in messages], "tools": tools or []}
+        key = _digest("chat", request)
+        if self.inner is None:
+            message = messages_from_dict([json.loads(self.cassette.get(key))])[0]
+        else:
+            model = self.inner.bind_tools(tools) if tools else self.inner
+            message = model.invoke(messages, stop=stop)
+            self.cassette.put(key, "chat", request, json.dumps(message_to_dict(message)))
+        return ChatResult(generations=[ChatGeneration(message=message)])
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Checkpoint retention, compaction and vacuum for the SQLite checkpoint databases
+
+Usage:
+    python -m runtime.retention                       # clean graph.db, career_graph.db, supervisor_graph.db
+    python -m runtime.retention --db graph.db --keep-last 5 --ttl-hours 24 --full-vacuum
+"""
+
+import argparse
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, TypedDict
+
+from runtime import config
+
+logger = logging.getLogger(__name__)
+
+# Checkpoint databases created by the advisor, career and supervisor graphs
+DEFAULT_DATABASES = ["graph.db", "career_graph.db", "supervisor_graph.db"]
+
+# 100-ns intervals between the UUID epoch (1582-10-15) and the Unix epoch
+_UUID_EPOCH_OFFSET = 0x01B21DD213814000
+
+_DELETE_CHUNK = 500
+
+
+class RetentionReport(TypedDict):
+    database: str
+    checkpoints_deleted: int
+    writes_deleted: int
+    threads_expired: int
+    bytes_before: int
+    bytes_after: int
+    bytes_reclaimed: int
+    duration_s: float
+
+
+def checkpoint_timestamp(checkpoint_id: str) -> Optional[float]:
+    """Unix time encoded in a LangGraph (UUIDv6) checkpoint id, or None."""
+    try:
+        value = int(checkpoint_id.replace("-", ""), 16)
+    except (AttributeError, ValueError):
+        return None
+    if (value >> 76) & 0xF != 6:
+        return None
+    ticks = ((value >> 80) << 12) | ((value >> 64) & 0x0FFF)
+    return (ticks - _UUID_EPOCH_OFFSET) / 1e7
+
+
+def database_size(path: str) -> int:
+    """Bytes used by the database file and its WAL."""
+    return sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+
+
+def _delete_in_chunks(conn: sqlite3.Connection, table: str, rowid_query: str, params=()) -> int:
+    """Delete rows selected by ``rowid_query`` in short transactions."""
+    deleted = 0
+    while True:
+        cur = conn.execute(
+            f"DELETE FROM {table} WHERE rowid IN ({rowid_query} LIMIT {_DELETE_CHUNK})", params
+        )
+        conn.commit()
+        deleted += cur.rowcount
+        if cur.rowcount < _DELETE_CHUNK:
+            return deleted
+
+
+class CheckpointRetention:
+    """Applies the retention policy to one checkpoint database.
+
+    - keeps only the latest ``keep_last`` checkpoints per thread and namespace
+    - deletes threads whose newest checkpoint is older than ``ttl_s``
+    - drops intermediate writes that no longer belong to a thread's latest checkpoint
+    - runs an incremental vacuum so freed pages are returned to the filesystem
+    """
+
+    def __init__(self, path: str,
+                 keep_last: int = config.CHECKPOINT_KEEP_LAST,
+                 ttl_s: float = config.CHECKPOINT_THREAD_TTL_HOURS * 3600,
+                 compact_writes: bool = True,
+                 vacuum_pages: int = config.CHECKPOINT_VACUUM_PAGES,
+                 busy_timeout_ms: int = config.CHECKPOINT_BUSY_TIMEOUT_MS):
+        """
+        Args:
+            path: SQLite checkpoint database
+            keep_last: Checkpoints kept per thread (0 keeps all)
+            ttl_s: Idle time after which a whole thread is deleted (0 disables)
+            compact_writes: Drop writes not attached to a thread's latest checkpoint
+            vacuum_pages: Free pages released per incremental vacuum (0 releases all)
+            busy_timeout_ms: How long to wait for the live app's writer
+        """
+        self.path = path
+        self.keep_last = keep_last
+        self.ttl_s = ttl_s
+        self.compact_writes = compact_writes
+        self.vacuum_pages = vacuum_pages
+        self.busy_timeout_ms = busy_timeout_ms
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000.0)
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        return conn
+
+    def _has_tables(self, conn: sqlite3.Connection) -> bool:
+        names = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        return {"checkpoints", "writes"} <= names
+
+    def expire_idle_threads(self, conn: sqlite3.Connection) -> Dict[str, int]:
+        """Delete every checkpoint and write of threads idle for longer than the TTL."""
+        if not self.ttl_s:
+            return {"threads": 0, "checkpoints": 0, "writes": 0}
+        cutoff = time.time() - self.ttl_s
+        expired = [
+            thread_id
+            for thread_id, latest in conn.execute(
+                "SELECT thread_id, MAX(checkpoint_id) FROM checkpoints GROUP BY thread_id"
+            )
+            if (checkpoint_timestamp(latest) or time.time()) < cutoff
+        ]
+        checkpoints = writes = 0
+        for thread_id in expired:
+            checkpoints += _delete_in_chunks(
+                conn, "checkpoints", "SELECT rowid FROM checkpoints WHERE thread_id = ?", (thread_id,))
+            writes += _delete_in_chunks(
+                conn, "writes", "SELECT rowid FROM writes WHERE thread_id = ?", (thread_id,))
+        return {"threads": len(expired), "checkpoints": checkpoints, "writes": writes}
+
+    def prune_history(self, conn: sqlite3.Connection) -> int:
+        """Keep only the newest ``keep_last`` checkpoints of each thread and namespace."""
+        if not self.keep_last:
+            return 0
+        return _delete_in_chunks(conn, "checkpoints", """
+            SELECT rowid FROM (
+                SELECT rowid, ROW_NUMBER() OVER (
+                    PARTITION BY thread_id, checkpoint_ns ORDER BY checkpoint_id DESC
+                ) AS rn FROM checkpoints
+            ) WHERE rn > ?""", (self.keep_last,))
+
+    def compact(self, conn: sqlite3.Connection) -> int:
+        """Drop intermediate writes that are not attached to a thread's latest checkpoint."""
+        if not self.compact_writes:
+            return 0
+        conn.execute("DROP TABLE IF EXISTS temp.latest_checkpoints")
+        conn.execute("""
+            CREATE TEMP TABLE latest_checkpoints AS
+            SELECT thread_id, checkpoint_ns, MAX(checkpoint_id) AS checkpoint_id
+            FROM checkpoints GROUP BY thread_id, checkpoint_ns""")
+        try:
+            return _delete_in_chunks(conn, "writes", """
+                SELECT rowid FROM writes WHERE (thread_id, checkpoint_ns, checkpoint_id) NOT IN (
+                    SELECT thread_id, checkpoint_ns, checkpoint_id FROM temp.latest_checkpoints
+                )""")
+        finally:
+            conn.execute("DROP TABLE IF EXISTS temp.latest_checkpoints")
+
+    def vacuum(self, conn: sqlite3.Connection, full: bool = False):
+        """
+        Return free pages to the filesystem and truncate the WAL.
+
+        Databases created before incremental vacuum was enabled need one full
+        ``VACUUM`` (``full=True``) to switch their auto_vacuum mode.
+        """
+        if full:
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+        elif conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            pages = f"({int(self.vacuum_pages)})" if self.vacuum_pages else ""
+            # The pragma frees one page per step; executescript steps it to completion
+            conn.executescript(f"PRAGMA incremental_vacuum{pages};")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+
+    def run(self, full_vacuum: bool = False) -> RetentionReport:
+        """Apply the whole retention policy once and report what was reclaimed."""
+        started = time.monotonic()
+        bytes_before = database_size(self.path)
+        expired = {"threads": 0, "checkpoints": 0, "writes": 0}
+        pruned = compacted = 0
+
+        if os.path.exists(self.path):
+            conn = self._connect()
+            try:
+                if self._has_tables(conn):
+                    expired = self.expire_idle_threads(conn)
+                    pruned = self.prune_history(conn)
+                    compacted = self.compact(conn)
+                    self.vacuum(conn, full=full_vacuum)
+            finally:
+                conn.close()
+
+        bytes_after = database_size(self.path)
+        return RetentionReport(
+            database=self.path,
+            checkpoints_deleted=expired["checkpoints"] + pruned,
+            writes_deleted=expired["writes"] + compacted,
+            threads_expired=expired["threads"],
+            bytes_before=bytes_before,
+            bytes_after=bytes_after,
+            bytes_reclaimed=max(0, bytes_before - bytes_after),
+            duration_s=round(time.monotonic() - started, 3),
+        )
+
+
+def format_report(report: RetentionReport) -> str:
+    return (f"🧹 {report['database']}: {report['checkpoints_deleted']} checkpoints, "
+            f"{report['writes_deleted']} writes, {report['threads_expired']} idle threads removed; "
+            f"{report['bytes_reclaimed']:,} bytes reclaimed "
+            f"({report['bytes_before']:,} -> {report['bytes_after']:,}) in {report['duration_s']}s")
+
+
+class RetentionScheduler:
+    """Background thread applying the retention policy at a fixed interval."""
+
+    def __init__(self, paths: Iterable[str], interval_s: float = config.CHECKPOINT_RETENTION_INTERVAL_S,
+                 **policy):
+        self.paths = list(paths)
+        self.interval_s = interval_s
+        self.policy = policy
+        self.last_reports: List[RetentionReport] = []
+        self.total_bytes_reclaimed = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="checkpoint-retention", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def run_once(self) -> List[RetentionReport]:
+        reports = []
+        for path in self.paths:
+            try:
+                report = CheckpointRetention(path, **self.policy).run()
+            except sqlite3.Error as e:
+                logger.warning("Checkpoint retention failed for %s: %s", path, e)
+                continue
+            self.total_bytes_reclaimed += report["bytes_reclaimed"]
+            logger.info("%s", format_report(report))
+            reports.append(report)
+        self.last_reports = reports
+        return reports
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            try:
+                self.run_once()
+            except Exception:
+                # Keep the scheduler alive; the next interval tries again
+                logger.exception("Checkpoint retention run failed")
+
+    def stop(self):
+        self._stop.set()
+
+
+# Global instance for easy access
+retention_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def start_retention_scheduler(paths: Optional[Iterable[str]] = None) -> Optional[RetentionScheduler]:
+    """Start the in-process retention scheduler once (no-op when disabled)"""
+    global retention_scheduler
+    if not config.CHECKPOINT_RETENTION_ENABLED:
+        return None
+    with _scheduler_lock:
+        if retention_scheduler is None:
+            retention_scheduler = RetentionScheduler(paths or DEFAULT_DATABASES)
+            retention_scheduler.start()
+    return retention_scheduler
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Prune, compact and vacuum LangGraph checkpoint databases.")
+    parser.add_argument("--db", action="append", dest="databases",
+                        help="Checkpoint database (repeatable; defaults to the three app databases)")
+    parser.add_argument("--keep-last", type=int, default=config.CHECKPOINT_KEEP_LAST,
+                        help="Checkpoints kept per thread (0 keeps all)")
+    parser.add_argument("--ttl-hours", type=float, default=config.CHECKPOINT_THREAD_TTL_HOURS,
+                        help="Delete threads idle for longer than this (0 disables)")
+    parser.add_argument("--no-compact", action="store_true", help="Keep intermediate writes")
+    parser.add_argument("--vacuum-pages", type=int, default=config.CHECKPOINT_VACUUM_PAGES,
+                        help="Free pages released per incremental vacuum (0 releases all)")
+    parser.add_argument("--full-vacuum", action="store_true",
+                        help="Run a full VACUUM (also enables incremental vacuum on old databases)")
+    args = parser.parse_args(argv)
+
+    total = 0
+    for path in args.databases or DEFAULT_DATABASES:
+        report = CheckpointRetention(
+            path, keep_last=args.keep_last, ttl_s=args.ttl_hours * 3600,
+            compact_writes=not args.no_compact, vacuum_pages=args.vacuum_pages,
+        ).run(full_vacuum=args.full_vacuum)
+        total += report["bytes_reclaimed"]
+        print(format_report(report))
+    print(f"✅ Total reclaimed: {total:,} bytes")
+
+
+if __name__ == "__main__":
+    main()
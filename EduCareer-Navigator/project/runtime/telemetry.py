@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Latency and token instrumentation for the guidance graphs
+Times every graph, node, tool, LLM and search call as a span, aggregates them
+into Prometheus metrics and optionally writes JSONL traces
+(summarized by ``benchmarks/trace_report.py``)
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables.config import ensure_config
+from langchain_core.tracers.context import register_configure_hook
+from langgraph.errors import GraphInterrupt
+
+from runtime import config
+
+# Histogram buckets (seconds): from a cached LLM call to a slow search
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Tags LangGraph and LangChain put on runs inside a graph; a chain without them
+# was invoked directly (a top-level graph, or a subgraph called from a tool)
+_STEP_TAG_PREFIXES = ("graph:step:", "seq:step:", "langsmith:hidden")
+
+
+def configure_logging(level: str = config.LOG_LEVEL):
+    """Send the modules' log records to stderr at ``level`` (no-op if logging is already configured)."""
+    logging.basicConfig(level=getattr(logging, level, logging.INFO), format="%(message)s")
+
+
+def _estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) when the backend reports no usage."""
+    return (len(text) + 3) // 4
+
+
+class RunCounter:
+    """Thread-safe named counters, e.g. graph runs per agent or seconds spent per turn."""
+
+    def __init__(self, *names: str):
+        self._lock = threading.Lock()
+        self._counts: Dict[str, float] = dict.fromkeys(names, 0)
+
+    def count(self, name: str, amount: float = 1):
+        with self._lock:
+            self._counts[name] = self._counts.get(name, 0) + amount
+
+    def add(self, **amounts: float):
+        """Add to several counters at once, so readers never see half an update."""
+        with self._lock:
+            for name, amount in amounts.items():
+                self._counts[name] = self._counts.get(name, 0) + amount
+
+    def get(self, name: str) -> float:
+        with self._lock:
+            return self._counts.get(name, 0)
+
+    def get_stats(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._counts)
+
+
+# Executions of each agent graph's entry node. A resume restores that node from
+# the checkpoint instead of running it, so a run paused and resumed counts once.
+graph_runs = RunCounter("career", "advisor")
+
+
+class MetricsRegistry:
+    """In-process latency histograms, token counters and error counters per (kind, name)."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # (kind, name) -> [per-bucket counts, sum of seconds, count]
+        self._latency: Dict[Tuple[str, str], list] = {}
+        self._tokens: Dict[Tuple[str, str, str], int] = {}
+        self._errors: Dict[Tuple[str, str], int] = {}
+
+    def observe(self, kind: str, name: str, seconds: float, status: str = "ok",
+                prompt_tokens: int = 0, completion_tokens: int = 0):
+        """Record one finished span."""
+        key = (kind, name)
+        with self._lock:
+            series = self._latency.get(key)
+            if series is None:
+                series = self._latency[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[0][i] += 1
+            series[1] += seconds
+            series[2] += 1
+            if status == "error":
+                self._errors[key] = self._errors.get(key, 0) + 1
+            for direction, count in (("prompt", prompt_tokens), ("completion", completion_tokens)):
+                if count:
+                    token_key = (kind, name, direction)
+                    self._tokens[token_key] = self._tokens.get(token_key, 0) + count
+
+    def prometheus_text(self) -> str:
+        """Metrics in the Prometheus text exposition format."""
+        worker = os.getpid()
+        lines = ["# HELP guidance_span_duration_seconds Wall time of graph, node, tool, LLM and search calls.",
+                 "# TYPE guidance_span_duration_seconds histogram"]
+        with self._lock:
+            latency = {key: (list(counts), total, count) for key, (counts, total, count) in self._latency.items()}
+            tokens = dict(self._tokens)
+            errors = dict(self._errors)
+        for (kind, name), (counts, total, count) in sorted(latency.items()):
+            labels = f'kind="{kind}",name="{_escape(name)}",worker="{worker}"'
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f'guidance_span_duration_seconds_bucket{{{labels},le="{bound:g}"}} {bucket_count}')
+            lines.append(f'guidance_span_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"guidance_span_duration_seconds_sum{{{labels}}} {total:.6f}")
+            lines.append(f"guidance_span_duration_seconds_count{{{labels}}} {count}")
+        lines += ["# HELP guidance_tokens_total Prompt and completion tokens (estimated when not reported).",
+                  "# TYPE guidance_tokens_total counter"]
+        for (kind, name, direction), count in sorted(tokens.items()):
+            lines.append(f'guidance_tokens_total{{kind="{kind}",name="{_escape(name)}",type="{direction}",'
+                         f'worker="{worker}"}} {count}')
+        lines += ["# HELP guidance_span_errors_total Spans that ended with an error.",
+                  "# TYPE guidance_span_errors_total counter"]
+        for (kind, name), count in sorted(errors.items()):
+            lines.append(f'guidance_span_errors_total{{kind="{kind}",name="{_escape(name)}",worker="{worker}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get count, total and mean time, errors and tokens per "kind:name"."""
+        with self._lock:
+            stats = {}
+            for (kind, name), (_, total, count) in self._latency.items():
+                stats[f"{kind}:{name}"] = {
+                    "count": count, "total_s": round(total, 3), "mean_ms": round(total / count * 1000, 2),
+                    "errors": self._errors.get((kind, name), 0),
+                    "prompt_tokens": self._tokens.get((kind, name, "prompt"), 0),
+                    "completion_tokens": self._tokens.get((kind, name, "completion"), 0),
+                }
+        return stats
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class SpanRecorder(BaseCallbackHandler):
+    """
+    Callback handler that turns LangChain/LangGraph runs into timed spans.
+
+    Emits a span for each graph, graph node, tool and chat model call (plus
+    manual ``span`` blocks such as web searches); helper runnables inside
+    nodes are skipped, and a span's parent is its nearest emitted ancestor.
+    Spans of one top-level call share a trace ID; the session's thread_id
+    comes from the run metadata. Finished spans go to the metrics registry
+    and, with a trace path, one JSON line each.
+    """
+
+    # Called in the thread that runs the model or node, so timings are not skewed by a queue
+    run_inline = True
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None,
+                 trace_path: Optional[str] = config.TELEMETRY_TRACE_PATH):
+        self.registry = registry or MetricsRegistry()
+        self.trace_path = trace_path
+        self._lock = threading.Lock()
+        self._trace_file = None
+        # run_id -> open run; runs that are not emitted are kept to resolve parents
+        self._runs: Dict[Any, Dict[str, Any]] = {}
+
+    # --- Bookkeeping ---
+
+    def start(self, run_id, parent_run_id, kind: Optional[str], name: str,
+              metadata: Optional[dict] = None, **attrs) -> dict:
+        """Open a run and return its attribute dict; ``kind`` None marks a run only tracked for parent links."""
+        with self._lock:
+            parent = self._runs.get(parent_run_id) if parent_run_id is not None else None
+            if parent is None:
+                trace_id, parent_span = parent_run_id or run_id, parent_run_id
+            else:
+                trace_id = parent["trace_id"]
+                parent_span = parent_run_id if parent["kind"] else parent["parent_span"]
+            self._runs[run_id] = {
+                "kind": kind, "name": name, "trace_id": trace_id, "parent_span": parent_span,
+                "thread_id": (metadata or {}).get("thread_id") or (parent or {}).get("thread_id"),
+                "started": time.perf_counter(), "start_time": time.time(), "attrs": attrs,
+            }
+        return attrs
+
+    def finish(self, run_id, status: str = "ok", error: Optional[BaseException] = None, **attrs):
+        """Close a run and, if it is emitted, record its span."""
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None or run["kind"] is None:
+            return
+        duration = time.perf_counter() - run["started"]
+        run["attrs"].update(attrs)
+        run_attrs = run["attrs"]
+        self.registry.observe(run["kind"], run["name"], duration, status,
+                              run_attrs.get("prompt_tokens", 0), run_attrs.get("completion_tokens", 0))
+        if self.trace_path:
+            record = {
+                "trace_id": str(run["trace_id"]), "span_id": str(run_id),
+                "parent_id": str(run["parent_span"]) if run["parent_span"] else None,
+                "kind": run["kind"], "name": run["name"], "thread_id": run["thread_id"],
+                "start": round(run["start_time"], 6), "duration_ms": round(duration * 1000, 3),
+                "status": status, **run_attrs,
+            }
+            if error is not None:
+                record["error"] = f"{type(error).__name__}: {error}"[:300]
+            self._write(record)
+
+    def _write(self, record: dict):
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            if self._trace_file is None:
+                self._trace_file = open(self.trace_path, "a", encoding="utf-8", buffering=1)
+            self._trace_file.write(line)
+
+    def _fail(self, run_id, error: BaseException):
+        # An interrupt pauses the run for user input; it is not a failure
+        self.finish(run_id, "interrupted" if isinstance(error, GraphInterrupt) else "error", error)
+
+    def close(self):
+        with self._lock:
+            if self._trace_file is not None:
+                self._trace_file.close()
+                self._trace_file = None
+
+    # --- Chains: graphs and nodes ---
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name") or "chain"
+        tags = tags or []
+        kind = None
+        if any(tag.startswith("graph:step:") for tag in tags) and (metadata or {}).get("langgraph_node") == name:
+            kind = "node"
+        elif not any(tag.startswith(_STEP_TAG_PREFIXES) for tag in tags):
+            kind = "graph"
+        self.start(run_id, parent_run_id, kind, name, metadata)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self.finish(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._fail(run_id, error)
+
+    # --- Tools ---
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        self.start(run_id, parent_run_id, "tool", name, metadata)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self.finish(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._fail(run_id, error)
+
+    # --- LLM calls ---
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        prompt = "".join(str(m.content) for batch in messages for m in batch)
+        self._start_llm(run_id, parent_run_id, serialized, metadata, kwargs, prompt)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        self._start_llm(run_id, parent_run_id, serialized, metadata, kwargs, "".join(prompts))
+
+    def _start_llm(self, run_id, parent_run_id, serialized, metadata, kwargs, prompt: str):
+        params = kwargs.get("invocation_params") or {}
+        name = (params.get("model") or params.get("model_name") or (serialized or {}).get("name")
+                or kwargs.get("name") or "llm")
+        self.start(run_id, parent_run_id, "llm", name, metadata, prompt_chars=len(prompt))
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is not None and "ttft_ms" not in run["attrs"]:
+                run["attrs"]["ttft_ms"] = round((time.perf_counter() - run["started"]) * 1000, 3)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        prompt_tokens, completion_tokens, estimated = _token_usage(response)
+        if estimated:
+            with self._lock:
+                run = self._runs.get(run_id)
+                prompt_tokens = (run["attrs"].get("prompt_chars", 0) + 3) // 4 if run else 0
+        self.finish(run_id, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                    tokens_estimated=estimated)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._fail(run_id, error)
+
+
+def _token_usage(response) -> Tuple[int, int, bool]:
+    """(prompt, completion, estimated) tokens of an LLMResult."""
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    if usage.get("prompt_tokens") is not None:
+        return usage["prompt_tokens"], usage.get("completion_tokens") or 0, False
+    prompt_tokens = completion_tokens = 0
+    completion_text = ""
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            metadata = getattr(message, "usage_metadata", None)
+            if metadata:
+                prompt_tokens += metadata.get("input_tokens", 0)
+                completion_tokens += metadata.get("output_tokens", 0)
+            else:
+                completion_text += generation.text + json.dumps(getattr(message, "tool_calls", None) or "")
+    if prompt_tokens or completion_tokens:
+        return prompt_tokens, completion_tokens, False
+    return 0, _estimate_tokens(completion_text), True
+
+
+@contextmanager
+def _recorded_span(recorder: SpanRecorder, kind: str, name: str, attrs: dict) -> Iterator[dict]:
+    callbacks = ensure_config().get("callbacks")
+    parent_run_id = getattr(callbacks, "parent_run_id", None)
+    metadata = getattr(callbacks, "inheritable_metadata", None)
+    run_id = uuid.uuid4()
+    span_attrs = recorder.start(run_id, parent_run_id, kind, name, metadata, **attrs)
+    try:
+        yield span_attrs
+    except BaseException as e:
+        recorder.finish(run_id, "error", e)
+        raise
+    recorder.finish(run_id)
+
+
+def span(kind: str, name: str, **attrs):
+    """
+    Time a block that is not a LangChain run (e.g. a web search) as a span.
+
+    The span's parent is the graph node or tool running in the current
+    context. The block may add attributes to the yielded dict. When
+    telemetry is disabled this is a no-op context manager (yielding a
+    throwaway dict).
+    """
+    recorder = get_span_recorder()
+    if recorder is None:
+        return nullcontext({})
+    return _recorded_span(recorder, kind, name, attrs)
+
+
+# Global instance for easy access
+span_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def get_span_recorder() -> Optional[SpanRecorder]:
+    """Get or create the global span recorder (None when TELEMETRY_ENABLED is off)"""
+    global span_recorder
+    if not config.TELEMETRY_ENABLED:
+        return None
+    if span_recorder is None:
+        with _recorder_lock:
+            if span_recorder is None:
+                span_recorder = SpanRecorder()
+                # Hands the recorder to every callback manager LangChain configures (graphs,
+                # nodes, tools, models); a default, not set(), so every thread and task sees it
+                register_configure_hook(ContextVar("guidance_span_recorder", default=span_recorder),
+                                        inheritable=True)
+    return span_recorder
+
+
+def setup_telemetry():
+    """Configure logging and, if enabled, start recording spans (call once at startup)"""
+    configure_logging()
+    get_span_recorder()
+
+
+def close_span_recorder():
+    """Flush and close the trace file"""
+    with _recorder_lock:
+        if span_recorder is not None:
+            span_recorder.close()
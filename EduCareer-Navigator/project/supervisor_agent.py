@@ -5,18 +5,33 @@ Routes user queries to appropriate guidance systems and handles input parsing
 """
 import re
 import json
+import logging
 import sys
 import os
+import time
+import asyncio
+import threading
+from contextvars import copy_context
 from pathlib import Path
 from typing import Any, Dict, Union
+from langchain_core.messages import RemoveMessage
 from langchain_core.tools import Tool
-from langgraph.prebuilt import create_react_agent
-from langchain_openai import ChatOpenAI
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
+from langgraph.types import Command
 from dotenv import load_dotenv
 from career_agent.career_states import CareerState
-from career_agent.career_graph import create_career_graph
+from career_agent.career_graph import get_career_graph
 from advisor_agent.universitiesstates import systemState
-from advisor_agent.graphsetup import create_advisor_graph
+from advisor_agent.graphsetup import get_advisor_graph
+from runtime.clients import get_client_factory
+from runtime.checkpoints import NothingToResumeError, get_checkpointer
+from runtime.llm_cache import get_response_cache
+from runtime.executors import get_executor, run_in_pool
+from runtime.telemetry import RunCounter, get_span_recorder
+from profile_extractor import profile_extractor
+from advisor_agent.graphsetup import resume_advisor
+from supervisor_router import BOTH, CAREER, UNIVERSITY, IntentRouter, LLMTimingHandler, ROUTER_ENABLED
+from supervisor_context import ConversationContext
 # Add parent directory to path to import modules
 sys.path.append(str(Path(__file__).parent))
 
@@ -25,14 +40,12 @@ sys.path.append(str(Path(__file__).parent))
 
 load_dotenv()
 
-# --- Input Parsing Functions ---
-
+logger = logging.getLogger(__name__)
 
-career_graph = create_career_graph()
-advisor_graph = create_advisor_graph()
+# --- Input Parsing Functions ---
 
 
-def parse_career_user_info(text: str):
+def parse_career_user_info(text: str) -> CareerState:
     """
     Parses a string to extract user information, ensuring no null values in the output.
     Integers default to 0, and booleans default to False.
@@ -43,50 +56,9 @@ def parse_career_user_info(text: str):
     Returns:
         A CareerState object containing the extracted information.
     """
-    # Initialize the dictionary with default values.
-    data = {
-        "math_score": 75,
-        "bio_score": 75,
-        "interest_tech": False,
-        "interest_art": False,
-        "group_work": False,
-        "logical_thinking": False,
-        "likes_speaking": False,
-        "career_predictions": [],
-        "career_recommendations": [],
-        "final_recommendation": None,
-        "confidence_threshold": 0.7,
-        "user_approval": None,
-        "current_step": "",
-        "processing_complete": False
-    }
-
-    # Extract scores using regular expressions. If found, they overwrite the default 0.
-    math_score_match = re.search(r"math score of (\d+)", text, re.IGNORECASE)
-    if math_score_match:
-        data["math_score"] = int(math_score_match.group(1))
-
-    bio_score_match = re.search(r"biology score of (\d+)", text, re.IGNORECASE)
-    if bio_score_match:
-        data["bio_score"] = int(bio_score_match.group(1))
-
-    # Check for boolean interests. If a keyword is found, the value is switched to True.
-    if "tech" in text.lower() or "technology" in text.lower():
-        data["interest_tech"] = True
-
-    if "art" in text.lower() or "artistic" in text.lower():
-        data["interest_art"] = True
-
-    if "group work" in text.lower() or "teamwork" in text.lower():
-        data["group_work"] = True
-
-    if "logical thinking" in text.lower() or "problem-solving" in text.lower():
-        data["logical_thinking"] = True
+    # Single pass over the text; scores default to 75 and flags to False
+    return profile_extractor.career_profile(text)
 
-    if "speaking" in text.lower() or "presentations" in text.lower():
-        data["likes_speaking"] = True
-
-    return career_graph.invoke(data)
 
 def parse_student_unidata(text: str) -> systemState:
     """
@@ -101,70 +73,32 @@ def parse_student_unidata(text: str) -> systemState:
     Returns:
         A dictionary containing the extracted student profile information.
     """
-    # Initialize the dictionary with all required fields and their default values.
-    profile = {
-        
-        # New fields
-        "matric_marks": 0,
-        "inter_marks" :0,
-        "degree_preference":"",
-        "city": "",
-        "location":"",
-        "fee_budget":"",
-        "universities":[],
-        "ranked_universities":[],
-        "rank_unis":"no"
-    }
+    # Single pass for marks, city (with aliases such as "Isb" or "Pindi") and fee;
+    # degree and location are free text and use precompiled patterns
+    return profile_extractor.student_profile(text)
 
-    # --- Marks and Scores (Integers) ---
-    matric_match = re.search(r"(?:matric|matriculation)\s.*?(\d{3,4})", text, re.IGNORECASE)
-    if matric_match:
-        profile["matric_marks"] = int(matric_match.group(1))
-
-    inter_match = re.search(r"(?:inter|intermediate)\s.*?(\d{3,4})", text, re.IGNORECASE)
-    if inter_match:
-        profile["inter_marks"] = int(inter_match.group(1))
-
-    # --- Profile Details (Strings) ---
-    degree_match = re.search(r"(?:study|degree in|major in|interested in)\s+([A-Za-z\s]+?)(?:in|,|at|with|$)", text, re.IGNORECASE)
-    if degree_match:
-        profile["degree_preference"] = degree_match.group(1).strip().replace("a degree in", "").strip()
-
-    known_cities = ["Lahore", "Karachi", "Islamabad", "Rawalpindi", "Faisalabad", "Peshawar", "Quetta", "Multan", "Sialkot"]
-    for city in known_cities:
-        if re.search(r'\b' + city + r'\b', text, re.IGNORECASE):
-            profile["city"] = city
-            break
-
-    location_match = re.search(r"(?:location|campus is in|located in)\s+([A-Za-z\s]+?)(?:,|\.|$)", text, re.IGNORECASE)
-    if location_match:
-        profile["location"] = location_match.group(1).strip()
-    elif profile["city"]:
-        profile["location"] = profile["city"]
-
-    # --- Fee Budget Parsing (IMPROVED LOGIC) ---
-    fee_budget_str = ""
-    
-    fee_patterns = [
-        r"((?:Rs\.?|PKR)\s*[\d,]+\.?\d*)",      # Catches "Rs. 150,000" or "PKR 200000"
-        r"([\d,]+\.?\d*\s*(?:k|lac|lakh|PKR))", # Catches "150k", "2.5 lac", "250,000 PKR"
-    ]
 
-    # First, try to find a high-confidence match.
-    for pattern in fee_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            fee_budget_str = match.group(1).strip()
-            break  # Found a good match, so we can stop.
+# --- Graph Execution ---
+
+def run_career_graph(text: str, config=None):
+    """Parse the user's career profile and run the career graph on it once."""
+    return get_career_graph().invoke(parse_career_user_info(text), config=config)
+
 
-    if not fee_budget_str:
-        fallback_match = re.search(r"(?:fee|budget|afford|cost)\D*?(\d[\d,.]*)", text, re.IGNORECASE)
-        if fallback_match:
-            fee_budget_str = fallback_match.group(1).strip()
+def run_advisor_graph(text: str, config=None):
+    """Parse the student's profile and run the advisor graph on it once."""
+    return get_advisor_graph().invoke(parse_student_unidata(text), config=config)
 
-    profile["fee_budget"] = fee_budget_str
 
-    return advisor_graph.invoke(profile)
+async def arun_career_graph(text: str, config=None):
+    """Async ``run_career_graph``, used when the supervisor runs under ``ainvoke``/``astream``."""
+    return await get_career_graph().ainvoke(parse_career_user_info(text), config=config)
+
+
+async def arun_advisor_graph(text: str, config=None):
+    """Async ``run_advisor_graph``, used when the supervisor runs under ``ainvoke``/``astream``."""
+    return await get_advisor_graph().ainvoke(parse_student_unidata(text), config=config)
+
 
 career_suggestion_tool = Tool(
     name="CareerSuggestionAgent",
@@ -176,7 +110,8 @@ career_suggestion_tool = Tool(
 
     Output: Career recommendations based on the user's profile.
     """,
-    func=lambda x: career_graph.invoke(parse_career_user_info(x))
+    func=run_career_graph,
+    coroutine=arun_career_graph
 )
 
 university_recommendations_tool = Tool(
@@ -188,7 +123,8 @@ university_recommendations_tool = Tool(
     
     Output: University recommendations based on the user's academic profile and preferences.
     """,
-    func=lambda x: advisor_graph.invoke(parse_student_unidata(x))
+    func=run_advisor_graph,
+    coroutine=arun_advisor_graph
 )
 
 # --- Tools List ---
@@ -215,24 +151,366 @@ Your responsibilities:
 -career guidance query will be including parameters like math score, biology score,etc
 -universities recommendation one will be receiving like fee budget, matric and inter marks, etc
 -just pass prompt to the respective tool call
+-if the user asks for both career guidance and universities, call both tools in the same step, each with the full prompt
 
 Reply to the user in a helpful and conversational tone, and always provide clear guidance on what information you need
 and shows everything tool returns.
 
 """
 # --- Agent Setup ---
-llm = ChatOpenAI()
+# Built on first use (or by ``warmup``), so importing this module stays cheap
+_supervisor_agent = None
+_supervisor_agent_lock = threading.Lock()
+
+
+def create_supervisor_agent():
+    """Create the supervisor react agent over the two agent tools."""
+    from langgraph.prebuilt import create_react_agent
+
+    agent = create_react_agent(
+        tools=tools,
+        # Shared, connection-pooled client from the runtime factory; repeated calls
+        # are served from the persistent response cache unless a session opts out
+        model=get_client_factory().get_llm(cache=get_response_cache()),
+        # SQLite checkpointer for supervisor agent (WAL, per-thread connections, group commit)
+        checkpointer=get_checkpointer("supervisor_graph.db")
+    )
+    # Run name in traces (create_react_agent's own ``name`` would also rename its AI messages)
+    agent.name = "supervisor"
+    return agent
+
+
+def get_supervisor_agent():
+    """Get the process-wide compiled supervisor agent"""
+    global _supervisor_agent
+    if _supervisor_agent is None:
+        with _supervisor_agent_lock:
+            if _supervisor_agent is None:
+                _supervisor_agent = create_supervisor_agent()
+    return _supervisor_agent
+
+
+def warmup() -> Dict[str, float]:
+    """
+    Build everything a first request would otherwise wait for.
+
+    Compiles the supervisor, career and advisor graphs (opening their
+    checkpoint databases and the LLM client), loads the career model and
+    compiles the input parser. Servers call it once at startup; it is safe to
+    call again and from several threads.
+
+    Returns:
+        Seconds spent per step (near zero for steps already done).
+    """
+    from career_agent.career_predictor import get_career_predictor
+
+    steps = {
+        "supervisor_agent": get_supervisor_agent,
+        "career_graph": get_career_graph,
+        "advisor_graph": get_advisor_graph,
+        "career_model": get_career_predictor,
+        "profile_extractor": lambda: profile_extractor.scan(""),
+        "telemetry": get_span_recorder,
+    }
+    timings = {}
+    for name, step in steps.items():
+        started = time.perf_counter()
+        step()
+        timings[name] = round(time.perf_counter() - started, 3)
+    logger.info("🔥 Warm-up done in %.3f s: %s", sum(timings.values()),
+                ", ".join(f"{name} {elapsed:.3f} s" for name, elapsed in timings.items()))
+    return timings
+
+
+_warmup_thread = None
+_warmup_lock = threading.Lock()
+
+
+def start_warmup() -> threading.Thread:
+    """Run ``warmup`` once per process in a background thread, so a UI can render first"""
+    global _warmup_thread
+    with _warmup_lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(target=warmup, name="warmup", daemon=True)
+            _warmup_thread.start()
+    return _warmup_thread
+
+
+# Local router that skips the supervisor LLM for clear-cut requests
+intent_router = IntentRouter()
+
+# Bounds the history sent to the supervisor LLM (recent turns + rolling summary)
+conversation_context = ConversationContext()
+
+
+# Per-turn latency of streamed answers
+stream_stats = RunCounter("turns", "ttft_s", "ttft_samples", "total_s")
+
+
+class GuidanceTurn:
+    """
+    One user message on its way to an agent.
+
+    Decides the route (clear career or university requests go straight to
+    their graph, anything else to the LLM supervisor with a bounded context),
+    builds the graph input, and turns the graph's stream chunks into guidance
+    events. Shared by the sync, async and streaming entry points below.
+
+    A request for both runs the advisor graph as the turn's graph (it is the
+    one that can pause for the user) and the career graph beside it in the
+    "cpu" pool; the two states are merged into one result.
+    """
+
+    def __init__(self, messages: list, config):
+        self.started = time.perf_counter()
+        self.ttft = None
+        self.interrupts = []
+        self.career_input = None  # set when the career graph runs beside the turn's graph
+        self.branch_s = {}
+        self.timing = LLMTimingHandler()
+        text = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+
+        decision = intent_router.route(text) if ROUTER_ENABLED else None
+        if decision:
+            logger.debug("🧭 Route: %s (confidence %s, %s ms)",
+                         decision['intent'], decision['confidence'], decision['latency_ms'])
+        intent = decision["intent"] if decision else None
+
+        if intent == CAREER:
+            self.route, self.graph, self.input, self.config = CAREER, get_career_graph(), parse_career_user_info(text), config
+            self.stream_mode = ["updates"]
+        elif intent == UNIVERSITY:
+            self.route, self.graph, self.input, self.config = UNIVERSITY, get_advisor_graph(), parse_student_unidata(text), config
+            self.stream_mode = ["updates"]
+        elif intent == BOTH:
+            self.route, self.graph, self.input, self.config = BOTH, get_advisor_graph(), parse_student_unidata(text), config
+            self.career_input = parse_career_user_info(text)
+            self.stream_mode = ["updates"]
+        else:
+            context = conversation_context.build(messages, config["configurable"].get("thread_id"))
+            logger.debug("🧮 Context: %d -> %d tokens (%d saved, %d turn(s) summarized)",
+                         context['original_tokens'], context['context_tokens'],
+                         context['tokens_saved'], context['turns_summarized'])
+            self.route, self.graph = "supervisor", get_supervisor_agent()
+            # Replace the thread's stored messages instead of appending the history again,
+            # so the checkpoint stays as bounded as the prompt
+            self.input = {"messages": [RemoveMessage(id=REMOVE_ALL_MESSAGES), *context["messages"]]}
+            self.config = {**config, "callbacks": [*(config.get("callbacks") or []), self.timing]}
+            self.stream_mode = ["messages", "updates"]
+
+    def events(self, item) -> list:
+        """Guidance events for one ``(mode, chunk)`` item of the graph's stream."""
+        mode, chunk = item
+        if mode == "messages":
+            message, metadata = chunk
+            # Only the supervisor's own answer; the agents' LLM calls stay hidden
+            if metadata.get("langgraph_node") == "agent" and "|" not in metadata.get("langgraph_checkpoint_ns", "") \
+                    and isinstance(message.content, str) and message.content:
+                if self.ttft is None:
+                    self.ttft = time.perf_counter() - self.started
+                return [("token", message.content)]
+            return []
+        events = []
+        for node, update in chunk.items():
+            if node == "__interrupt__":
+                self.interrupts.extend(update)
+                events.append(("interrupt", update[0].value))
+            elif self.route != "supervisor":
+                events.append(("tool", {"name": node, "status": "finished"}))
+            elif node == "agent":
+                for call in getattr(update["messages"][-1], "tool_calls", None) or []:
+                    events.append(("tool", {"name": call["name"], "status": "started"}))
+            elif node == "tools":
+                for message in update["messages"]:
+                    events.append(("tool", {"name": message.name, "status": "finished"}))
+        return events
+
+    def branch_done(self, name: str):
+        """Note when one of the turn's concurrent graphs finished."""
+        self.branch_s[name] = time.perf_counter() - self.started
+
+    def merge(self, career: dict, values: dict) -> dict:
+        """One result from the career and advisor states (their keys are disjoint)."""
+        return {**career, **values}
+
+    def finish(self):
+        """Record the turn's LLM time for the router statistics."""
+        if self.route == "supervisor":
+            intent_router.record_llm_time(self.timing.total_s)
+        if self.branch_s:
+            logger.debug("🔀 Parallel agents: %s",
+                         ", ".join(f"{name} {elapsed:.3f} s" for name, elapsed in self.branch_s.items()))
+
+    def done(self, values: dict) -> tuple:
+        """The final ``("done", ...)`` event, given the graph's state values after the run."""
+        self.finish()
+        total = time.perf_counter() - self.started
+        # Turns stream from several script and pool threads at once
+        if self.ttft is not None:
+            stream_stats.add(turns=1, total_s=total, ttft_s=self.ttft, ttft_samples=1)
+        else:
+            stream_stats.add(turns=1, total_s=total)
+        ttft = f"{self.ttft:.3f} s" if self.ttft is not None else "n/a"
+        logger.info("⏱️ Turn (%s): first token %s, total %.3f s", self.route, ttft, total)
+        # Same shape as invoke's output
+        result = dict(values)
+        if self.interrupts:
+            result["__interrupt__"] = self.interrupts
+        return "done", {"result": result, "route": self.route, "ttft_s": self.ttft, "total_s": total}
+
+
+def run_guidance(messages: list, config) -> tuple:
+    """
+    Answer the latest user message.
+
+    Clear career or university requests go straight to their graph; anything
+    the router is unsure about goes through the LLM supervisor, which sees the
+    system prompt, the latest turns and a summary of older ones.
+
+    Args:
+        messages: The chat messages (dicts with "role" and "content").
+        config: The run configuration with the session's thread_id.
+
+    Returns:
+        A (result, route) tuple; route is "career", "university", "both" or
+        "supervisor". A routed result is the graph's state (both graphs' states
+        merged for "both"), which may contain "__interrupt__".
+    """
+    turn = GuidanceTurn(messages, config)
+    career = _submit_career(turn)
+    result = turn.graph.invoke(turn.input, config=turn.config)
+    if career is not None:
+        turn.branch_done(UNIVERSITY)
+        result = turn.merge(career.result(), result)
+    turn.finish()
+    return result, turn.route
+
+
+async def arun_guidance(messages: list, config) -> tuple:
+    """Async ``run_guidance``; synchronous nodes and tools run in the loop's executor."""
+    turn = GuidanceTurn(messages, config)
+    if turn.career_input is None:
+        result = await turn.graph.ainvoke(turn.input, config=turn.config)
+    else:
+        career, result = await asyncio.gather(_acareer(turn), _aadvisor(turn))
+        result = turn.merge(career, result)
+    turn.finish()
+    return result, turn.route
+
+
+# --- Concurrent career inference for requests that need both agents ---
+
+def _career_branch(turn: GuidanceTurn) -> dict:
+    result = get_career_graph().invoke(turn.career_input, config=turn.config)
+    turn.branch_done(CAREER)
+    return result
+
+
+def _submit_career(turn: GuidanceTurn):
+    """Start the turn's career graph on a "cpu" pool thread (None if it has none)."""
+    if turn.career_input is None:
+        return None
+    return get_executor("cpu").submit(copy_context().run, _career_branch, turn)
+
+
+async def _acareer(turn: GuidanceTurn) -> dict:
+    return await run_in_pool("cpu", _career_branch, turn)
+
 
-# Create a checkpointer for the supervisor agent
-from langgraph.checkpoint.sqlite import SqliteSaver
-import sqlite3
+async def _aadvisor(turn: GuidanceTurn) -> dict:
+    result = await turn.graph.ainvoke(turn.input, config=turn.config)
+    turn.branch_done(UNIVERSITY)
+    return result
 
-# SQLite checkpointer for supervisor agent
-supervisor_db = sqlite3.connect("supervisor_graph.db", check_same_thread=False)
-supervisor_memorybox = SqliteSaver(supervisor_db)
 
-supervisor_agent = create_react_agent(
-    tools=tools,
-    model=llm,
-    checkpointer=supervisor_memorybox
-) 
\ No newline at end of file
+# --- Streaming ---
+
+def stream_guidance(messages: list, config):
+    """
+    Answer the latest user message, yielding progress as it happens.
+
+    Routing and context bounding are the same as in ``run_guidance``. Events
+    are ``(kind, payload)`` tuples:
+
+    - ``("route", route)``: where the message is going
+    - ``("token", text)``: a piece of the supervisor's answer
+    - ``("tool", {"name", "status"})``: an agent tool or graph step started/finished
+    - ``("interrupt", value)``: the run paused for the user
+    - ``("done", {"result", "route", "ttft_s", "total_s"})``: always last; result
+      has the same shape as ``run_guidance``'s, including "__interrupt__"
+
+    Args:
+        messages: The chat messages (dicts with "role" and "content").
+        config: The run configuration with the session's thread_id.
+    """
+    turn = GuidanceTurn(messages, config)
+    yield "route", turn.route
+    career = _submit_career(turn)
+    if career is not None:
+        yield "tool", {"name": "CareerSuggestionAgent", "status": "started"}
+    for item in turn.graph.stream(turn.input, config=turn.config, stream_mode=turn.stream_mode):
+        yield from turn.events(item)
+    values = turn.graph.get_state(turn.config).values
+    if career is not None:
+        turn.branch_done(UNIVERSITY)
+        values = turn.merge(career.result(), values)
+        yield "tool", {"name": "CareerSuggestionAgent", "status": "finished"}
+    yield turn.done(values)
+
+
+async def astream_guidance(messages: list, config):
+    """Async ``stream_guidance``, yielding the same events."""
+    turn = GuidanceTurn(messages, config)
+    yield "route", turn.route
+    career = asyncio.ensure_future(_acareer(turn)) if turn.career_input is not None else None
+    try:
+        if career is not None:
+            yield "tool", {"name": "CareerSuggestionAgent", "status": "started"}
+        async for item in turn.graph.astream(turn.input, config=turn.config, stream_mode=turn.stream_mode):
+            for event in turn.events(item):
+                yield event
+        values = (await turn.graph.aget_state(turn.config)).values
+        if career is not None:
+            turn.branch_done(UNIVERSITY)
+            values = turn.merge(await career, values)
+            yield "tool", {"name": "CareerSuggestionAgent", "status": "finished"}
+    finally:
+        if career is not None and not career.done():
+            career.cancel()
+    yield turn.done(values)
+
+
+def resume_supervisor(config, response: str):
+    """
+    Continue the interrupted supervisor run of a thread from its checkpoint.
+
+    The agents run nested inside the supervisor, so their interrupts are stored
+    in the supervisor's checkpoint and the paused agent picks up where it stopped.
+
+    Args:
+        config: The run configuration holding the thread_id of the interrupted run.
+        response: The user's answer to the interrupt.
+
+    Returns:
+        The supervisor result, with "__interrupt__" if the run pauses again.
+    """
+    agent = get_supervisor_agent()
+    snapshot = agent.get_state(config)
+    if not snapshot.interrupts:
+        raise NothingToResumeError(f"No interrupted run for thread {config['configurable'].get('thread_id')}")
+    return agent.invoke(Command(resume=response), config=config)
+
+
+def resume_guidance(route: str, config, response: str):
+    """
+    Continue the interrupted run of a turn that took ``route``.
+
+    Routed university turns resume the advisor graph; a turn that ran both
+    agents resumes the advisor graph and merges in the career graph's stored
+    result; anything else resumes the supervisor.
+    """
+    if route == UNIVERSITY:
+        return resume_advisor(config, response)
+    if route == BOTH:
+        return {**get_career_graph().get_state(config).values, **resume_advisor(config, response)}
+    return resume_supervisor(config, response)
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Bounded conversation context for the supervisor
+Keeps the system prompt and the latest turns verbatim, folds older turns into
+a cached rolling summary and holds every request to a token budget
+"""
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, TypedDict
+
+from advisor_agent.context_compressor import estimate_tokens
+from profile_extractor import profile_extractor
+
+# Most recent user turns (with their replies) sent verbatim
+SUPERVISOR_KEEP_TURNS = int(os.getenv("SUPERVISOR_KEEP_TURNS", "3"))
+# Hard limit on the estimated prompt tokens of one supervisor request
+SUPERVISOR_TOKEN_BUDGET = int(os.getenv("SUPERVISOR_TOKEN_BUDGET", "2000"))
+# Room given to the rolling summary of older turns
+SUPERVISOR_SUMMARY_TOKENS = int(os.getenv("SUPERVISOR_SUMMARY_TOKENS", "300"))
+# Replies longer than this are reduced to their key fields
+SUPERVISOR_TOOL_OUTPUT_TOKENS = int(os.getenv("SUPERVISOR_TOOL_OUTPUT_TOKENS", "150"))
+# Threads whose summaries are cached
+SUPERVISOR_SUMMARY_CACHE_SIZE = int(os.getenv("SUPERVISOR_SUMMARY_CACHE_SIZE", "256"))
+
+_UNIVERSITY_ROW_RE = re.compile(r"\d+\.\s+\*\*(.+?)\*\*\s*\n\s*💰 Fee:\s*(.+?)\s*\n\s*📊 Min Marks:\s*(.+?)\s*\n")
+_CAREER_ROW_RE = re.compile(r"^\d+\.\s+\*\*(.+?)\*\*", re.MULTILINE)
+_BEST_MATCH_RE = re.compile(r"Best Match:\s*\n\*\*(.+?)\*\*")
+
+# Profile fields carried in the summary, in display order
+_PROFILE_LABELS = [
+    ("matric_marks", "matric"), ("inter_marks", "inter"), ("city", "city"),
+    ("fee_budget", "budget"), ("math_score", "math score"), ("bio_score", "biology score"),
+]
+_INTEREST_LABELS = [
+    ("interest_tech", "technology"), ("interest_art", "art"), ("group_work", "group work"),
+    ("logical_thinking", "logical thinking"), ("likes_speaking", "speaking"),
+]
+
+
+class ContextResult(TypedDict):
+    messages: List[dict]
+    original_tokens: int
+    context_tokens: int
+    tokens_saved: int
+    turns_kept: int
+    turns_summarized: int
+
+
+def message_tokens(message: dict) -> int:
+    """Estimated tokens of one chat message, with a little overhead for the role."""
+    return estimate_tokens(str(message.get("content", ""))) + 4
+
+
+def _truncate(text: str, tokens: int) -> str:
+    limit = max(0, tokens) * 4
+    return text if len(text) <= limit else text[:max(0, limit - 1)].rstrip() + "…"
+
+
+def compress_reply(content: str, max_tokens: int = SUPERVISOR_TOOL_OUTPUT_TOKENS) -> str:
+    """
+    Reduce a bulky reply to its key fields.
+
+    Formatted university and career recommendations keep only names, fees,
+    minimum marks and the best match; any other long reply is truncated.
+    """
+    if estimate_tokens(content) <= max_tokens:
+        return content
+    if "University Recommendations" in content:
+        rows = _UNIVERSITY_ROW_RE.findall(content)
+        if rows:
+            listed = "; ".join(f"{name} (fee {fee}, min marks {marks})" for name, fee, marks in rows)
+            return _truncate(f"Recommended universities: {listed}", max_tokens)
+    if "Career Recommendations" in content:
+        careers = _CAREER_ROW_RE.findall(content)
+        best = _BEST_MATCH_RE.search(content)
+        if careers or best:
+            summary = f"Recommended careers: {', '.join(careers)}" if careers else "Career recommendations"
+            if best:
+                summary += f"; best match: {best.group(1)}"
+            return _truncate(summary, max_tokens)
+    return _truncate(content, max_tokens)
+
+
+def split_turns(messages: List[dict]) -> tuple:
+    """
+    Split chat messages into system messages and turns.
+
+    A turn is a user message followed by the replies to it; replies before the
+    first user message form a turn of their own.
+    """
+    system, turns = [], []
+    for message in messages:
+        if message.get("role") == "system":
+            system.append(message)
+        elif message.get("role") == "user" or not turns:
+            turns.append([message])
+        else:
+            turns[-1].append(message)
+    return system, turns
+
+
+class _RollingSummary:
+    """Facts and outcomes folded in from older turns of one thread."""
+
+    def __init__(self):
+        self.turns = 0                         # turns folded in so far
+        self.last_turn: Optional[tuple] = None  # identity of the last folded turn
+        self.profile: Dict[str, object] = {}
+        self.outcomes: List[str] = []
+
+    def copy(self) -> "_RollingSummary":
+        summary = _RollingSummary()
+        summary.turns, summary.last_turn = self.turns, self.last_turn
+        summary.profile, summary.outcomes = dict(self.profile), list(self.outcomes)
+        return summary
+
+    def fold(self, turn: List[dict]):
+        for message in turn:
+            content = str(message.get("content", ""))
+            if message.get("role") == "user":
+                # Later messages override earlier values
+                self.profile.update(profile_extractor.scan(content))
+            elif content:
+                self.outcomes.append(compress_reply(content, SUPERVISOR_TOOL_OUTPUT_TOKENS // 2))
+        self.turns += 1
+        self.last_turn = _turn_key(turn)
+
+    def render(self, max_tokens: int) -> str:
+        facts = [f"{label} {self.profile[key]}" for key, label in _PROFILE_LABELS if key in self.profile]
+        interests = [label for key, label in _INTEREST_LABELS if self.profile.get(key)]
+        if interests:
+            facts.append("interests: " + ", ".join(interests))
+        lines = [f"Summary of {self.turns} earlier turn(s)."]
+        if facts:
+            lines.append("Student profile so far: " + "; ".join(facts) + ".")
+        # Newest outcomes first, as many as fit
+        header = estimate_tokens("\n".join(lines))
+        kept: List[str] = []
+        for outcome in reversed(self.outcomes):
+            cost = estimate_tokens(outcome) + 1
+            if header + cost > max_tokens:
+                break
+            kept.insert(0, f"- {outcome}")
+            header += cost
+        if kept:
+            lines.append("Earlier answers:")
+            lines.extend(kept)
+        return _truncate("\n".join(lines), max_tokens)
+
+
+def _turn_key(turn: List[dict]) -> tuple:
+    return tuple((m.get("role"), str(m.get("content", ""))) for m in turn)
+
+
+class ConversationContext:
+    """
+    Builds the bounded message list sent to the supervisor LLM.
+
+    The system prompt and the last ``keep_turns`` turns go in verbatim (bulky
+    replies reduced to their key fields). Older turns are folded into a rolling
+    summary that is cached per thread, so each turn is summarized only once as
+    it leaves the window. If the result still exceeds ``token_budget``, older
+    kept turns are folded into the summary too, then the summary and finally
+    the latest message are truncated.
+    """
+
+    def __init__(self, keep_turns: int = SUPERVISOR_KEEP_TURNS,
+                 token_budget: int = SUPERVISOR_TOKEN_BUDGET,
+                 summary_tokens: int = SUPERVISOR_SUMMARY_TOKENS,
+                 cache_size: int = SUPERVISOR_SUMMARY_CACHE_SIZE):
+        self.keep_turns = max(1, keep_turns)
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens
+        self.cache_size = cache_size
+        self._summaries: "OrderedDict[str, _RollingSummary]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "original_tokens": 0, "context_tokens": 0, "tokens_saved": 0,
+                       "turns_summarized": 0, "summary_cache_hits": 0, "summary_rebuilds": 0}
+
+    def _summary_for(self, thread_id: Optional[str], older: List[List[dict]]) -> _RollingSummary:
+        """
+        Summary of ``older``: the cached one, extended with any turns not folded in yet.
+
+        The cached summary is only touched under the lock; the caller gets a
+        private copy it may fold more turns into.
+        """
+        with self._lock:
+            summary = self._summaries.get(thread_id) if thread_id else None
+            cached = (summary is not None and summary.turns <= len(older)
+                      and (summary.turns == 0 or summary.last_turn == _turn_key(older[summary.turns - 1])))
+            if cached:
+                self._summaries.move_to_end(thread_id)
+                self._stats["summary_cache_hits"] += 1
+            else:
+                # New thread, or the history was replaced (e.g. a loaded session)
+                summary = _RollingSummary()
+                self._stats["summary_rebuilds"] += 1
+            for turn in older[summary.turns:]:
+                summary.fold(turn)
+            if thread_id:
+                self._summaries[thread_id] = summary
+                while len(self._summaries) > self.cache_size:
+                    self._summaries.popitem(last=False)
+            return summary.copy()
+
+    def build(self, messages: List[dict], thread_id: Optional[str] = None) -> ContextResult:
+        """
+        Bound ``messages`` for one supervisor request.
+
+        Args:
+            messages: The full chat history (dicts with "role" and "content").
+            thread_id: Conversation the rolling summary is cached under.
+
+        Returns:
+            The messages to send together with token accounting.
+        """
+        original_tokens = sum(message_tokens(m) for m in messages)
+        system, turns = split_turns(messages)
+        keep = min(self.keep_turns, len(turns))
+        kept = [[{**m, "content": compress_reply(str(m.get("content", "")))} if m.get("role") != "user" else m
+                 for m in turn] for turn in turns[len(turns) - keep:]]
+        fixed_tokens = sum(message_tokens(m) for m in system)
+
+        # Fold kept turns into the summary while over budget; the latest turn always stays
+        older = turns[:len(turns) - keep]
+        summary = self._summary_for(thread_id, older) if older else None
+        while True:
+            summary_text = summary.render(self.summary_tokens) if summary else ""
+            summary_cost = estimate_tokens(summary_text) + 4 if summary_text else 0
+            kept_cost = sum(message_tokens(m) for turn in kept for m in turn)
+            if fixed_tokens + summary_cost + kept_cost <= self.token_budget or len(kept) <= 1:
+                break
+            # Folded into this request's copy only; the cache holds the turns outside the window
+            summary = summary or _RollingSummary()
+            summary.fold(turns[len(turns) - len(kept)])
+            kept = kept[1:]
+
+        # Still over budget: shrink the summary, then the latest turn
+        over = fixed_tokens + summary_cost + kept_cost - self.token_budget
+        if over > 0 and summary_text:
+            summary_text = _truncate(summary_text, max(0, estimate_tokens(summary_text) - over))
+            summary_cost = estimate_tokens(summary_text) + 4 if summary_text else 0
+            over = fixed_tokens + summary_cost + kept_cost - self.token_budget
+        if over > 0 and kept:
+            latest = kept[-1]
+            for i, message in enumerate(latest):
+                if over <= 0:
+                    break
+                tokens = estimate_tokens(str(message.get("content", "")))
+                latest[i] = {**message, "content": _truncate(str(message.get("content", "")), max(16, tokens - over))}
+                over -= tokens - estimate_tokens(latest[i]["content"])
+
+        context = list(system)
+        if summary_text:
+            context.append({"role": "system", "content": summary_text})
+        for turn in kept:
+            context.extend(turn)
+
+        context_tokens = sum(message_tokens(m) for m in context)
+        result = ContextResult(
+            messages=context,
+            original_tokens=original_tokens,
+            context_tokens=context_tokens,
+            tokens_saved=max(0, original_tokens - context_tokens),
+            turns_kept=len(kept),
+            turns_summarized=len(turns) - len(kept),
+        )
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["original_tokens"] += original_tokens
+            self._stats["context_tokens"] += context_tokens
+            self._stats["tokens_saved"] += result["tokens_saved"]
+            self._stats["turns_summarized"] += result["turns_summarized"]
+        return result
+
+    def forget(self, thread_id: str):
+        """Drop the cached summary of a thread (e.g. when a chat is cleared)."""
+        with self._lock:
+            self._summaries.pop(thread_id, None)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get cumulative token savings and summary cache counters."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["cached_threads"] = len(self._summaries)
+        return stats
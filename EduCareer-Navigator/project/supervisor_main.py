@@ -11,16 +11,28 @@ import shutil
 import atexit
 import sys
 from pathlib import Path
-from langgraph.types import Command
 
 # Add current directory to path for imports
 sys.path.append(str(Path(__file__).parent))
 
-from supervisor_agent import supervisor_agent, system_prompt
+from supervisor_agent import system_prompt, stream_guidance, resume_guidance, conversation_context, start_warmup
+from runtime.clients import close_client_factory
+from runtime.llm_cache import CACHE_OPT_OUT_KEY, get_response_cache, close_response_cache
+from runtime.retention import start_retention_scheduler
+from runtime.telemetry import setup_telemetry, close_span_recorder
+
+# Log level from LOG_LEVEL; with TELEMETRY_ENABLED, spans go to the trace file
+setup_telemetry()
+
+# Prune, compact and vacuum checkpoint databases in the background (starts once per process)
+start_retention_scheduler()
+
+# Build the graphs and load the career model while the first page renders (once per process)
+start_warmup()
 
 # MongoDB Integration
 try:
-    from database.mongodb_client import get_chat_db, close_chat_db
+    from database.mongodb_client import get_chat_db, close_chat_db, get_chat_writer
     MONGODB_AVAILABLE = True
 except ImportError:
     MONGODB_AVAILABLE = False
@@ -53,6 +65,18 @@ if "tool_result" not in st.session_state:
 if "config" not in st.session_state:
     st.session_state.config = None
 
+# Which graph answered the last message ("career", "university" or "supervisor")
+if "route" not in st.session_state:
+    st.session_state.route = None
+
+# Time to first token and total latency of the last answered message
+if "turn_timing" not in st.session_state:
+    st.session_state.turn_timing = None
+
+# Whether supervisor LLM calls may be answered from the response cache
+if "llm_cache" not in st.session_state:
+    st.session_state.llm_cache = True
+
 if "user_id" not in st.session_state:
     # Try to get existing user ID from database, otherwise use fixed test user ID
     try:
@@ -75,6 +99,17 @@ if "user_id" not in st.session_state:
 if "chat_db" not in st.session_state:
     st.session_state.chat_db = None
 
+# Cursor of the next older page of the loaded thread (None when it is fully loaded)
+if "history_cursor" not in st.session_state:
+    st.session_state.history_cursor = None
+
+# Messages at the start of the chat that came from the database, and the position
+# "Save Session" numbers the messages after them from (see save_chat_session)
+if "history_loaded" not in st.session_state:
+    st.session_state.history_loaded = 0
+if "save_start_order" not in st.session_state:
+    st.session_state.save_start_order = 0
+
 
 
 # Try to auto-load last session (will be called after functions are defined)
@@ -92,25 +127,40 @@ def cleanup_temp_dir():
 atexit.register(cleanup_temp_dir)
 
 def cleanup_mongodb():
-    """Clean up MongoDB connection."""
-    if MONGODB_AVAILABLE and st.session_state.chat_db is not None:
+    """Write buffered chat messages and clean up MongoDB connection."""
+    if MONGODB_AVAILABLE:
         try:
+            # Runs at interpreter exit, outside any session (no st.session_state)
             close_chat_db()
-            st.session_state.chat_db = None
         except Exception:
             pass
 
 atexit.register(cleanup_mongodb)
 
+def cleanup_clients():
+    """Close the shared LLM connection pool, response cache and trace file."""
+    try:
+        close_client_factory()
+        close_response_cache()
+        close_span_recorder()
+    except Exception:
+        pass
+
+atexit.register(cleanup_clients)
+
 def reset_session():
     """Reset the session state."""
     cleanup_temp_dir()
+    conversation_context.forget(st.session_state.thread_id)
     st.session_state.messages = [{"role": "system", "content": system_prompt}]
     st.session_state.thread_id = str(uuid.uuid4())
     st.session_state.temp_dir = tempfile.mkdtemp(prefix=f"guidance_assistant_{st.session_state.thread_id}_")
     st.session_state.interrupted = False
     st.session_state.tool_result = None
     st.session_state.config = None
+    st.session_state.history_cursor = None
+    st.session_state.history_loaded = 0
+    st.session_state.save_start_order = 0
     # Don't change user_id to maintain session persistence
 
 def get_chat_database():
@@ -128,23 +178,25 @@ def get_chat_database():
     return st.session_state.chat_db
 
 def save_chat_message(role: str, content: str, metadata: dict = None):
-    """Save a chat message to MongoDB."""
-    db = get_chat_database()
-    if not db:
+    """Queue a chat message for MongoDB; a background writer stores it in batches."""
+    if not MONGODB_AVAILABLE:
         return None
     
-    try:
-        message_id = db.save_chat_message(
-            thread_id=st.session_state.thread_id,
-            role=role,
-            content=content,
-            user_id=st.session_state.user_id,
-            metadata=metadata or {}
-        )
-        return message_id
-    except Exception as e:
-        st.error(f"Failed to save chat message: {e}")
-        return None
+    message_id = get_chat_writer().enqueue(
+        thread_id=st.session_state.thread_id,
+        role=role,
+        content=content,
+        user_id=st.session_state.user_id,
+        metadata=metadata or {}
+    )
+    if message_id is None:
+        st.warning("⚠️ Chat history buffer is full; message not saved")
+    return message_id
+
+def flush_chat_messages():
+    """Write queued chat messages before reading history, so it includes them."""
+    if MONGODB_AVAILABLE:
+        get_chat_writer().flush(timeout=5)
 
 def save_chat_session():
     """Save the entire current chat session to MongoDB."""
@@ -155,15 +207,17 @@ def save_chat_session():
     try:
         # Filter out system messages
         messages_to_save = [msg for msg in st.session_state.messages if msg.get("role") != "system"]
+        # A loaded page is only a window of the thread and already stored; save what came after
+        # it, numbered after the thread's saved messages so no position is reused
+        messages_to_save = messages_to_save[st.session_state.history_loaded:]
         
-        if messages_to_save:
-            message_ids = db.save_chat_session(
-                thread_id=st.session_state.thread_id,
-                messages=messages_to_save,
-                user_id=st.session_state.user_id,
-                metadata={"session_type": "guidance_assistant"}
-            )
-            return message_ids
+        return db.save_chat_session(
+            thread_id=st.session_state.thread_id,
+            messages=messages_to_save,
+            user_id=st.session_state.user_id,
+            metadata={"session_type": "guidance_assistant"},
+            start_order=st.session_state.save_start_order
+        )
     except Exception as e:
         st.error(f"Failed to save chat session: {e}")
         return None
@@ -175,6 +229,7 @@ def load_chat_history(thread_id: str = None):
         return []
     
     try:
+        flush_chat_messages()
         target_thread_id = thread_id or st.session_state.thread_id
         history = db.get_chat_history(target_thread_id)
         return history
@@ -186,33 +241,52 @@ def load_chat_history(thread_id: str = None):
 
 
 
+def load_latest_session() -> int:
+    """
+    Load the newest page of the current user's most recent thread.
+    
+    Returns the number of messages loaded; older pages are fetched on demand
+    by load_older_messages.
+    """
+    db = get_chat_database()
+    if not db:
+        return 0
+    
+    flush_chat_messages()
+    thread_id = db.get_latest_thread_id(st.session_state.user_id)
+    if thread_id is None:
+        return 0
+    page = db.get_chat_history_page(thread_id)
+    
+    # Continue the loaded conversation in its own thread
+    st.session_state.thread_id = thread_id
+    st.session_state.messages = [{"role": "system", "content": system_prompt}] + page["messages"]
+    st.session_state.history_cursor = page["next_cursor"]
+    st.session_state.history_loaded = len(page["messages"])
+    st.session_state.save_start_order = db.next_message_order(thread_id)
+    return len(page["messages"])
+
+def load_older_messages() -> int:
+    """Prepend the previous page of the current thread to the chat."""
+    db = get_chat_database()
+    if not db or not st.session_state.history_cursor:
+        return 0
+    
+    page = db.get_chat_history_page(st.session_state.thread_id, before=st.session_state.history_cursor)
+    st.session_state.messages[1:1] = page["messages"]
+    st.session_state.history_cursor = page["next_cursor"]
+    st.session_state.history_loaded += len(page["messages"])
+    return len(page["messages"])
+
 def auto_load_last_session():
-    """Automatically load all chat history if available."""
+    """Automatically load the user's last chat session if available."""
     if not MONGODB_AVAILABLE:
         return False
     
-    # Simple approach: just load all messages if we only have system message
-    if len(st.session_state.messages) <= 1:  # Only system message
+    # Only on a fresh page, when we have nothing but the system message
+    if len(st.session_state.messages) <= 1:
         try:
-            db = get_chat_database()
-            if db:
-                # Get ALL messages from database, sorted by timestamp
-                all_messages = list(db.chat_collection.find().sort("timestamp", 1))
-                
-                if all_messages:
-                    # Clear current messages and load all from database
-                    st.session_state.messages = [{"role": "system", "content": system_prompt}]
-                    
-                    for msg in all_messages:
-                        st.session_state.messages.append({
-                            "role": msg["role"],
-                            "content": msg["content"]
-                        })
-                    
-                    # Update thread ID to the most recent one
-                    st.session_state.thread_id = all_messages[-1]['thread_id']
-                    
-                    return True
+            return load_latest_session() > 0
         except Exception as e:
             pass
     
@@ -279,6 +353,17 @@ def format_university_response(response):
     
     return formatted_response
 
+def format_combined_response(result):
+    """Format one answer from career and university results of the same request."""
+    career = format_career_response({"success": True, "result": result})
+    university = format_university_response({"success": True, "result": result})
+    return f"{career}\n---\n\n{university}"
+
+def is_combined_result(result):
+    """Whether a result holds both career and university recommendations."""
+    return ("career_recommendations" in result or "final_recommendation" in result) \
+        and ("universities" in result or "ranked_universities" in result)
+
 def handle_tool_result(result):
     """Handle tool results and check for interrupts."""
     if "__interrupt__" in result:
@@ -354,34 +439,8 @@ def display_interrupt_interface():
             if st.form_submit_button("🚀 Continue", use_container_width=True):
                 try:
                     with st.spinner("▶️ Processing your choice..."):
-                        # Resume the tool that was interrupted
-                        if st.session_state.tool_result and "tools" in st.session_state.tool_result:
-                            tool_result = st.session_state.tool_result
-                            
-                            if "UniversityRecommendationsAgent" in str(tool_result):
-                                from advisor_agent.graphsetup import create_advisor_graph
-                                advisor_graph = create_advisor_graph()
-                                resumed = advisor_graph.invoke(
-                                    Command(resume=response),
-                                    config=st.session_state.config
-                                )
-                            elif "CareerSuggestionAgent" in str(tool_result):
-                                from career_agent.career_graph import create_career_graph
-                                career_graph = create_career_graph()
-                                resumed = career_graph.invoke(
-                                    Command(resume=response),
-                                    config=st.session_state.config
-                                )
-                            else:
-                                resumed = supervisor_agent.invoke(
-                                    Command(resume=response),
-                                    config=st.session_state.config
-                                )
-                        else:
-                            resumed = supervisor_agent.invoke(
-                                Command(resume=response),
-                                config=st.session_state.config
-                            )
+                        # Resume the interrupted run from its checkpoint
+                        resumed = resume_guidance(st.session_state.route, st.session_state.config, response)
                         
                         if "__interrupt__" in resumed:
                             st.session_state.tool_result = resumed
@@ -394,7 +453,10 @@ def display_interrupt_interface():
                                 st.session_state.messages.append({"role": "assistant", "content": assistant_content})
                             elif resumed:
                                 if isinstance(resumed, dict):
-                                    if "universities" in resumed or "ranked_universities" in resumed:
+                                    if is_combined_result(resumed):
+                                        assistant_content = format_combined_response(resumed)
+                                        st.session_state.messages.append({"role": "assistant", "content": assistant_content})
+                                    elif "universities" in resumed or "ranked_universities" in resumed:
                                         assistant_content = format_university_response({"success": True, "result": resumed})
                                         st.session_state.messages.append({"role": "assistant", "content": assistant_content})
                                     elif "career_recommendations" in resumed or "final_recommendation" in resumed:
@@ -484,57 +546,53 @@ with st.sidebar:
         st.session_state.tool_result = None
         st.rerun()
     
+    if st.session_state.turn_timing:
+        timing = st.session_state.turn_timing
+        first_token = f"{timing['ttft_s']:.2f}s" if timing["ttft_s"] is not None else "n/a"
+        st.caption(f"⏱️ Last answer: first token {first_token}, total {timing['total_s']:.2f}s")
+    
+    st.toggle("⚡ Reuse cached answers", key="llm_cache",
+              help="Answer repeated questions from the response cache instead of calling the LLM again")
+    response_cache = get_response_cache()
+    if response_cache is not None:
+        cache_stats = response_cache.get_stats()
+        st.caption(f"🗄️ Response cache: {cache_stats['hits']} hits, hit rate {cache_stats['hit_rate']:.0%}")
+    
     # MongoDB Chat History Controls
     if MONGODB_AVAILABLE:
         st.markdown("---")
         st.markdown("## 💾 Chat History")
         
         if st.button("💾 Save Session", use_container_width=True):
-            message_ids = save_chat_session()
-            if message_ids:
-                st.success(f"✅ Session saved with {len(message_ids)} messages")
+            saved = save_chat_session()
+            if saved:
+                st.success(f"✅ Session saved: {saved['inserted']} new message(s), "
+                           f"{saved['skipped']} already saved")
             else:
                 st.error("❌ Failed to save session")
              
-        # Simple button to load all chat history
-        if st.button("📚 Load All Chat History", use_container_width=True):
+        # Load the newest page of the user's last session; older pages load from the chat
+        if st.button("📚 Load Last Session", use_container_width=True):
             try:
-                db = get_chat_database()
-                if db:
-                    # Get ALL messages from database, sorted by timestamp
-                    all_messages = list(db.chat_collection.find().sort("timestamp", 1))
-                    
-                    if all_messages:
-                        # Clear current messages and load all from database
-                        st.session_state.messages = [{"role": "system", "content": system_prompt}]
-                        
-                        for msg in all_messages:
-                            st.session_state.messages.append({
-                                "role": msg["role"],
-                                "content": msg["content"]
-                            })
-                        
-                        # Update thread ID to the most recent one
-                        if all_messages:
-                            st.session_state.thread_id = all_messages[-1]['thread_id']
-                        
-                        st.success(f"✅ Loaded {len(all_messages)} messages from database")
-                        st.rerun()
-                    else:
-                        st.warning("No messages found in database")
+                loaded = load_latest_session()
+                if loaded:
+                    st.success(f"✅ Loaded {loaded} messages from database")
+                    st.rerun()
                 else:
-                    st.error("No database connection")
+                    st.warning("No messages found in database")
             except Exception as e:
                 st.error(f"Error loading chat history: {e}")
         
-
-        
         # Show MongoDB status
         db = get_chat_database()
         if db is not None:
             st.success("🟢 MongoDB Connected")
         else:
             st.error("🔴 MongoDB Disconnected")
+        writer_stats = get_chat_writer().get_stats()
+        flush_p95 = writer_stats["flush_ms"]["p95"]
+        st.caption(f"📝 Write-behind: {writer_stats['queue_depth']} queued, {writer_stats['written']} written, "
+                   f"flush p95 {f'{flush_p95:.0f} ms' if flush_p95 is not None else 'n/a'}")
         
 
     
@@ -615,6 +673,15 @@ st.markdown("### 💬 Chat with Your Guidance Assistant")
 if st.session_state.interrupted:
     display_interrupt_interface()
 else:
+    # Older messages of a loaded session are fetched a page at a time
+    if st.session_state.history_cursor:
+        if st.button("⬆️ Load older messages"):
+            try:
+                load_older_messages()
+            except Exception as e:
+                st.error(f"Error loading older messages: {e}")
+            st.rerun()
+    
     # Display chat messages
     for msg in st.session_state.messages:
         if msg["role"] == "system":
@@ -643,16 +710,34 @@ else:
             save_chat_message("user", prompt, {"session_type": "guidance_assistant"})
         
         try:
-            with st.spinner("🤔 Analyzing your request..."):
-                # Store config for potential interrupt handling
-                config = {"configurable": {"thread_id": st.session_state.thread_id}}
-                st.session_state.config = config
-                
-                # Invoke the supervisor agent
-                result = supervisor_agent.invoke(
-                    {"messages": st.session_state.messages},
-                    config=config
-                )
+            # Store config for potential interrupt handling
+            config = {"configurable": {"thread_id": st.session_state.thread_id,
+                                       CACHE_OPT_OUT_KEY: st.session_state.llm_cache}}
+            st.session_state.config = config
+            result = None
+            
+            # Stream the answer: tokens as they arrive, tool steps in a status box
+            with st.chat_message("assistant"):
+                status = st.status("🤔 Analyzing your request...")
+                answer = st.empty()
+                streamed = ""
+                for kind, payload in stream_guidance(st.session_state.messages, config):
+                    if kind == "route":
+                        st.session_state.route = payload
+                        status.update(label=f"🧭 Working on it ({payload})...")
+                    elif kind == "tool":
+                        status.write(f"🔧 {payload['name']}: {payload['status']}")
+                    elif kind == "token":
+                        streamed += payload
+                        answer.markdown(streamed + "▌")
+                    elif kind == "interrupt":
+                        status.update(label="✋ Waiting for your decision", state="complete")
+                    elif kind == "done":
+                        result = payload["result"]
+                        st.session_state.turn_timing = {"ttft_s": payload["ttft_s"], "total_s": payload["total_s"]}
+                        if "__interrupt__" not in result:
+                            status.update(label=f"✅ Done in {payload['total_s']:.1f}s", state="complete", expanded=False)
+                answer.markdown(streamed)
             
             # Check for interrupts first
             if handle_tool_result(result):
@@ -693,7 +778,15 @@ else:
             elif result:
                 # Handle direct tool results
                 if isinstance(result, dict):
-                    if "universities" in result or "ranked_universities" in result:
+                    if is_combined_result(result):
+                        assistant_content = format_combined_response(result)
+                        st.session_state.messages.append({"role": "assistant", "content": assistant_content})
+                        
+                        # Save assistant message to MongoDB
+                        if MONGODB_AVAILABLE:
+                            save_chat_message("assistant", assistant_content, {"session_type": "guidance_assistant"})
+                            
+                    elif "universities" in result or "ranked_universities" in result:
                         assistant_content = format_university_response({"success": True, "result": result})
                         st.session_state.messages.append({"role": "assistant", "content": assistant_content})
                         
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Local intent router for the supervisor
+Sends clear career or university requests straight to their graph and leaves
+only ambiguous messages to the LLM supervisor
+"""
+
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple, TypedDict
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Minimum confidence for dispatching without the LLM
+ROUTER_CONFIDENCE_THRESHOLD = float(os.getenv("ROUTER_CONFIDENCE_THRESHOLD", "0.85"))
+# Set to false to send every message through the LLM supervisor
+ROUTER_ENABLED = os.getenv("ROUTER_ENABLED", "true").lower() == "true"
+# Blend the keyword rules with the small naive Bayes classifier below
+ROUTER_USE_CLASSIFIER = os.getenv("ROUTER_USE_CLASSIFIER", "true").lower() == "true"
+# Rule evidence each intent needs before a message counts as asking for both
+ROUTER_MULTI_INTENT_MIN = float(os.getenv("ROUTER_MULTI_INTENT_MIN", "2.0"))
+
+CAREER = "career"
+UNIVERSITY = "university"
+BOTH = "both"
+AMBIGUOUS = "ambiguous"
+
+# (signal name, pattern, weight); weights are in log-odds units
+UNIVERSITY_SIGNALS = [
+    ("matric_marks", r"\b(?:matric|matriculation|ssc)\b", 2.0),
+    ("inter_marks", r"\b(?:inter|intermediate|fsc|hssc|a[- ]levels?)\b", 1.5),
+    ("fee_budget", r"\b(?:fee|fees|budget|afford|tuition|semester)\b|\b(?:rs\.?|pkr)\s*\d|\d\s*(?:k|lac|lakh|pkr)\b", 2.0),
+    ("admission", r"\b(?:universit(?:y|ies)|admissions?|campus|merit|degree|bachelors?|bs|undergraduate)\b", 1.5),
+    ("city", r"\b(?:lahore|karachi|islamabad|rawalpindi|faisalabad|peshawar|quetta|multan|sialkot)\b", 1.0),
+    ("study", r"\b(?:study|major in|degree in)\b", 0.5),
+]
+
+CAREER_SIGNALS = [
+    ("math_score", r"\bmath(?:s|ematics)?\s+score\b|\bscore\s+in\s+math", 2.0),
+    ("bio_score", r"\bbio(?:logy)?\s+score\b|\bscore\s+in\s+bio", 2.0),
+    ("career", r"\b(?:careers?|professions?|jobs?|occupations?|field of work)\b", 2.0),
+    ("interests", r"\b(?:interested in (?:tech|technology|art)|artistic|creative|technology)\b", 1.0),
+    ("work_style", r"\b(?:group work|teamwork|logical thinking|problem-solving|public speaking|presentations|speaking)\b", 1.0),
+]
+
+# Seed examples for the naive Bayes classifier
+_TRAINING_EXAMPLES: List[Tuple[str, str]] = [
+    (UNIVERSITY, "I want to study computer science in Lahore with matric 1000 and inter 950 marks"),
+    (UNIVERSITY, "recommend universities in Karachi for BBA, my budget is Rs. 200,000 per semester"),
+    (UNIVERSITY, "which university can I get admission in with 900 inter marks"),
+    (UNIVERSITY, "looking for a degree in software engineering, fee under 150k"),
+    (UNIVERSITY, "admission criteria and merit formula for engineering universities in Islamabad"),
+    (UNIVERSITY, "cheap universities for medicine, I can afford 3 lac"),
+    (UNIVERSITY, "my matriculation marks are 980 and intermediate 1010, suggest a campus"),
+    (CAREER, "I have a math score of 85 and biology score of 60, what career suits me"),
+    (CAREER, "suggest a profession, I like technology and logical thinking"),
+    (CAREER, "what job should I choose, I enjoy teamwork and public speaking"),
+    (CAREER, "career guidance please, I am artistic and creative"),
+    (CAREER, "which field of work fits someone good at problem-solving"),
+    (CAREER, "I like presentations and group work, what should I become"),
+    (CAREER, "career recommendations for a student interested in art"),
+]
+
+_TOKEN_RE = re.compile(r"[a-z]+")
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+class RouteDecision(TypedDict):
+    intent: str
+    confidence: float
+    signals: List[str]
+    latency_ms: float
+
+
+class NaiveBayesIntentClassifier:
+    """Tiny multinomial naive Bayes over word counts, trained on a few seed examples."""
+
+    def __init__(self, examples: List[Tuple[str, str]] = _TRAINING_EXAMPLES, alpha: float = 1.0):
+        self.alpha = alpha
+        self.word_counts: Dict[str, Counter] = {}
+        self.doc_counts: Counter = Counter()
+        for label, text in examples:
+            self.doc_counts[label] += 1
+            self.word_counts.setdefault(label, Counter()).update(_tokens(text))
+        self.vocabulary = set().union(*self.word_counts.values())
+        self.totals = {label: sum(counts.values()) for label, counts in self.word_counts.items()}
+
+    def log_odds(self, text: str, positive: str = UNIVERSITY, negative: str = CAREER) -> float:
+        """Log odds of ``positive`` over ``negative``; 0 when no known word occurs."""
+        words = [w for w in _tokens(text) if w in self.vocabulary]
+        if not words:
+            return 0.0
+        score = math.log(self.doc_counts[positive] / self.doc_counts[negative])
+        vocab = len(self.vocabulary)
+        for word in words:
+            score += math.log((self.word_counts[positive][word] + self.alpha) / (self.totals[positive] + self.alpha * vocab))
+            score -= math.log((self.word_counts[negative][word] + self.alpha) / (self.totals[negative] + self.alpha * vocab))
+        return score
+
+
+class LLMTimingHandler(BaseCallbackHandler):
+    """Measures time spent inside chat model calls during a supervisor run."""
+
+    def __init__(self):
+        self._started: Dict[Any, float] = {}
+        self.total_s = 0.0
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            self.total_s += time.perf_counter() - started
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._started.pop(run_id, None)
+
+
+class IntentRouter:
+    """
+    Routes a user message to the career or university graph without an LLM call.
+
+    Keyword and regex signals give each intent weighted evidence; the optional
+    classifier adds its log odds. A message with strong rule evidence for both
+    intents ("which career suits me and which universities can I afford") is
+    routed to both graphs. Messages whose confidence is below the threshold
+    (vague or off-topic) are left to the LLM supervisor.
+    """
+
+    def __init__(self, threshold: float = ROUTER_CONFIDENCE_THRESHOLD,
+                 classifier: Optional[NaiveBayesIntentClassifier] = None,
+                 use_classifier: bool = ROUTER_USE_CLASSIFIER,
+                 multi_intent_min: float = ROUTER_MULTI_INTENT_MIN):
+        self.threshold = threshold
+        self.multi_intent_min = multi_intent_min
+        self.classifier = classifier or (NaiveBayesIntentClassifier() if use_classifier else None)
+        self._university = [(name, re.compile(p, re.IGNORECASE), w) for name, p, w in UNIVERSITY_SIGNALS]
+        self._career = [(name, re.compile(p, re.IGNORECASE), w) for name, p, w in CAREER_SIGNALS]
+        self._lock = threading.Lock()
+        self._stats = {"messages": 0, "routed": 0, "multi_intent": 0, "fallbacks": 0, "route_time_s": 0.0,
+                       "llm_time_s": 0.0, "llm_samples": 0}
+
+    def route(self, text: str) -> RouteDecision:
+        """Classify one user message."""
+        started = time.perf_counter()
+        signals = []
+        university = career = 0.0
+        for name, pattern, weight in self._university:
+            if pattern.search(text):
+                university += weight
+                signals.append(f"university:{name}")
+        for name, pattern, weight in self._career:
+            if pattern.search(text):
+                career += weight
+                signals.append(f"career:{name}")
+
+        log_odds = university - career
+        if self.classifier is not None:
+            log_odds += self.classifier.log_odds(text)
+
+        probability = 1.0 / (1.0 + math.exp(-max(-30.0, min(30.0, log_odds))))
+        confidence = max(probability, 1.0 - probability)
+        # Rules must have fired; the classifier alone never skips the LLM
+        if university >= self.multi_intent_min and career >= self.multi_intent_min:
+            intent = BOTH
+            # Confidence that neither side is incidental
+            confidence = 1.0 / (1.0 + math.exp(-(min(university, career) - self.multi_intent_min + 1.0)))
+        elif signals and confidence >= self.threshold:
+            intent = UNIVERSITY if probability > 0.5 else CAREER
+        else:
+            intent = AMBIGUOUS
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._stats["messages"] += 1
+            self._stats["routed" if intent != AMBIGUOUS else "fallbacks"] += 1
+            if intent == BOTH:
+                self._stats["multi_intent"] += 1
+            self._stats["route_time_s"] += elapsed
+        return RouteDecision(intent=intent, confidence=round(confidence, 4),
+                             signals=signals, latency_ms=round(elapsed * 1000, 3))
+
+    def record_llm_time(self, seconds: float):
+        """Record the LLM time of a message that fell back to the supervisor."""
+        with self._lock:
+            self._stats["llm_time_s"] += seconds
+            self._stats["llm_samples"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit rate and the LLM latency saved by routed messages."""
+        with self._lock:
+            stats = dict(self._stats)
+        messages = stats["messages"] or 1
+        # Unknown until a message has fallen back to the LLM (None, not a negative saving)
+        mean_llm_s = stats["llm_time_s"] / stats["llm_samples"] if stats["llm_samples"] else None
+        return {
+            "messages": stats["messages"],
+            "routed": stats["routed"],
+            "multi_intent": stats["multi_intent"],
+            "fallbacks": stats["fallbacks"],
+            "hit_rate": round(stats["routed"] / messages, 4),
+            "avg_route_ms": round(stats["route_time_s"] * 1000 / messages, 3),
+            "avg_llm_fallback_s": round(mean_llm_s, 4) if mean_llm_s is not None else None,
+            # Each routed message skips the supervisor's LLM calls
+            "latency_saved_s": (round(stats["routed"] * mean_llm_s - stats["route_time_s"], 4)
+                                if mean_llm_s is not None else None),
+        }
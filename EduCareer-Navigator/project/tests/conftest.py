@@ -0,0 +1,17 @@
+"""
+Test setup: offline backends and a scratch working directory
+"""
+
+import os
+import sys
+import tempfile
+
+# The modules read their settings at import time, so these come first
+os.environ["BACKEND_MODE"] = "fake"
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+os.environ.setdefault("CHECKPOINT_RETENTION_ENABLED", "false")
+os.environ.setdefault("TELEMETRY_ENABLED", "false")
+
+# Checkpoint databases are relative paths; keep them out of the project
+os.chdir(tempfile.mkdtemp(prefix="guidance_tests_"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,59 @@
+"""
+Resuming an interrupted advisor run continues from its checkpoint
+"""
+
+import uuid
+
+import pytest
+
+from advisor_agent.graphsetup import get_advisor_graph, resume_advisor
+from runtime import offline
+from runtime.checkpoints import NothingToResumeError
+from supervisor_agent import parse_student_unidata
+
+MESSAGE = "Which universities in Lahore offer Computer Science with fee under 300000? Matric marks 950, inter marks 900"
+
+
+@pytest.fixture
+def search_calls(monkeypatch):
+    """Queries sent to the (fake) search backend during the test"""
+    calls = []
+    run = offline.FakeSearch.run
+
+    def counting_run(self, query):
+        calls.append(query)
+        return run(self, query)
+
+    monkeypatch.setattr(offline.FakeSearch, "run", counting_run)
+    return calls
+
+
+def new_config():
+    return {"configurable": {"thread_id": f"test-{uuid.uuid4()}"}}
+
+
+def test_resume_searches_once(search_calls):
+    config = new_config()
+
+    paused = get_advisor_graph().invoke(parse_student_unidata(MESSAGE), config=config)
+    assert "__interrupt__" in paused
+    assert len(search_calls) == 1
+
+    final = resume_advisor(config, "yes")
+    assert "__interrupt__" not in final
+    assert final["ranked_universities"] is not None
+    assert len(search_calls) == 1
+
+
+def test_declined_resume_searches_once(search_calls):
+    config = new_config()
+
+    get_advisor_graph().invoke(parse_student_unidata(MESSAGE), config=config)
+    final = resume_advisor(config, "no")
+    assert "__interrupt__" not in final
+    assert len(search_calls) == 1
+
+
+def test_resume_without_interrupt_raises():
+    with pytest.raises(NothingToResumeError):
+        resume_advisor(new_config(), "yes")
@@ -0,0 +1,91 @@
+"""
+Paginated history loading and session saves on the same thread
+"""
+
+import uuid
+
+import pytest
+
+pytest.importorskip("mongomock")
+
+from database.mongodb_client import ChatHistoryDB, message_doc
+
+
+@pytest.fixture(scope="module")
+def db():
+    return ChatHistoryDB("mongomock://")
+
+
+def conversation(count):
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i}"} for i in range(count)]
+
+
+def test_pages_cover_thread_in_order(db):
+    thread_id = f"test-{uuid.uuid4()}"
+    db.save_chat_session(thread_id, conversation(11), user_id="pager")
+
+    pages, cursor = [], None
+    while True:
+        page = db.get_chat_history_page(thread_id, before=cursor, page_size=4)
+        pages.insert(0, page["messages"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert [len(page) for page in pages] == [3, 4, 4]
+    assert [m["content"] for page in pages for m in page] == [m["content"] for m in conversation(11)]
+    assert all(set(m) == {"role", "content"} for page in pages for m in page)
+    assert db.get_latest_thread_id("pager") == thread_id
+
+
+def test_save_after_loading_a_page_keeps_new_messages(db):
+    # Save 6 messages, load a 4-message page, add one, save again (what the chat UI does)
+    thread_id = f"test-{uuid.uuid4()}"
+    db.save_chat_session(thread_id, conversation(6), user_id="loader")
+
+    page = db.get_chat_history_page(thread_id, page_size=4)
+    messages = page["messages"] + [{"role": "user", "content": "NEW"}]
+    loaded, start_order = len(page["messages"]), db.next_message_order(thread_id)
+
+    saved = db.save_chat_session(thread_id, messages[loaded:], user_id="loader", start_order=start_order)
+    assert (saved["inserted"], saved["skipped"]) == (1, 0)
+
+    # Saving again writes nothing new
+    saved = db.save_chat_session(thread_id, messages[loaded:], user_id="loader", start_order=start_order)
+    assert (saved["inserted"], saved["skipped"]) == (0, 1)
+
+    history = [m["content"] for m in db.get_chat_history(thread_id)]
+    assert history == [m["content"] for m in conversation(6)] + ["NEW"]
+
+
+def test_next_message_order_of_new_thread_is_zero(db):
+    assert db.next_message_order(f"test-{uuid.uuid4()}") == 0
+
+
+def test_index_failures_never_delete_messages():
+    db = ChatHistoryDB("mongomock://", database_name=f"dedupe_{uuid.uuid4().hex}")
+    assert db.session_index_ready
+    db.chat_collection.drop_index("thread_message_order_unique")
+
+    # Copies saved before the unique index existed
+    thread_id = f"test-{uuid.uuid4()}"
+    for _ in range(2):
+        db.chat_collection.insert_many([{**message_doc(thread_id, m["role"], m["content"]), "message_order": i}
+                                        for i, m in enumerate(conversation(3))])
+    assert db.chat_collection.count_documents({"thread_id": thread_id}) == 6
+
+    assert db.ensure_session_index() is False
+    assert db.chat_collection.count_documents({"thread_id": thread_id}) == 6
+
+    # An index of the same name with other options is reported, not "fixed"
+    db.chat_collection.create_index("message_order", name="thread_message_order_unique")
+    assert db.ensure_session_index() is False
+    assert db.chat_collection.count_documents({"thread_id": thread_id}) == 6
+    db.chat_collection.drop_index("thread_message_order_unique")
+
+    # Removal is explicit, and a dry run only reports
+    assert db.remove_duplicate_messages(dry_run=True) == {"threads": 1, "duplicates": 3, "removed": 0}
+    assert db.chat_collection.count_documents({"thread_id": thread_id}) == 6
+    assert db.remove_duplicate_messages() == {"threads": 1, "duplicates": 3, "removed": 3}
+    assert [m["content"] for m in db.get_chat_history(thread_id)] == [m["content"] for m in conversation(3)]
+    assert db.ensure_session_index() is True
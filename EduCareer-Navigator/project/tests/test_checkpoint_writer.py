@@ -0,0 +1,82 @@
+"""
+Checkpoint writes fail instead of hanging when the database cannot be written
+"""
+
+import sqlite3
+import threading
+import uuid
+
+import pytest
+
+from runtime.checkpoints import PooledSqliteSaver, _GroupCommitWriter
+
+
+
+def write_ops(thread_id):
+    return [("execute", "SELECT ?", (thread_id,))]
+
+
+def put_write(saver, thread_id):
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": "", "checkpoint_id": "cp-1"}}
+    saver.put_writes(config, [("channel", "value")], task_id="task-1")
+
+
+def test_write_raises_while_database_is_locked():
+    path = f"locked-{uuid.uuid4().hex}.db"
+    saver = PooledSqliteSaver(path, busy_timeout_ms=100, write_timeout_s=5)
+    saver.setup()
+    put_write(saver, "before")
+    blocker = sqlite3.connect(path, isolation_level=None)
+    try:
+        blocker.execute("BEGIN EXCLUSIVE")
+        with pytest.raises(sqlite3.OperationalError, match="locked"):
+            put_write(saver, "locked")
+        blocker.execute("ROLLBACK")
+
+        # The writer recovers once the lock is released
+        put_write(saver, "unlocked")
+        rows = saver.conn.execute("SELECT DISTINCT thread_id FROM writes").fetchall()
+        assert sorted(rows) == [("before",), ("unlocked",)]
+        assert saver.get_stats()["errors"] == 1
+    finally:
+        blocker.close()
+        saver.close()
+
+
+def test_write_raises_when_writer_cannot_connect():
+    attempts = []
+
+    def connect():
+        attempts.append(1)
+        raise sqlite3.OperationalError("unable to open database file")
+
+    writer = _GroupCommitWriter(connect, batch_size=8, commit_delay_s=0, write_timeout_s=5)
+    try:
+        for _ in range(2):
+            with pytest.raises(sqlite3.OperationalError, match="unable to open"):
+                writer.submit(write_ops("nowhere"))
+        # One attempt at startup, then a retry per batch; the writer thread stays up
+        assert len(attempts) == 3
+        assert writer._thread.is_alive()
+    finally:
+        writer.close()
+
+
+def test_write_times_out_instead_of_blocking_forever():
+    stuck = threading.Event()
+
+    def connect():
+        stuck.wait(10)
+        return sqlite3.connect(":memory:")
+
+    writer = _GroupCommitWriter(connect, batch_size=8, commit_delay_s=0, write_timeout_s=0.2)
+    try:
+        with pytest.raises(TimeoutError):
+            writer.submit(write_ops("stalled"))
+    finally:
+        stuck.set()
+        writer.close()
+
+    # A writer that is no longer running refuses the write immediately
+    with pytest.raises(sqlite3.OperationalError, match="not running"):
+        writer.submit(write_ops("closed"))
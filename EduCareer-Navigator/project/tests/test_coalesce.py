@@ -0,0 +1,100 @@
+"""
+Single-flight coalescing across tasks and threads, and cancelled waiters
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from runtime.coalesce import SingleFlight
+
+
+def test_cancelled_follower_does_not_affect_other_waiters():
+    flight = SingleFlight("test")
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return "table"
+
+        leader = asyncio.create_task(flight.ado("key", work))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(flight.ado("key", work)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        followers[0].cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        with pytest.raises(asyncio.CancelledError):
+            await followers[0]
+        return await leader, await followers[1]
+
+    assert asyncio.run(scenario()) == ("table", "table")
+    stats = flight.get_stats()
+    assert (stats["executed"], stats["coalesced"], stats["errors"]) == (1, 2, 0)
+    assert flight.in_flight() == 0
+
+
+def test_thread_leader_shares_result_with_tasks():
+    flight = SingleFlight("test")
+    started, release = threading.Event(), threading.Event()
+
+    def work():
+        started.set()
+        release.wait(5)
+        return "from-thread"
+
+    async def followers():
+        async def never_runs():
+            raise AssertionError("coalesced call executed")
+
+        waiting = [asyncio.create_task(flight.ado("key", never_runs)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(*waiting)
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        leader = pool.submit(flight.do, "key", work)
+        assert started.wait(5)
+        results = asyncio.run(followers())
+        assert leader.result(5) == "from-thread"
+
+    assert results == ["from-thread"] * 3
+    assert flight.get_stats()["executed"] == 1
+
+
+def test_task_leader_shares_result_and_errors_with_threads():
+    flight = SingleFlight("test")
+
+    async def scenario(outcome):
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        leader = asyncio.create_task(flight.ado("key", work))
+        await asyncio.sleep(0)
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            loop = asyncio.get_running_loop()
+            waiting = [loop.run_in_executor(pool, flight.do, "key", lambda: "not coalesced")
+                       for _ in range(3)]
+            # Let the threads join the in-flight call before the leader finishes
+            while flight.get_stats()["coalesced"] < 3:
+                await asyncio.sleep(0.01)
+            release.set()
+            return await asyncio.gather(leader, *waiting, return_exceptions=True)
+
+    assert asyncio.run(scenario("from-task")) == ["from-task"] * 4
+
+    error = ValueError("search failed")
+    assert asyncio.run(scenario(error)) == [error] * 4
+    stats = flight.get_stats()
+    assert (stats["executed"], stats["errors"]) == (2, 1)
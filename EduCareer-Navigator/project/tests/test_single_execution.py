@@ -0,0 +1,85 @@
+"""
+A turn that needs both agents runs each agent graph once, including across an interrupt
+"""
+
+import asyncio
+import uuid
+
+import pytest
+
+from runtime import offline
+from runtime.telemetry import graph_runs
+from supervisor_agent import arun_guidance, resume_guidance, run_guidance
+from supervisor_router import BOTH
+
+MESSAGE = ("I have a math score of 80 and a biology score of 40 and I love technology. "
+           "Which career suits me and which universities in Lahore can I afford with fee under 300000? "
+           "Matric marks 950, inter marks 900")
+
+
+@pytest.fixture
+def search_calls(monkeypatch):
+    calls = []
+    run = offline.FakeSearch.run
+
+    def counting_run(self, query):
+        calls.append(query)
+        return run(self, query)
+
+    monkeypatch.setattr(offline.FakeSearch, "run", counting_run)
+    return calls
+
+
+def new_config():
+    return {"configurable": {"thread_id": f"test-{uuid.uuid4()}"}}
+
+
+def runs_since(before):
+    after = graph_runs.get_stats()
+    return {name: after[name] - before[name] for name in before}
+
+
+def test_both_turn_runs_each_graph_once(search_calls):
+    config = new_config()
+    before = graph_runs.get_stats()
+
+    result, route = run_guidance([{"role": "user", "content": MESSAGE}], config)
+    assert route == BOTH
+    assert "__interrupt__" in result
+
+    final = resume_guidance(route, config, "yes")
+    assert "__interrupt__" not in final
+    assert final["career_recommendations"] and final["ranked_universities"] is not None
+    assert runs_since(before) == {"career": 1, "advisor": 1}
+    assert len(search_calls) == 1
+
+
+def test_async_both_turn_runs_each_graph_once(search_calls):
+    config = new_config()
+    before = graph_runs.get_stats()
+
+    result, route = asyncio.run(arun_guidance([{"role": "user", "content": MESSAGE}], config))
+    assert route == BOTH
+    assert "__interrupt__" in result
+
+    resume_guidance(route, config, "yes")
+    assert runs_since(before) == {"career": 1, "advisor": 1}
+    assert len(search_calls) == 1
+
+
+def test_supervisor_tool_call_resume_runs_advisor_once(monkeypatch, search_calls):
+    # Without the router the supervisor LLM calls the advisor as a tool; resuming replays that call
+    import supervisor_agent
+    monkeypatch.setattr(supervisor_agent, "ROUTER_ENABLED", False)
+    config = new_config()
+    before = graph_runs.get_stats()
+
+    message = "Which universities in Lahore offer Computer Science with fee under 300000? Matric marks 950, inter marks 900"
+    result, route = run_guidance([{"role": "user", "content": message}], config)
+    assert route == "supervisor"
+    assert "__interrupt__" in result
+
+    final = resume_guidance(route, config, "yes")
+    assert "__interrupt__" not in final
+    assert runs_since(before) == {"career": 0, "advisor": 1}
+    assert len(search_calls) == 1
@@ -0,0 +1,45 @@
+"""
+Streamed-turn statistics stay consistent when turns stream from several threads
+"""
+
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from runtime.telemetry import RunCounter
+from supervisor_agent import stream_guidance, stream_stats
+
+
+def test_concurrent_adds_are_not_lost():
+    counter = RunCounter("turns", "total_s")
+    start = threading.Barrier(8)
+
+    def add_many():
+        start.wait()
+        for _ in range(2000):
+            counter.add(turns=1, total_s=0.5)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        for future in [pool.submit(add_many) for _ in range(8)]:
+            future.result()
+
+    assert counter.get_stats() == {"turns": 16000, "total_s": 8000.0}
+
+
+def test_each_streamed_turn_is_counted_once():
+    before = stream_stats.get_stats()
+
+    def stream_turn(i):
+        config = {"configurable": {"thread_id": f"test-{uuid.uuid4()}"}}
+        messages = [{"role": "user", "content": f"I have a math score of {60 + i} and love technology. "
+                                                "Which career suits me?"}]
+        events = list(stream_guidance(messages, config))
+        return events[-1]
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        finals = list(pool.map(stream_turn, range(4)))
+
+    after = stream_stats.get_stats()
+    assert all(kind == "done" for kind, _ in finals)
+    assert after["turns"] - before["turns"] == 4
+    assert after["total_s"] - before["total_s"] > 0
@@ -0,0 +1,28 @@
+"""
+Bounded supervisor context for histories at the edges of the token budget
+"""
+
+from supervisor_context import ConversationContext
+
+
+def test_system_only_history_over_budget():
+    system = [{"role": "system", "content": "x" * 400}]
+
+    result = ConversationContext(token_budget=10).build(system)
+
+    # System messages are never dropped, and there is no turn to shrink
+    assert result["messages"] == system
+    assert (result["turns_kept"], result["turns_summarized"]) == (0, 0)
+
+
+def test_latest_turn_shrunk_when_nothing_else_fits():
+    messages = [{"role": "system", "content": "prompt"},
+                {"role": "user", "content": "first question"},
+                {"role": "assistant", "content": "first answer"},
+                {"role": "user", "content": "y" * 4000}]
+
+    result = ConversationContext(keep_turns=4, token_budget=200).build(messages, thread_id="edge")
+
+    assert result["turns_kept"] == 1
+    assert result["messages"][-1]["role"] == "user"
+    assert len(result["messages"][-1]["content"]) < 4000